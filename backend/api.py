@@ -3,12 +3,26 @@ API REST para o Amplify - Sistema de Recomendação Musical
 Integração entre Backend (Python/Grafo) e Frontend (React)
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional, Dict, Any, Union
+import itertools
+from contextlib import contextmanager
+import json
+import os
 import uvicorn
 from grafoMatriz import TGrafoND
+from coalescencia import ConsultasEmVoo
+from concorrencia import TravaLeituraEscrita
+from carga import CargaGrafo
+from diario import recuperar_grafo
+from tabela_vizinhos import TabelaVizinhos
+from recomendacao import (
+    SIMILARIDADES, Prazo, recomendar_musicas, recomendar_para_playlist, recomendar_por_filtros
+)
 
 # Inicializa o FastAPI
 app = FastAPI(
@@ -27,7 +41,81 @@ app.add_middleware(
 )
 
 # Inicializa o grafo global
-grafo = TGrafoND()
+# O catálogo música/artista/gênero é muito esparso: usa listas de adjacência
+MODO_GRAFO = "esparsa"
+
+# Persistência incremental opcional: com AMPLIFY_DIARIO definido, cada mutação
+# é registrada no diário e, ao iniciar, o grafo é recuperado do último
+# snapshot (AMPLIFY_SNAPSHOT) mais o diário
+CAMINHO_DIARIO = os.getenv("AMPLIFY_DIARIO")
+CAMINHO_SNAPSHOT = os.getenv("AMPLIFY_SNAPSHOT", "Grafo.amps")
+
+if CAMINHO_DIARIO:
+    grafo = recuperar_grafo(CAMINHO_SNAPSHOT, CAMINHO_DIARIO, modo=MODO_GRAFO)
+    grafo.ativar_diario(CAMINHO_DIARIO)
+else:
+    grafo = TGrafoND(modo=MODO_GRAFO)
+
+# Tabela de recomendações pré-calculada (python tabela_vizinhos.py ...), se existir:
+# /api/recomendacoes/{musica_nome} responde dela em O(k) e só calcula na hora
+# para músicas que não estão na tabela ou cuja vizinhança mudou depois dela.
+# Ela só é usada se foi calculada do grafo em uso (mesma impressão digital)
+# e é vinculada de novo a cada troca do grafo
+CAMINHO_TABELA_RECOMENDACOES = os.getenv("AMPLIFY_TABELA_RECOMENDACOES", "Recomendacoes.ampk")
+
+def _abrir_tabela_recomendacoes(grafo_alvo, tabela=None):
+    """
+    `tabela` (ou a do arquivo configurado, se None) vinculada a grafo_alvo,
+    ou None se não há arquivo ou a tabela foi calculada de outro grafo
+    """
+    if tabela is None:
+        if not os.path.exists(CAMINHO_TABELA_RECOMENDACOES):
+            return None
+        tabela = TabelaVizinhos(CAMINHO_TABELA_RECOMENDACOES)
+    if not tabela.vincular(grafo_alvo):
+        print(f" Tabela '{CAMINHO_TABELA_RECOMENDACOES}' é de outro grafo: recomendações calculadas na hora")
+        return None
+    return tabela
+
+tabela_recomendacoes = _abrir_tabela_recomendacoes(grafo)
+
+# Concorrência: os endpoints que usam o grafo são funções síncronas, que o
+# FastAPI roda no seu pool de threads (fora do laço de eventos). Leituras
+# entram juntas em trava_grafo.leitura(); mutações e a troca do grafo global
+# esperam ficar sozinhas em trava_grafo.escrita() (veja concorrencia.py).
+# Grafos novos (carga de arquivo, demonstração) são montados fora da trava e
+# só a troca da referência é exclusiva.
+trava_grafo = TravaLeituraEscrita()
+
+# Requisições simultâneas idênticas de /api/recomendacoes/{musica_nome}
+# compartilham um único cálculo (veja coalescencia.py)
+consultas_em_voo = ConsultasEmVoo()
+
+def _substituir_grafo(novo_grafo: TGrafoND):
+    """
+    Troca o grafo global; com o diário ativo, o novo grafo vira o ponto de
+    partida dele. O snapshot do novo grafo é gravado antes da trava de
+    escrita; sob ela só o arquivo é posto no lugar e as referências trocadas.
+    A tabela pré-calculada também é vinculada ao novo grafo antes da trava
+    (a impressão digital custa O(n + m)) e só deixa de ser usada se ele for
+    outro catálogo.
+    """
+    nova_tabela = _abrir_tabela_recomendacoes(novo_grafo, tabela_recomendacoes)
+
+    @contextmanager
+    def trocar():
+        global grafo, tabela_recomendacoes
+        with trava_grafo.escrita():
+            yield  # O diário é esvaziado aqui, sem mutações no meio
+            grafo.transferir_diario(novo_grafo)
+            grafo = novo_grafo
+            tabela_recomendacoes = nova_tabela
+
+    if grafo.diario is not None:
+        grafo.diario.reiniciar(novo_grafo, CAMINHO_SNAPSHOT, trava=trocar)
+    else:
+        with trocar():
+            pass
 
 # ==================== MODELOS PYDANTIC ====================
 
@@ -40,6 +128,15 @@ class ArestaCreate(BaseModel):
     vertice2: str  # Nome do vértice
     peso: float = 1.0
 
+class LoteAresta(BaseModel):
+    vertice1: Union[int, str]  # ID ou nome do vértice
+    vertice2: Union[int, str]
+    peso: float = 1.0
+
+class LoteRequest(BaseModel):
+    vertices: List[VerticeCreate] = []
+    arestas: List[LoteAresta] = []
+
 class LoginRequest(BaseModel):
     email: str
     password: str
@@ -49,6 +146,12 @@ class RecomendacaoRequest(BaseModel):
     genero: Optional[str] = None
     artista: Optional[str] = None
     limite: int = 10
+    orcamento_ms: Optional[float] = None
+
+class PlaylistRecomendacaoRequest(BaseModel):
+    musicas: List[str]
+    limite: int = 10
+    orcamento_ms: Optional[float] = None
 
 class MusicaInfo(BaseModel):
     id: int
@@ -93,22 +196,26 @@ async def register(request: LoginRequest):
 # ==================== ENDPOINTS DO GRAFO ====================
 
 @app.get("/api/grafo/info")
-async def get_grafo_info():
+def get_grafo_info():
     """Retorna informações gerais do grafo"""
-    return {
-        "vertices": grafo.n,
-        "arestas": grafo.m,
-        "vertices_por_tipo": {
-            tipo: len(vertices) 
-            for tipo, vertices in grafo.vertices_por_tipo.items()
+    with trava_grafo.leitura():
+        return {
+            "vertices": grafo.num_vertices,
+            "arestas": grafo.m,
+            "vertices_por_tipo": {
+                tipo: len(vertices) 
+                for tipo, vertices in grafo.vertices_por_tipo.items()
+            },
+            "componentes": grafo.num_componentes(),
+            "geracao_ids": grafo.geracao_ids
         }
-    }
 
 @app.post("/api/grafo/vertices")
-async def criar_vertice(vertice: VerticeCreate):
+def criar_vertice(vertice: VerticeCreate):
     """Cria um novo vértice no grafo"""
     try:
-        id_vertice = grafo.insereV(vertice.nome, vertice.tipo)
+        with trava_grafo.escrita():
+            id_vertice = grafo.insereV(vertice.nome, vertice.tipo)
         return {
             "success": True,
             "id": id_vertice,
@@ -118,38 +225,100 @@ async def criar_vertice(vertice: VerticeCreate):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# Listagens paginadas: as listagens são geradas sob demanda, em ordem de ID. Sem `limit`, a
+# resposta traz tudo (como antes); com `limit`, traz uma página e o cursor
+# "proximo" (o último ID da página, para passar em `after`), ou null no fim.
+# Os IDs só mudam ao compactar o grafo: quem passa `geracao` (o
+# "geracao_ids" da primeira página) recebe 409 se isso aconteceu no meio da
+# paginação. Com formato=ndjson, os registros saem em streaming, um JSON
+# por linha, sem montar a lista inteira na memória. Cada listagem percorre
+# só o grafo em uso quando a requisição chegou: se ele for trocado no meio do
+# streaming, o restante sai do mesmo grafo, sem misturar os dois.
+
+FORMATOS_LISTAGEM = ("json", "ndjson")
+
+def _validar_listagem(grafo_listado: TGrafoND, formato: str, geracao: Optional[int]):
+    if formato not in FORMATOS_LISTAGEM:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato inválido: '{formato}'. Use um de {list(FORMATOS_LISTAGEM)}"
+        )
+    if geracao is not None and geracao != grafo_listado.geracao_ids:
+        raise HTTPException(
+            status_code=409,
+            detail="O grafo foi compactado e os IDs mudaram; recomece a paginação"
+        )
+
+def _em_lotes_sob_leitura(registros, tamanho_lote=256):
+    """
+    Gera os registros tomando a trava de leitura só enquanto cada lote é
+    montado: um cliente lento no streaming não segura as mutações
+    """
+    while True:
+        with trava_grafo.leitura():
+            lote = list(itertools.islice(registros, tamanho_lote))
+        if not lote:
+            return
+        yield from lote
+
+def _responder_listagem(grafo_listado: TGrafoND, chave: str, registros, contar, limit: Optional[int],
+                        formato: str):
+    """
+    Resposta JSON (completa ou uma página) ou streaming NDJSON dos registros
+    gerados. Numa página, "total" é o tamanho da listagem inteira (contar(),
+    sob a trava de leitura) e "quantidade" o da página.
+    """
+    if formato == "ndjson":
+        if limit is not None:
+            registros = itertools.islice(registros, limit)
+        linhas = (json.dumps(registro, ensure_ascii=False) + "\n"
+                  for registro in _em_lotes_sob_leitura(registros))
+        return StreamingResponse(linhas, media_type="application/x-ndjson")
+
+    with trava_grafo.leitura():
+        if limit is None:
+            itens = list(registros)
+            return {chave: itens, "total": len(itens)}
+
+        # Um registro a mais só para saber se há próxima página
+        pagina = list(itertools.islice(registros, limit + 1))
+        proximo = None
+        if len(pagina) > limit:
+            pagina.pop()
+            proximo = pagina[-1]["id"]
+        return {chave: pagina, "total": contar(), "quantidade": len(pagina), "proximo": proximo,
+                "geracao_ids": grafo_listado.geracao_ids}
+
+def _registros_vertices(grafo_listado: TGrafoND, tipo: Optional[str], apos: int):
+    for vid in grafo_listado.iterar_vertices(tipo, apos):
+        info = grafo_listado.itens.get(vid)
+        if info is not None:  # Pode ter sido removido durante o streaming
+            yield {"id": vid, "nome": info["nome"], "tipo": info["tipo"]}
+
 @app.get("/api/grafo/vertices")
-async def listar_vertices(tipo: Optional[str] = None):
-    """Lista todos os vértices ou filtra por tipo"""
-    vertices = []
-    
-    if tipo:
-        ids_vertices = grafo.vertices_por_tipo.get(tipo, set())
-    else:
-        ids_vertices = grafo.itens.keys()
-    
-    for vid in ids_vertices:
-        info = grafo.itens[vid]
-        vertices.append({
-            "id": vid,
-            "nome": info["nome"],
-            "tipo": info["tipo"]
-        })
-    
-    return {"vertices": vertices, "total": len(vertices)}
+def listar_vertices(tipo: Optional[str] = None, limit: Optional[int] = Query(None, ge=1),
+                    after: int = -1, formato: str = "json", geracao: Optional[int] = None):
+    """Lista todos os vértices ou filtra por tipo (paginação opcional por cursor)"""
+    atual = grafo
+    _validar_listagem(atual, formato, geracao)
+    def contar():
+        return len(atual.vertices_por_tipo.get(tipo, ())) if tipo else atual.num_vertices
+
+    return _responder_listagem(atual, "vertices", _registros_vertices(atual, tipo or None, after), contar,
+                               limit, formato)
 
 @app.get("/api/grafo/vertices/{vertice_id}")
-async def get_vertice(vertice_id: int):
+def get_vertice(vertice_id: int):
     """Retorna informações de um vértice específico"""
-    if vertice_id not in grafo.itens:
-        raise HTTPException(status_code=404, detail="Vértice não encontrado")
-    
-    info = grafo.itens[vertice_id]
-    
-    # Busca conexões
-    conexoes = []
-    for i in range(grafo.n):
-        if grafo.adj[vertice_id][i] > 0:
+    with trava_grafo.leitura():
+        if vertice_id not in grafo.itens:
+            raise HTTPException(status_code=404, detail="Vértice não encontrado")
+        
+        info = grafo.itens[vertice_id]
+        
+        # Busca conexões
+        conexoes = []
+        for i in sorted(grafo.obter_vizinhos(vertice_id)):
             conexoes.append({
                 "id": i,
                 "nome": grafo.itens[i]["nome"],
@@ -166,20 +335,21 @@ async def get_vertice(vertice_id: int):
     }
 
 @app.post("/api/grafo/arestas")
-async def criar_aresta(aresta: ArestaCreate):
+def criar_aresta(aresta: ArestaCreate):
     """Cria uma aresta entre dois vértices"""
     try:
-        # Busca IDs dos vértices pelos nomes
-        id1 = grafo.itens_reverso.get(aresta.vertice1)
-        id2 = grafo.itens_reverso.get(aresta.vertice2)
-        
-        if id1 is None or id2 is None:
-            raise HTTPException(
-                status_code=404, 
-                detail="Um ou ambos os vértices não existem"
-            )
-        
-        grafo.insereA(id1, id2, aresta.peso)
+        with trava_grafo.escrita():
+            # Busca IDs dos vértices pelos nomes
+            id1 = grafo.itens_reverso.get(aresta.vertice1)
+            id2 = grafo.itens_reverso.get(aresta.vertice2)
+            
+            if id1 is None or id2 is None:
+                raise HTTPException(
+                    status_code=404, 
+                    detail="Um ou ambos os vértices não existem"
+                )
+            
+            grafo.insereA(id1, id2, aresta.peso)
         
         return {
             "success": True,
@@ -187,136 +357,213 @@ async def criar_aresta(aresta: ArestaCreate):
             "vertice2": aresta.vertice2,
             "peso": aresta.peso
         }
-    except IndexError as e:
+    except (IndexError, ValueError) as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# Mutação em lote: vértices e arestas em uma requisição só, em JSON
+# ({"vertices": [...], "arestas": [...]}) ou NDJSON (Content-Type
+# application/x-ndjson, um vértice {"nome", "tipo"} ou uma aresta
+# {"vertice1", "vertice2", "peso"} por linha). Os vértices entram antes das
+# arestas, então as arestas podem citar vértices do próprio lote.
+
+def _item_ndjson(linha: bytes, numero: int, lote: LoteRequest):
+    linha = linha.strip()
+    if not linha:
+        return
+    try:
+        item = json.loads(linha)
+        if not isinstance(item, dict):
+            raise ValueError("esperado um objeto JSON")
+        if "vertice1" in item:
+            lote.arestas.append(LoteAresta(**item))
+        else:
+            lote.vertices.append(VerticeCreate(**item))
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=f"Linha {numero} inválida: {e}")
+
+async def _ler_lote_ndjson(request: Request) -> LoteRequest:
+    """Lê o corpo NDJSON conforme ele chega, sem juntar o texto inteiro"""
+    lote = LoteRequest()
+    pendente = b""
+    numero = 0
+    async for pedaco in request.stream():
+        pendente += pedaco
+        *linhas, pendente = pendente.split(b"\n")
+        for linha in linhas:
+            numero += 1
+            _item_ndjson(linha, numero, lote)
+    _item_ndjson(pendente, numero + 1, lote)
+    return lote
+
+def _resolver_vertice(referencia: Union[int, str]) -> Optional[int]:
+    if isinstance(referencia, int):
+        return referencia if grafo.vertice_valido(referencia) else None
+    return grafo.itens_reverso.get(referencia)
+
+def _aplicar_lote(lote: LoteRequest):
+    """Aplica o lote sob a trava de escrita, com uma só expansão da estrutura e uma só versão"""
+    with trava_grafo.escrita(), grafo.lote():
+        # Vértices: um único insereV_lote (a estrutura cresce uma vez)
+        vistos = set(grafo.itens_reverso)
+        ja_existiam = []
+        for vertice in lote.vertices:
+            ja_existiam.append(vertice.nome in vistos)
+            vistos.add(vertice.nome)
+        ids = grafo.insereV_lote([(vertice.nome, vertice.tipo) for vertice in lote.vertices])
+        resultados_vertices = [
+            {"nome": vertice.nome, "id": vid, "status": "existente" if existia else "criado"}
+            for vertice, vid, existia in zip(lote.vertices, ids, ja_existiam)
+        ]
+
+        resultados_arestas = []
+        for aresta in lote.arestas:
+            resultado = {"vertice1": aresta.vertice1, "vertice2": aresta.vertice2}
+            v, w = _resolver_vertice(aresta.vertice1), _resolver_vertice(aresta.vertice2)
+            if v is None or w is None:
+                resultado.update(status="erro", erro="Um ou ambos os vértices não existem")
+            elif grafo.tem_aresta(v, w):
+                resultado["status"] = "existente"
+            else:
+                try:
+                    grafo.insereA(v, w, aresta.peso)
+                    resultado["status"] = "criada"
+                except ValueError as e:  # Peso não positivo
+                    resultado.update(status="erro", erro=str(e))
+            resultados_arestas.append(resultado)
+
+    return {
+        "success": True,
+        "vertices": resultados_vertices,
+        "arestas": resultados_arestas,
+        "resumo": {
+            "vertices_criados": sum(r["status"] == "criado" for r in resultados_vertices),
+            "arestas_criadas": sum(r["status"] == "criada" for r in resultados_arestas),
+            "erros": sum(r["status"] == "erro" for r in resultados_arestas)
+        },
+        "versao_grafo": grafo.versao
+    }
+
+@app.post("/api/grafo/lote")
+async def aplicar_lote(request: Request):
+    """Insere vértices e arestas (por nome ou ID) em lote; retorna o resultado de cada item"""
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        lote = await _ler_lote_ndjson(request)
+    else:
+        try:
+            dados = await request.json()
+            if not isinstance(dados, dict):
+                raise ValueError("esperado um objeto JSON com 'vertices' e/ou 'arestas'")
+            lote = LoteRequest(**dados)
+        except (ValueError, ValidationError) as e:
+            raise HTTPException(status_code=400, detail=f"Lote inválido: {e}")
+    return await run_in_threadpool(_aplicar_lote, lote)
+
+@app.post("/api/grafo/compactar")
+def compactar_grafo():
+    """
+    Compacta o grafo descartando as posições de vértices removidos.
+    Os IDs mudam: a resposta traz o mapa {id antigo: id novo}.
+    """
+    with trava_grafo.escrita():
+        remapeamento = grafo.compactar()
+        return {
+            "success": True,
+            "remapeamento": remapeamento,
+            "geracao_ids": grafo.geracao_ids
+        }
+
 # ==================== ENDPOINTS DE MÚSICA ====================
 
+def _registros_musicas(grafo_listado: TGrafoND, genero: Optional[str], artista: Optional[str], apos: int):
+    # Os filtros vêm dos índices da projeção: músicas de fora nem são visitadas
+    projecao = grafo_listado.projecao_musicas
+    for mid in projecao.musicas_filtradas(genero, artista, apos):
+        registro = projecao.registro(mid)
+        if registro is not None:  # Pode ter sido removida durante o streaming
+            yield registro
+
 @app.get("/api/musicas")
-async def listar_musicas(genero: Optional[str] = None, artista: Optional[str] = None):
-    """Lista músicas com filtros opcionais"""
-    musicas = []
-    
-    ids_musicas = grafo.vertices_por_tipo.get("musica", set())
-    
-    for mid in ids_musicas:
-        info = grafo.itens[mid]
-        musica_nome = info["nome"]
-        
-        # Busca artistas e gêneros conectados
-        artistas_conectados = []
-        generos_conectados = []
+def listar_musicas(genero: Optional[str] = None, artista: Optional[str] = None,
+                   limit: Optional[int] = Query(None, ge=1), after: int = -1,
+                   formato: str = "json", geracao: Optional[int] = None):
+    """Lista músicas com filtros opcionais (paginação opcional por cursor)"""
+    atual = grafo
+    _validar_listagem(atual, formato, geracao)
+    return _responder_listagem(atual, "musicas", _registros_musicas(atual, genero, artista, after),
+                               lambda: atual.projecao_musicas.contar_musicas(genero, artista), limit, formato)
+
+@app.get("/api/musicas/{musica_id}")
+def get_musica(musica_id: int):
+    """Retorna detalhes de uma música específica"""
+    with trava_grafo.leitura():
+        if musica_id not in grafo.itens:
+            raise HTTPException(status_code=404, detail="Música não encontrada")
         
-        for i in range(grafo.n):
-            if grafo.adj[mid][i] > 0:
-                vertice_info = grafo.itens[i]
-                if vertice_info["tipo"] == "artista":
-                    artistas_conectados.append(vertice_info["nome"])
-                elif vertice_info["tipo"] == "genero":
-                    generos_conectados.append(vertice_info["nome"])
+        info = grafo.itens[musica_id]
         
-        # Aplica filtros
-        if genero and genero.lower() not in [g.lower() for g in generos_conectados]:
-            continue
-        if artista and artista.lower() not in [a.lower() for a in artistas_conectados]:
-            continue
+        if info["tipo"] != "musica":
+            raise HTTPException(status_code=400, detail="ID não corresponde a uma música")
         
-        musicas.append({
-            "id": mid,
-            "nome": musica_nome,
-            "artistas": artistas_conectados,
-            "generos": generos_conectados
-        })
-    
-    return {"musicas": musicas, "total": len(musicas)}
+        return grafo.projecao_musicas.detalhe(musica_id)
 
-@app.get("/api/musicas/{musica_id}")
-async def get_musica(musica_id: int):
-    """Retorna detalhes de uma música específica"""
-    if musica_id not in grafo.itens:
-        raise HTTPException(status_code=404, detail="Música não encontrada")
-    
-    info = grafo.itens[musica_id]
-    
-    if info["tipo"] != "musica":
-        raise HTTPException(status_code=400, detail="ID não corresponde a uma música")
-    
-    # Busca artistas e gêneros
-    artistas = []
-    generos = []
-    
-    for i in range(grafo.n):
-        if grafo.adj[musica_id][i] > 0:
-            vertice_info = grafo.itens[i]
-            if vertice_info["tipo"] == "artista":
-                artistas.append({
-                    "id": i,
-                    "nome": vertice_info["nome"]
-                })
-            elif vertice_info["tipo"] == "genero":
-                generos.append({
-                    "id": i,
-                    "nome": vertice_info["nome"]
-                })
+# ==================== ENDPOINTS DE RECOMENDAÇÃO ====================
+
+@app.post("/api/recomendacoes")
+def gerar_recomendacoes(request: RecomendacaoRequest):
+    """
+    Gera recomendações por PageRank personalizado a partir do gênero e/ou
+    artista pedidos (veja recomendacao.recomendar_por_filtros). Os filtros
+    são aplicados antes do ranking. Com orcamento_ms, devolve o melhor
+    ranking obtido dentro do prazo ("exato": false se ele esgotou).
+    """
+    prazo = Prazo(request.orcamento_ms)
+    with trava_grafo.leitura():
+        ranking = recomendar_por_filtros(
+            grafo, genero=request.genero, artista=request.artista, limite=request.limite, prazo=prazo
+        )
+
+        recomendacoes = []
+        for mid, score in ranking:
+            recomendacoes.append({
+                **grafo.projecao_musicas.registro(mid),
+                "score": round(score, 4)
+            })
     
     return {
-        "id": musica_id,
-        "nome": info["nome"],
-        "artistas": artistas,
-        "generos": generos
+        "recomendacoes": recomendacoes,
+        "total": len(recomendacoes),
+        "exato": not prazo.estourou
     }
 
-# ==================== ENDPOINTS DE RECOMENDAÇÃO ====================
+@app.post("/api/recomendacoes/playlist")
+def recomendar_por_playlist(request: PlaylistRecomendacaoRequest):
+    """Recomendações parecidas com uma lista de músicas base (Jaccard ponderado do perfil da playlist)"""
+    prazo = Prazo(request.orcamento_ms)
+    with trava_grafo.leitura():
+        ranking, ignoradas = recomendar_para_playlist(grafo, request.musicas, request.limite, prazo)
+
+        recomendacoes = []
+        for mid, score in ranking:
+            recomendacoes.append({
+                **grafo.projecao_musicas.registro(mid),
+                "score_similaridade": round(score, 4)
+            })
 
-@app.post("/api/recomendacoes")
-async def gerar_recomendacoes(request: RecomendacaoRequest):
-    """Gera recomendações musicais baseadas em filtros"""
-    # Implementação simplificada - pode ser expandida
-    recomendacoes = []
-    
-    ids_musicas = grafo.vertices_por_tipo.get("musica", set())
-    
-    for mid in list(ids_musicas)[:request.limite]:
-        info = grafo.itens[mid]
-        
-        # Busca conexões
-        artistas = []
-        generos = []
-        
-        for i in range(grafo.n):
-            if grafo.adj[mid][i] > 0:
-                vertice_info = grafo.itens[i]
-                if vertice_info["tipo"] == "artista":
-                    artistas.append(vertice_info["nome"])
-                elif vertice_info["tipo"] == "genero":
-                    generos.append(vertice_info["nome"])
-        
-        # Aplica filtros
-        if request.genero and request.genero.lower() not in [g.lower() for g in generos]:
-            continue
-        if request.artista and request.artista.lower() not in [a.lower() for a in artistas]:
-            continue
-        
-        recomendacoes.append({
-            "id": mid,
-            "nome": info["nome"],
-            "artistas": artistas,
-            "generos": generos,
-            "score": 0.85  # Mock score - implementar algoritmo real
-        })
-    
     return {
-        "recomendacoes": recomendacoes[:request.limite],
-        "total": len(recomendacoes)
+        "musicas_base": [nome for nome in request.musicas if nome not in ignoradas],
+        "ignoradas": ignoradas,
+        "recomendacoes": recomendacoes,
+        "total": len(recomendacoes),
+        "exato": not prazo.estourou
     }
 
 # ==================== ENDPOINTS DE SPOTIFY ====================
 
 @app.post("/api/spotify/importar-artista")
-async def importar_artista(request: SpotifyImportRequest):
+def importar_artista(request: SpotifyImportRequest):
     """Importa um artista do Spotify para o grafo"""
     try:
-        from main import importar_artista_spotify, sp
+        from main import baixar_artista_spotify, inserir_artista_importado, sp
         
         if not sp:
             raise HTTPException(
@@ -324,12 +571,16 @@ async def importar_artista(request: SpotifyImportRequest):
                 detail="API do Spotify não está configurada. Configure CLIENT_ID e CLIENT_SECRET no main.py"
             )
         
-        # Captura informações antes da importação
-        vertices_antes = grafo.n
-        
-        importar_artista_spotify(grafo, request.artista_nome)
-        
-        vertices_depois = grafo.n
+        # A consulta ao Spotify (rede) fica fora da trava: só a inserção bloqueia os leitores
+        dados = baixar_artista_spotify(request.artista_nome)
+        with trava_grafo.escrita():
+            # Captura informações antes da importação
+            vertices_antes = grafo.num_vertices
+            
+            if dados is not None:
+                inserir_artista_importado(grafo, *dados)
+            
+            vertices_depois = grafo.num_vertices
         novos_vertices = vertices_depois - vertices_antes
         
         return {
@@ -346,7 +597,7 @@ async def importar_artista(request: SpotifyImportRequest):
         raise HTTPException(status_code=500, detail=f"Erro ao importar artista: {str(e)}")
 
 @app.get("/api/spotify/buscar-artista")
-async def buscar_artista_spotify(nome: str):
+def buscar_artista_spotify(nome: str):
     """Busca um artista no Spotify"""
     try:
         from main import sp
@@ -377,7 +628,7 @@ async def buscar_artista_spotify(nome: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/spotify/top-tracks/{artista_id}")
-async def get_top_tracks(artista_id: str):
+def get_top_tracks(artista_id: str):
     """Obtém as músicas mais populares de um artista"""
     try:
         from main import sp
@@ -430,31 +681,89 @@ async def spotify_status():
 
 # ==================== ENDPOINTS DE ARQUIVO ====================
 
+# "texto": formato Grafo.txt | "binario": snapshot mapeável em memória (snapshot.py)
+FORMATOS_ARQUIVO = ("texto", "binario")
+
+def _validar_formato(formato: str):
+    if formato not in FORMATOS_ARQUIVO:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato inválido: '{formato}'. Use um de: {', '.join(FORMATOS_ARQUIVO)}"
+        )
+
 @app.post("/api/grafo/salvar")
-async def salvar_grafo(caminho: str = "Grafo.txt"):
-    """Salva o grafo em arquivo"""
+def salvar_grafo(caminho: str = "Grafo.txt", formato: str = "texto"):
+    """Salva o grafo em arquivo (formato "texto" ou "binario")"""
+    _validar_formato(formato)
     try:
-        grafo.gravar_grafo_arquivo(caminho)
+        with trava_grafo.leitura():
+            if formato == "binario":
+                sucesso = grafo.gravar_snapshot(caminho)
+            else:
+                sucesso = grafo.gravar_grafo_arquivo(caminho)
+        if not sucesso:
+            raise HTTPException(status_code=500, detail=f"Não foi possível gravar '{caminho}'")
         return {
             "success": True,
-            "message": f"Grafo salvo em '{caminho}'"
+            "message": f"Grafo salvo em '{caminho}'",
+            "formato": formato
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/grafo/carregar")
-async def carregar_grafo(caminho: str = "Grafo.txt"):
-    """Carrega o grafo de um arquivo"""
-    try:
-        global grafo
-        grafo = TGrafoND()
-        # TODO: Implementar método de carregamento do arquivo
+# Cargas de arquivo rodam em segundo plano (veja carga.py): o grafo atual
+# continua respondendo até o novo estar pronto e ser trocado
+carga_grafo = CargaGrafo()
+
+@app.post("/api/grafo/carregar", status_code=202)
+def carregar_grafo(caminho: str = "Grafo.txt", formato: str = "texto", aguardar: bool = False):
+    """
+    Carrega o grafo de um arquivo (formato "texto" ou "binario") em segundo
+    plano e troca o grafo atual quando terminar. O andamento fica em
+    /api/grafo/carregar/status; com aguardar=true, responde só no final.
+    """
+    _validar_formato(formato)
+    if not os.path.exists(caminho):
+        raise HTTPException(status_code=404, detail=f"Arquivo '{caminho}' não encontrado")
+    if not carga_grafo.iniciar(caminho, formato, lambda: TGrafoND(modo=MODO_GRAFO), _substituir_grafo):
+        raise HTTPException(status_code=409, detail="Já há uma carga de grafo em andamento")
+
+    if aguardar:
+        carga_grafo.aguardar()
+        status = carga_grafo.status()
+        if status["estado"] == "erro":
+            raise HTTPException(status_code=500, detail=status["erro"])
         return {
             "success": True,
-            "message": f"Grafo carregado de '{caminho}'"
+            "message": f"Grafo carregado de '{caminho}'",
+            **status
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "success": True,
+        "message": f"Carga de '{caminho}' iniciada",
+        **carga_grafo.status()
+    }
+
+@app.get("/api/grafo/carregar/status")
+async def status_carga_grafo():
+    """Andamento da carga em segundo plano: estado, vértices e arestas lidos até agora"""
+    return carga_grafo.status()
+
+@app.post("/api/grafo/checkpoint")
+def checkpoint_grafo():
+    """Incorpora o diário de mutações ao snapshot, em segundo plano"""
+    if grafo.diario is None:
+        raise HTTPException(status_code=400, detail="Diário de mutações não está ativo (defina AMPLIFY_DIARIO)")
+    # A rotação do diário não pode acontecer no meio de uma mutação; a espera
+    # pelo checkpoint anterior fica fora da trava
+    grafo.diario.checkpoint(CAMINHO_SNAPSHOT, trava=trava_grafo.escrita)
+    return {
+        "success": True,
+        "message": f"Checkpoint iniciado em '{CAMINHO_SNAPSHOT}'"
+    }
 
 # ==================== ENDPOINT DE SAÚDE ====================
 
@@ -473,7 +782,7 @@ async def health_check():
     return {
         "status": "healthy",
         "grafo": {
-            "vertices": grafo.n,
+            "vertices": grafo.num_vertices,
             "arestas": grafo.m
         }
     }
@@ -481,27 +790,20 @@ async def health_check():
 # ==================== ENDPOINTS DE DEMONSTRAÇÃO ====================
 
 @app.post("/api/demo/inicializar")
-async def inicializar_dados_demo():
+def inicializar_dados_demo():
     """Inicializa o grafo com dados de demonstração para apresentação"""
     try:
-        # Limpa o grafo
-        global grafo
-        grafo = TGrafoND()
+        # Monta um grafo novo e só então substitui o atual
+        novo_grafo = TGrafoND(modo=MODO_GRAFO)
         
         # Adiciona artistas
         artistas = [
             "The Beatles", "Queen", "Pink Floyd", "Led Zeppelin",
             "Coldplay", "Imagine Dragons", "Arctic Monkeys"
         ]
-        ids_artistas = {}
-        for artista in artistas:
-            ids_artistas[artista] = grafo.insereV(artista, "artista")
         
         # Adiciona gêneros
         generos = ["Rock", "Pop", "Alternative", "Classic Rock", "Progressive Rock"]
-        ids_generos = {}
-        for genero in generos:
-            ids_generos[genero] = grafo.insereV(genero, "genero")
         
         # Adiciona músicas com conexões
         musicas_data = [
@@ -521,25 +823,31 @@ async def inicializar_dados_demo():
             {"nome": "R U Mine?", "artista": "Arctic Monkeys", "generos": ["Alternative", "Rock"]}
         ]
         
-        for musica_info in musicas_data:
-            # Cria vértice da música
-            id_musica = grafo.insereV(musica_info["nome"], "musica")
-            
-            # Conecta com artista
-            id_artista = ids_artistas[musica_info["artista"]]
-            grafo.insereA(id_musica, id_artista)
-            
-            # Conecta com gêneros
+        # Insere todos os vértices em um único lote
+        ids = novo_grafo.insereV_lote(
+            [(artista, "artista") for artista in artistas]
+            + [(genero, "genero") for genero in generos]
+            + [(musica_info["nome"], "musica") for musica_info in musicas_data]
+        )
+        ids_artistas = dict(zip(artistas, ids[:len(artistas)]))
+        ids_generos = dict(zip(generos, ids[len(artistas):len(artistas) + len(generos)]))
+        ids_musicas = ids[len(artistas) + len(generos):]
+        
+        # Conecta cada música com seu artista e seus gêneros
+        arestas = []
+        for id_musica, musica_info in zip(ids_musicas, musicas_data):
+            arestas.append((id_musica, ids_artistas[musica_info["artista"]]))
             for genero in musica_info["generos"]:
-                id_genero = ids_generos[genero]
-                grafo.insereA(id_musica, id_genero)
+                arestas.append((id_musica, ids_generos[genero]))
+        novo_grafo.insereA_lote(arestas)
+        _substituir_grafo(novo_grafo)
         
         return {
             "success": True,
             "message": "Dados de demonstração inicializados com sucesso!",
             "detalhes": {
-                "vertices": grafo.n,
-                "arestas": grafo.m,
+                "vertices": novo_grafo.num_vertices,
+                "arestas": novo_grafo.m,
                 "artistas": len(artistas),
                 "generos": len(generos),
                 "musicas": len(musicas_data)
@@ -549,19 +857,52 @@ async def inicializar_dados_demo():
         raise HTTPException(status_code=500, detail=f"Erro ao inicializar: {str(e)}")
 
 @app.get("/api/recomendacoes/{musica_nome}")
-async def recomendar_por_musica(musica_nome: str, limite: int = 5):
-    """Gera recomendações baseadas em uma música usando similaridade de Jaccard"""
+async def recomendar_por_musica(musica_nome: str, limite: int = 5, similaridade: str = "jaccard",
+                                orcamento_ms: Optional[float] = None):
+    """
+    Gera recomendações baseadas em uma música usando similaridade de Jaccard
+    (ou, com similaridade=jaccard_ponderado/cosseno, pelos pesos das arestas).
+    Com orcamento_ms, o cálculo ao vivo devolve o melhor top-k obtido dentro
+    do prazo ("exato": false se ele esgotou).
+    """
+    if similaridade not in SIMILARIDADES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Similaridade inválida: '{similaridade}'. Use um de {list(SIMILARIDADES)}"
+        )
     try:
-        from main import recomendar_musicas
-        
-        # Busca recomendações usando o algoritmo do grafo
-        recomendacoes_ids = recomendar_musicas(grafo, musica_nome, limite)
+        # Calculado em uma thread, uma vez só para as requisições idênticas
+        # que chegam enquanto o cálculo roda (veja coalescencia.py)
+        chave = (id(grafo), grafo.versao, musica_nome, limite, similaridade, orcamento_ms)
+        return await consultas_em_voo.executar(
+            chave, _recomendar_por_musica, musica_nome, limite, similaridade, orcamento_ms
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar recomendações: {str(e)}")
+
+def _recomendar_por_musica(musica_nome: str, limite: int, similaridade: str, orcamento_ms: Optional[float]):
+    """Resposta de /api/recomendacoes/{musica_nome}; roda em uma thread do executor"""
+    with trava_grafo.leitura():
+        recomendacoes_ids = None
+        prazo = Prazo(orcamento_ms)
+        if (tabela_recomendacoes is not None and similaridade == "jaccard"
+                and limite <= tabela_recomendacoes.k):
+            recomendacoes_ids = tabela_recomendacoes.consultar_para(grafo, musica_nome, limite)
+            fonte = "tabela"
+
+        if recomendacoes_ids is None:
+            # Busca recomendações usando o algoritmo do grafo
+            recomendacoes_ids = recomendar_musicas(grafo, musica_nome, limite, similaridade=similaridade,
+                                                   prazo=prazo)
+            fonte = "ao_vivo"
         
         if not recomendacoes_ids:
             return {
                 "musica_base": musica_nome,
                 "recomendacoes": [],
-                "message": "Música não encontrada ou sem conexões"
+                "message": "Música não encontrada ou sem conexões",
+                "fonte": fonte,
+                "exato": not prazo.estourou
             }
         
         # Formata as recomendações
@@ -572,35 +913,35 @@ async def recomendar_por_musica(musica_nome: str, limite: int = 5):
             if musica_nome_rec not in grafo.itens_reverso:
                 continue
                 
-            musica_id = grafo.itens_reverso[musica_nome_rec]
-            info = grafo.itens[musica_id]
-            
-            # Busca artista e gêneros
-            artistas = []
-            generos = []
-            for i in range(grafo.n):
-                if grafo.adj[musica_id][i] > 0:
-                    vertice = grafo.itens[i]
-                    if vertice["tipo"] == "artista":
-                        artistas.append(vertice["nome"])
-                    elif vertice["tipo"] == "genero":
-                        generos.append(vertice["nome"])
+            registro = grafo.projecao_musicas.registro(grafo.itens_reverso[musica_nome_rec])
+            if registro is None:
+                continue
             
             recomendacoes.append({
-                "id": musica_id,
-                "nome": info["nome"],
-                "artistas": artistas,
-                "generos": generos,
+                **registro,
                 "score_similaridade": round(score, 1)  # Converte para percentual
             })
         
         return {
             "musica_base": musica_nome,
             "recomendacoes": recomendacoes,
-            "total": len(recomendacoes)
+            "total": len(recomendacoes),
+            "fonte": fonte,
+            "exato": not prazo.estourou
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar recomendações: {str(e)}")
+
+@app.get("/api/cache/recomendacoes")
+async def estatisticas_cache_recomendacoes():
+    """
+    Acertos, falhas e invalidações do cache de recomendações do grafo atual,
+    e quantas consultas foram coalescidas com um cálculo já em andamento
+    """
+    return {
+        **grafo.cache_recomendacoes.estatisticas(),
+        "versao_grafo": grafo.versao,
+        "coalescencia": consultas_em_voo.estatisticas(),
+        "trava_grafo": trava_grafo.estado(),
+    }
 
 # ==================== ENDPOINT DE ARQUIVO ====================
 
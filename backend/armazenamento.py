@@ -0,0 +1,448 @@
+"""
+Estruturas de armazenamento da adjacência usadas pelo TGrafoND.
+
+Cada estrutura guarda os pesos das arestas de um grafo não direcionado e
+expõe a mesma interface, para que o TGrafoND possa trocar de representação
+sem mudar sua API pública:
+
+- ArmazenamentoDenso: matriz n x n em listas de listas (modo "densa")
+- ArmazenamentoEsparso: um dicionário {vizinho: peso} por vértice (modo "esparsa")
+- ArmazenamentoEsparsoMapeado: modo "esparsa" sobre um snapshot binário mapeado
+  em memória, materializando cada linha só quando ela é alterada
+- ArmazenamentoNumpy: matriz NumPy float32 com consultas vetorizadas (modo "numpy",
+  requer o pacote numpy)
+- ArmazenamentoBitset: os vizinhos de cada vértice como um int usado de mapa de
+  bits (modo "bitset"); interseções e uniões viram & e | sem alocar conjuntos
+
+Em todas elas `linhas[v][w]` devolve o peso da aresta v-w (0.0 se não existir).
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class ArmazenamentoBase:
+    """Consultas genéricas implementadas sobre `vizinhos`; as subclasses podem especializá-las"""
+
+    def graus(self):
+        """Lista com o grau de cada vértice"""
+        return [self.grau(v) for v in range(self.n)]
+
+    def e_completo(self):
+        for i in range(self.n):
+            laco = 1 if self.peso(i, i) > 0 else 0
+            if self.grau(i) - laco != self.n - 1:  # Se falta uma aresta entre vértices diferentes
+                return False
+        return True
+
+
+class ArmazenamentoDenso(ArmazenamentoBase):
+    """Matriz de adjacência densa: memória O(n²), vizinhos em O(n)
+
+    A matriz é alocada com folga (capacidade >= n) e dobra de tamanho quando
+    enche, então inserir vértices custa O(n) amortizado em vez de copiar a
+    matriz inteira a cada inserção. Só as primeiras n linhas/colunas são usadas.
+    """
+
+    def __init__(self, n=0):
+        self.n = n
+        self.capacidade = n
+        self.linhas = [[0.0 for i in range(n)] for j in range(n)]
+
+    def peso(self, v, w):
+        return self.linhas[v][w]
+
+    def definir_aresta(self, v, w, peso):
+        self.linhas[v][w] = peso
+        self.linhas[w][v] = peso
+
+    def remover_aresta(self, v, w):
+        self.linhas[v][w] = 0.0
+        self.linhas[w][v] = 0.0
+
+    def vizinhos(self, v):
+        linha = self.linhas[v]
+        return [j for j in range(self.n) if linha[j] > 0]
+
+    def arestas_de(self, v):
+        """Lista de (vizinho, peso) do vértice v"""
+        linha = self.linhas[v]
+        return [(j, linha[j]) for j in range(self.n) if linha[j] > 0]
+
+    def grau(self, v):
+        linha = self.linhas[v]
+        return sum(1 for j in range(self.n) if linha[j] > 0)
+
+    def e_completo(self):
+        for i in range(self.n):
+            for j in range(self.n):
+                if i != j and self.linhas[i][j] == 0:  # Se falta uma aresta entre vértices diferentes
+                    return False
+        return True
+
+    def arestas(self):
+        """Gera (i, j, peso) de cada aresta uma única vez, com i <= j"""
+        for i in range(self.n):
+            linha = self.linhas[i]
+            for j in range(i, self.n):
+                if linha[j] > 0:
+                    yield i, j, linha[j]
+
+    def adicionar_vertices(self, quantidade=1):
+        """Acrescenta `quantidade` vértices isolados ao final"""
+        necessario = self.n + quantidade
+        if necessario > self.capacidade:
+            # Dobra a capacidade (ou mais, se o lote exigir)
+            nova_capacidade = max(necessario, 2 * self.capacidade)
+            extra = nova_capacidade - self.capacidade
+            for linha in self.linhas:
+                linha.extend([0.0] * extra)
+            self.linhas.extend([0.0] * nova_capacidade for _ in range(extra))
+            self.capacidade = nova_capacidade
+        self.n = necessario
+
+    def compactar(self, vivos):
+        """Mantém só os vértices de `vivos` (em ordem), renumerados como 0..len(vivos)-1"""
+        self.linhas = [[self.linhas[i][j] for j in vivos] for i in vivos]
+        self.n = self.capacidade = len(vivos)
+
+
+class _LinhaEsparsa(dict):
+    """Linha da adjacência esparsa {vizinho: peso}; vizinhos ausentes valem 0.0"""
+
+    __slots__ = ()
+
+    def __missing__(self, w):
+        return 0.0
+
+
+class ArmazenamentoEsparso(ArmazenamentoBase):
+    """Listas de adjacência com pesos: memória O(n + m), vizinhos em O(grau)"""
+
+    def __init__(self, n=0):
+        self.n = n
+        self.linhas = [_LinhaEsparsa() for _ in range(n)]
+
+    def peso(self, v, w):
+        return self.linhas[v].get(w, 0.0)
+
+    def definir_aresta(self, v, w, peso):
+        self.linhas[v][w] = peso
+        self.linhas[w][v] = peso
+
+    def remover_aresta(self, v, w):
+        self.linhas[v].pop(w, None)
+        self.linhas[w].pop(v, None)
+
+    def vizinhos(self, v):
+        return list(self.linhas[v])
+
+    def arestas_de(self, v):
+        """Lista de (vizinho, peso) do vértice v"""
+        return list(self.linhas[v].items())
+
+    def grau(self, v):
+        return len(self.linhas[v])
+
+    def arestas(self):
+        """Gera (i, j, peso) de cada aresta uma única vez, com i <= j"""
+        for i, linha in enumerate(self.linhas):
+            for j, peso in sorted(linha.items()):
+                if i <= j:
+                    yield i, j, peso
+
+    def adicionar_vertices(self, quantidade=1):
+        """Acrescenta `quantidade` vértices isolados ao final"""
+        self.linhas.extend(_LinhaEsparsa() for _ in range(quantidade))
+        self.n += quantidade
+
+    def compactar(self, vivos):
+        """Mantém só os vértices de `vivos` (em ordem), renumerados como 0..len(vivos)-1"""
+        novo_indice = {antigo: novo for novo, antigo in enumerate(vivos)}
+        self.linhas = [
+            _LinhaEsparsa((novo_indice[w], peso) for w, peso in self.linhas[i].items())
+            for i in vivos
+        ]
+        self.n = len(vivos)
+
+
+class _LinhasSobDemanda:
+    """Sequência de linhas esparsas criadas a partir do snapshot no primeiro acesso"""
+
+    def __init__(self, base):
+        self._base = base
+        self._linhas = [None] * base.n
+
+    def materializada(self, v):
+        return self._linhas[v] is not None
+
+    def __len__(self):
+        return len(self._linhas)
+
+    def __getitem__(self, v):
+        linha = self._linhas[v]
+        if linha is None:
+            linha = self._linhas[v] = _LinhaEsparsa(self._base.arestas_de(v))
+        return linha
+
+    def __setitem__(self, v, linha):
+        self._linhas[v] = linha
+
+    def __iter__(self):
+        return (self[v] for v in range(len(self._linhas)))
+
+    def extend(self, linhas):
+        self._linhas.extend(linhas)
+
+
+class ArmazenamentoEsparsoMapeado(ArmazenamentoEsparso):
+    """
+    Listas de adjacência apoiadas em um snapshot CSR (snapshot.SnapshotCSR).
+    Consultas a vértices não alterados leem direto do arquivo mapeado; a
+    primeira alteração de um vértice copia sua linha para um dicionário.
+    """
+
+    def __init__(self, base):
+        self.n = base.n
+        self._base = base
+        self.linhas = _LinhasSobDemanda(base)
+
+    def _na_base(self, v):
+        return self._base is not None and v < self._base.n and not self.linhas.materializada(v)
+
+    def peso(self, v, w):
+        if self._na_base(v):
+            return self._base.peso(v, w)
+        return super().peso(v, w)
+
+    def vizinhos(self, v):
+        if self._na_base(v):
+            return self._base.vizinhos(v)
+        return super().vizinhos(v)
+
+    def arestas_de(self, v):
+        if self._na_base(v):
+            return self._base.arestas_de(v)
+        return super().arestas_de(v)
+
+    def grau(self, v):
+        if self._na_base(v):
+            return self._base.grau(v)
+        return super().grau(v)
+
+    def arestas(self):
+        """Gera (i, j, peso) de cada aresta uma única vez, com i <= j"""
+        for i in range(self.n):
+            for j, peso in sorted(self.arestas_de(i)):
+                if i <= j:
+                    yield i, j, peso
+
+    def compactar(self, vivos):
+        super().compactar(vivos)
+        self._base = None  # Todas as linhas agora são dicionários
+
+
+class ArmazenamentoNumpy(ArmazenamentoBase):
+    """Matriz de adjacência densa em NumPy (float32)
+
+    Indicada para grafos pequenos e médios: as consultas de vizinhos, graus,
+    arestas e completude são operações vetorizadas sobre a matriz, e o
+    crescimento/remoção usam fatiamento de arrays em vez de laços Python.
+    Como na matriz em listas, a capacidade dobra quando se esgota.
+    """
+
+    def __init__(self, n=0):
+        if np is None:
+            raise ImportError("O modo 'numpy' requer o pacote numpy (pip install numpy).")
+        self.n = n
+        self.capacidade = n
+        self.linhas = np.zeros((n, n), dtype=np.float32)
+
+    def peso(self, v, w):
+        return float(self.linhas[v, w])
+
+    def definir_aresta(self, v, w, peso):
+        self.linhas[v, w] = peso
+        self.linhas[w, v] = peso
+
+    def remover_aresta(self, v, w):
+        self.linhas[v, w] = 0.0
+        self.linhas[w, v] = 0.0
+
+    def vizinhos(self, v):
+        return np.nonzero(self.linhas[v, :self.n])[0].tolist()
+
+    def arestas_de(self, v):
+        """Lista de (vizinho, peso) do vértice v"""
+        linha = self.linhas[v, :self.n]
+        indices = np.nonzero(linha)[0]
+        return list(zip(indices.tolist(), linha[indices].tolist()))
+
+    def grau(self, v):
+        return int(np.count_nonzero(self.linhas[v, :self.n]))
+
+    def graus(self):
+        return np.count_nonzero(self.linhas[:self.n, :self.n], axis=1)
+
+    def arestas(self):
+        """Gera (i, j, peso) de cada aresta uma única vez, com i <= j"""
+        matriz = self.linhas[:self.n, :self.n]
+        origens, destinos = np.nonzero(np.triu(matriz))
+        for i, j in zip(origens.tolist(), destinos.tolist()):
+            yield i, j, float(matriz[i, j])
+
+    def e_completo(self):
+        existe = self.linhas[:self.n, :self.n] != 0
+        np.fill_diagonal(existe, True)  # Laços não contam
+        return bool(existe.all())
+
+    def adicionar_vertices(self, quantidade=1):
+        """Acrescenta `quantidade` vértices isolados ao final"""
+        necessario = self.n + quantidade
+        if necessario > self.capacidade:
+            # Dobra a capacidade (ou mais, se o lote exigir) copiando por fatiamento
+            nova_capacidade = max(necessario, 2 * self.capacidade)
+            nova = np.zeros((nova_capacidade, nova_capacidade), dtype=np.float32)
+            nova[:self.n, :self.n] = self.linhas[:self.n, :self.n]
+            self.linhas = nova
+            self.capacidade = nova_capacidade
+        self.n = necessario
+
+    def compactar(self, vivos):
+        """Mantém só os vértices de `vivos` (em ordem), renumerados como 0..len(vivos)-1"""
+        indices = np.asarray(vivos, dtype=np.intp)
+        self.linhas = self.linhas[np.ix_(indices, indices)]
+        self.n = self.capacidade = len(vivos)
+
+
+try:
+    contar_bits = int.bit_count  # Python 3.10+
+except AttributeError:
+    def contar_bits(x):
+        """Quantidade de bits 1 em x (popcount)"""
+        return bin(x).count("1")
+
+
+class _LinhaBitset:
+    """Visão de uma linha do ArmazenamentoBitset: linha[w] é o peso da aresta v-w"""
+
+    __slots__ = ("_armazenamento", "_v")
+
+    def __init__(self, armazenamento, v):
+        self._armazenamento = armazenamento
+        self._v = v
+
+    def __getitem__(self, w):
+        return self._armazenamento.peso(self._v, w)
+
+
+class _LinhasBitset:
+    __slots__ = ("_armazenamento",)
+
+    def __init__(self, armazenamento):
+        self._armazenamento = armazenamento
+
+    def __len__(self):
+        return self._armazenamento.n
+
+    def __getitem__(self, v):
+        return _LinhaBitset(self._armazenamento, v)
+
+    def __iter__(self):
+        return (self[v] for v in range(len(self)))
+
+
+class ArmazenamentoBitset(ArmazenamentoBase):
+    """Mapas de bits de vizinhança: bits[v] tem o bit w ligado se existe a aresta v-w
+
+    Memória de n²/8 bytes no pior caso (bem menos que um set por vértice nos
+    hubs) e interseção/união de vizinhanças como & e | de inteiros, contadas
+    com popcount. Os pesos diferentes de 1.0 ficam à parte, em um dicionário
+    por aresta, então o catálogo sem pesos não paga nada por eles.
+    """
+
+    def __init__(self, n=0):
+        self.n = n
+        self.bits = [0] * n
+        self._pesos = {}  # {(menor, maior): peso} só para pesos != 1.0
+
+    @property
+    def linhas(self):
+        return _LinhasBitset(self)
+
+    @staticmethod
+    def _chave(v, w):
+        return (v, w) if v <= w else (w, v)
+
+    def peso(self, v, w):
+        if not (self.bits[v] >> w) & 1:
+            return 0.0
+        return self._pesos.get(self._chave(v, w), 1.0)
+
+    def definir_aresta(self, v, w, peso):
+        self.bits[v] |= 1 << w
+        self.bits[w] |= 1 << v
+        if peso != 1.0:
+            self._pesos[self._chave(v, w)] = peso
+        else:
+            self._pesos.pop(self._chave(v, w), None)
+
+    def remover_aresta(self, v, w):
+        self.bits[v] &= ~(1 << w)
+        self.bits[w] &= ~(1 << v)
+        self._pesos.pop(self._chave(v, w), None)
+
+    def vizinhos(self, v):
+        # A busca pelos "1" na representação binária roda em C; o laço Python é O(grau)
+        binario = bin(self.bits[v])[:1:-1]  # Bit 0 primeiro
+        resultado = []
+        i = binario.find("1")
+        while i != -1:
+            resultado.append(i)
+            i = binario.find("1", i + 1)
+        return resultado
+
+    def arestas_de(self, v):
+        """Lista de (vizinho, peso) do vértice v"""
+        return [(w, self._pesos.get(self._chave(v, w), 1.0)) for w in self.vizinhos(v)]
+
+    def grau(self, v):
+        return contar_bits(self.bits[v])
+
+    def arestas(self):
+        """Gera (i, j, peso) de cada aresta uma única vez, com i <= j"""
+        for i in range(self.n):
+            for j, peso in self.arestas_de(i):
+                if i <= j:
+                    yield i, j, peso
+
+    def adicionar_vertices(self, quantidade=1):
+        """Acrescenta `quantidade` vértices isolados ao final"""
+        self.bits.extend([0] * quantidade)
+        self.n += quantidade
+
+    def compactar(self, vivos):
+        """Mantém só os vértices de `vivos` (em ordem), renumerados como 0..len(vivos)-1"""
+        novo_indice = {antigo: novo for novo, antigo in enumerate(vivos)}
+        novos_bits = []
+        for v in vivos:
+            bits = 0
+            for w in self.vizinhos(v):
+                bits |= 1 << novo_indice[w]
+            novos_bits.append(bits)
+        self._pesos = {
+            self._chave(novo_indice[v], novo_indice[w]): peso for (v, w), peso in self._pesos.items()
+        }
+        self.bits = novos_bits
+        self.n = len(vivos)
+
+
+# Representações disponíveis, indexadas pelo nome do modo
+MODOS_ARMAZENAMENTO = {
+    "densa": ArmazenamentoDenso,
+    "esparsa": ArmazenamentoEsparso,
+    "numpy": ArmazenamentoNumpy,
+    "bitset": ArmazenamentoBitset,
+}
@@ -0,0 +1,154 @@
+"""
+Cache de resultados de recomendação, com invalidação automática.
+
+Cada TGrafoND tem o seu (grafo.cache_recomendacoes), registrado como
+observador, então a linha de comando e a API compartilham os resultados do
+mesmo grafo. As entradas são chaveadas por (música base, limite, algoritmo)
+e limitadas por quantidade (LRU) e idade (TTL). Há dois modos de invalidação:
+
+- por vizinhança: a entrada guarda os vértices dos quais o resultado depende
+  (a música base, seus vizinhos e os candidatos pontuados); uma mutação de
+  aresta só descarta as entradas que dependem de uma de suas pontas;
+- por versão: entradas sem dependências conhecidas valem enquanto
+  grafo.versao (incrementada a cada mutação) não mudar.
+
+Compactar ou recarregar o grafo muda os IDs e descarta tudo.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Entrada:
+    __slots__ = ("resultado", "versao", "dependencias", "criada_em")
+
+    def __init__(self, resultado, versao, dependencias, criada_em):
+        self.resultado = resultado
+        self.versao = versao
+        self.dependencias = dependencias
+        self.criada_em = criada_em
+
+
+class CacheRecomendacoes:
+    """Cache LRU/TTL de recomendações de um grafo, com contadores de acertos e falhas"""
+
+    def __init__(self, capacidade=1024, ttl=300.0):
+        self.capacidade = capacidade
+        self.ttl = ttl  # Segundos; None = sem expiração
+
+        self._trava = threading.RLock()
+        self._entradas = OrderedDict()  # {chave: _Entrada}, da menos para a mais recente
+        self._dependentes = {}  # {vertice: {chaves que dependem dele}}
+
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+
+    def obter(self, grafo, chave, calcular):
+        """
+        Devolve o resultado em cache para `chave` ou chama calcular(), que
+        deve retornar (resultado, dependencias). Com dependencias=None a
+        entrada é invalidada por versão.
+        """
+        resultado = self.consultar(grafo, chave)
+        if resultado is not None:
+            return resultado
+
+        # O cálculo fica fora da trava
+        versao = grafo.versao
+        resultado, dependencias = calcular()
+        self.guardar(grafo, chave, resultado, dependencias, versao)
+        return resultado
+
+    def consultar(self, grafo, chave):
+        """Resultado em cache para `chave` (contando acerto), ou None (contando falha)"""
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and self._valida(grafo, entrada):
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return entrada.resultado
+            if entrada is not None:
+                self._remover(chave)
+            self.falhas += 1
+            return None
+
+    def guardar(self, grafo, chave, resultado, dependencias, versao):
+        """
+        Guarda um resultado calculado quando o grafo estava em `versao`; se
+        houve mutação desde então, ele já pode estar desatualizado e é descartado.
+        """
+        with self._trava:
+            if grafo.versao == versao:
+                self._guardar(chave, _Entrada(resultado, versao, dependencias, time.monotonic()))
+
+    def _valida(self, grafo, entrada):
+        if self.ttl is not None and time.monotonic() - entrada.criada_em > self.ttl:
+            return False
+        # Entradas com dependências são removidas pelo observador quando afetadas
+        return entrada.dependencias is not None or entrada.versao == grafo.versao
+
+    def _guardar(self, chave, entrada):
+        if chave in self._entradas:
+            self._remover(chave)
+        self._entradas[chave] = entrada
+        for v in entrada.dependencias or ():
+            self._dependentes.setdefault(v, set()).add(chave)
+        while len(self._entradas) > self.capacidade:
+            self._remover(next(iter(self._entradas)))  # Menos usada recentemente
+
+    def _remover(self, chave):
+        entrada = self._entradas.pop(chave)
+        for v in entrada.dependencias or ():
+            chaves = self._dependentes.get(v)
+            if chaves is not None:
+                chaves.discard(chave)
+                if not chaves:
+                    del self._dependentes[v]
+
+    def invalidar_vertices(self, vertices):
+        """Descarta as entradas que dependem de algum dos vértices"""
+        with self._trava:
+            afetadas = set()
+            for v in vertices:
+                afetadas |= self._dependentes.get(v, set())
+            for chave in afetadas:
+                self._remover(chave)
+            self.invalidacoes += len(afetadas)
+
+    def limpar(self):
+        with self._trava:
+            self.invalidacoes += len(self._entradas)
+            self._entradas.clear()
+            self._dependentes.clear()
+
+    def estatisticas(self):
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                "entradas": len(self._entradas),
+                "capacidade": self.capacidade,
+                "ttl": self.ttl,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "invalidacoes": self.invalidacoes,
+            }
+
+    # ---------- Observador do grafo ----------
+
+    def ao_inserir_aresta(self, grafo, v, w, peso):
+        self.invalidar_vertices((v, w))
+
+    def ao_remover_aresta(self, grafo, v, w):
+        self.invalidar_vertices((v, w))
+
+    def ao_remover_vertice(self, grafo, v, nome, vizinhos):
+        self.invalidar_vertices([v, *vizinhos])
+
+    def ao_compactar(self, grafo, remapeamento):
+        self.limpar()
+
+    def ao_recarregar(self, grafo):
+        self.limpar()
@@ -0,0 +1,97 @@
+"""
+Carga de um grafo em segundo plano, com troca atômica ao terminar.
+
+O arquivo (Grafo.txt ou snapshot binário) é lido em uma thread para um
+TGrafoND novo, enquanto o grafo atual continua atendendo as requisições.
+Só quando a leitura termina o novo grafo é entregue a `ao_concluir` (na API,
+_substituir_grafo, que troca a referência global sob a trava de escrita);
+se ela falha, o grafo atual fica como estava. Uma carga por vez.
+"""
+
+import threading
+import time
+
+
+class CargaGrafo:
+    """Estado e progresso da carga em andamento (ou da última)"""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._thread = None
+        self.estado = "ociosa"  # "ociosa", "carregando", "concluida" ou "erro"
+        self.caminho = None
+        self.formato = None
+        self.erro = None
+        self.vertices = 0
+        self.arestas = 0
+        self.iniciada_em = None
+        self.concluida_em = None
+
+    @property
+    def em_andamento(self):
+        return self.estado == "carregando"
+
+    def iniciar(self, caminho, formato, criar_grafo, ao_concluir):
+        """
+        Começa a carregar `caminho` em uma thread. criar_grafo() devolve o
+        TGrafoND vazio; ao_concluir(grafo) recebe o grafo carregado.
+        Retorna False (sem fazer nada) se já há uma carga em andamento.
+        """
+        with self._trava:
+            if self.em_andamento:
+                return False
+            self.estado = "carregando"
+            self.caminho = caminho
+            self.formato = formato
+            self.erro = None
+            self.vertices = self.arestas = 0
+            self.iniciada_em = time.time()
+            self.concluida_em = None
+            self._thread = threading.Thread(
+                target=self._carregar, args=(caminho, formato, criar_grafo, ao_concluir),
+                name="carga-grafo", daemon=True
+            )
+            self._thread.start()
+        return True
+
+    def _progresso(self, vertices, arestas):
+        self.vertices = vertices
+        self.arestas = arestas
+
+    def _carregar(self, caminho, formato, criar_grafo, ao_concluir):
+        try:
+            novo_grafo = criar_grafo()
+            if formato == "binario":
+                novo_grafo.carregar_snapshot(caminho)  # Só mapeia o arquivo: não há etapas a relatar
+            else:
+                novo_grafo.arquivo_para_matriz_adjacencia(caminho, progresso=self._progresso)
+            self._progresso(novo_grafo.num_vertices, novo_grafo.m)
+            ao_concluir(novo_grafo)
+            estado, erro = "concluida", None
+        except Exception as e:
+            estado, erro = "erro", str(e)
+        with self._trava:
+            self.estado = estado
+            self.erro = erro
+            self.concluida_em = time.time()
+
+    def aguardar(self, timeout=None):
+        """Espera a carga em andamento terminar. Retorna False se o timeout venceu antes."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def status(self):
+        with self._trava:
+            fim = self.concluida_em or time.time()
+            return {
+                "estado": self.estado,
+                "caminho": self.caminho,
+                "formato": self.formato,
+                "vertices": self.vertices,
+                "arestas": self.arestas,
+                "erro": self.erro,
+                "duracao_s": round(fim - self.iniciada_em, 3) if self.iniciada_em else None,
+            }
@@ -0,0 +1,56 @@
+"""
+Deduplicação de consultas idênticas em andamento ("singleflight").
+
+Quando uma música vira tendência, muitas requisições simultâneas pedem as
+mesmas recomendações. A primeira (a "líder") calcula em uma thread do
+executor padrão do asyncio; as que chegam com a mesma chave enquanto o
+cálculo está em andamento aguardam o mesmo futuro em vez de repeti-lo.
+Quando o cálculo termina, a chave sai da tabela, então a próxima consulta
+calcula de novo (ou acerta o cache de recomendações do grafo).
+
+Todas as chamadas acontecem no mesmo laço de eventos, então a tabela de
+consultas em voo não precisa de trava.
+"""
+
+import asyncio
+import functools
+
+
+class ConsultasEmVoo:
+    """Tabela {chave: futuro} das consultas em andamento, com contadores de coalescência"""
+
+    def __init__(self):
+        self._em_voo = {}
+        self.calculadas = 0  # Consultas que de fato rodaram o cálculo
+        self.coalescidas = 0  # Consultas atendidas pelo cálculo de outra
+
+    async def executar(self, chave, funcao, *args):
+        """
+        Resultado de funcao(*args), compartilhado entre as chamadas simultâneas
+        com a mesma chave. O resultado é o mesmo objeto para todas: não deve
+        ser modificado por quem o recebe.
+        """
+        futuro = self._em_voo.get(chave)
+        if futuro is not None:
+            self.coalescidas += 1
+        else:
+            loop = asyncio.get_running_loop()
+            futuro = loop.run_in_executor(None, functools.partial(funcao, *args))
+            self._em_voo[chave] = futuro
+            futuro.add_done_callback(lambda _: self._descartar(chave, futuro))
+            self.calculadas += 1
+        # shield: uma requisição cancelada (cliente desconectou) não cancela as outras
+        return await asyncio.shield(futuro)
+
+    def _descartar(self, chave, futuro):
+        if self._em_voo.get(chave) is futuro:
+            del self._em_voo[chave]
+
+    def estatisticas(self):
+        consultas = self.calculadas + self.coalescidas
+        return {
+            "em_andamento": len(self._em_voo),
+            "calculadas": self.calculadas,
+            "coalescidas": self.coalescidas,
+            "taxa_coalescencia": self.coalescidas / consultas if consultas else 0.0,
+        }
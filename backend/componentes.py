@@ -0,0 +1,55 @@
+"""
+Componentes conexas do grafo mantidas incrementalmente (union-find).
+
+Inserir vértices e arestas só faz uniões, em tempo quase constante, então
+"o grafo é conexo?" e "quantas componentes?" são respondidas em O(1). Uma
+remoção pode partir uma componente, o que o union-find não desfaz: nesse
+caso o TGrafoND descarta a estrutura e a reconstrói na próxima consulta.
+"""
+
+
+class ComponentesConexas:
+    """Union-find sobre os IDs dos vértices, com união por tamanho e compressão de caminho"""
+
+    def __init__(self, n=0, ignorar=()):
+        self._pai = list(range(n))
+        self._tamanho = [1] * n
+        # Posições em `ignorar` (vértices removidos) não contam como componente
+        self.quantidade = n - len(ignorar)
+
+    @classmethod
+    def construir(cls, n, arestas, ignorar=()):
+        """Monta a estrutura para n posições a partir de um iterável de (v, w, ...)"""
+        componentes = cls(n, ignorar)
+        for aresta in arestas:
+            componentes.unir(aresta[0], aresta[1])
+        return componentes
+
+    def adicionar(self, v):
+        """Registra o vértice v (isolado), crescendo a estrutura até ele se preciso"""
+        while len(self._pai) <= v:
+            self._pai.append(len(self._pai))
+            self._tamanho.append(1)
+            self.quantidade += 1
+
+    def encontrar(self, v):
+        pai = self._pai
+        while pai[v] != v:
+            pai[v] = pai[pai[v]]  # Compressão por divisão do caminho
+            v = pai[v]
+        return v
+
+    def unir(self, v, w):
+        """Une as componentes de v e w. Retorna True se eram diferentes."""
+        raiz_v, raiz_w = self.encontrar(v), self.encontrar(w)
+        if raiz_v == raiz_w:
+            return False
+        if self._tamanho[raiz_v] < self._tamanho[raiz_w]:
+            raiz_v, raiz_w = raiz_w, raiz_v
+        self._pai[raiz_w] = raiz_v
+        self._tamanho[raiz_v] += self._tamanho[raiz_w]
+        self.quantidade -= 1
+        return True
+
+    def conectados(self, v, w):
+        return self.encontrar(v) == self.encontrar(w)
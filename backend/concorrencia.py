@@ -0,0 +1,66 @@
+"""
+Trava de leitura/escrita para o grafo global da API.
+
+Os endpoints de leitura rodam no pool de threads do FastAPI (funções
+síncronas), fora do laço de eventos; vários leitores podem usar o grafo ao
+mesmo tempo, e as mutações esperam até ficarem sozinhas. Um escritor na fila
+bloqueia a entrada de novos leitores, para não ficar esperando para sempre
+atrás de um fluxo contínuo de leituras. Como as mutações são curtas
+(inserções e remoções incrementais), a espera dos leitores também é.
+
+O que o grafo monta sob demanda durante uma leitura (índice de vizinhos,
+normas, componentes, registros da projeção) é construído à parte e publicado
+pronto, então dois leitores podem montar a mesma estrutura sem conflito.
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+class TravaLeituraEscrita:
+    """Vários leitores ou um escritor, com preferência para o escritor"""
+
+    def __init__(self):
+        self._condicao = threading.Condition(threading.Lock())
+        self._leitores = 0
+        self._escritor_ativo = False
+        self._escritores_esperando = 0
+
+    @contextmanager
+    def leitura(self):
+        with self._condicao:
+            while self._escritor_ativo or self._escritores_esperando:
+                self._condicao.wait()
+            self._leitores += 1
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._leitores -= 1
+                if not self._leitores:
+                    self._condicao.notify_all()
+
+    @contextmanager
+    def escrita(self):
+        with self._condicao:
+            self._escritores_esperando += 1
+            try:
+                while self._escritor_ativo or self._leitores:
+                    self._condicao.wait()
+            finally:
+                self._escritores_esperando -= 1
+            self._escritor_ativo = True
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._escritor_ativo = False
+                self._condicao.notify_all()
+
+    def estado(self):
+        with self._condicao:
+            return {
+                "leitores": self._leitores,
+                "escritor_ativo": self._escritor_ativo,
+                "escritores_esperando": self._escritores_esperando,
+            }
@@ -0,0 +1,276 @@
+"""
+Diário de mutações (write-ahead log) para persistência incremental do grafo.
+
+Cada insereV / insereA / removeA / removeV vira uma linha JSON acrescentada
+ao fim do arquivo do diário, então o custo de persistir é proporcional ao
+tamanho da mudança, não ao do grafo. Os vértices são referenciados pelo
+nome (ou pelo índice, se não tiverem nome), o que torna o diário
+independente das renumerações feitas por compactar().
+
+    {"op": "insereV", "nome": "Numb", "tipo": "musica"}
+    {"op": "insereA", "v": "Numb", "w": "rock", "peso": 1.0}
+    {"op": "removeA", "v": "Numb", "w": "rock"}
+    {"op": "removeV", "v": "Numb"}
+
+Recuperação: recuperar_grafo carrega o último snapshot binário e reaplica os
+segmentos do diário. Checkpoint: checkpoint() fecha o segmento atual e, em
+segundo plano, aplica-o sobre o snapshot e grava um snapshot novo, sem tocar
+no grafo em uso. Todas as operações são idempotentes (inserir o que já
+existe ou remover o que não existe não altera nada), então reaplicar um
+segmento que já estava no snapshot é seguro.
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+from grafoMatriz import TGrafoND
+
+
+class DiarioMutacoes:
+    """
+    Observador do TGrafoND que acrescenta cada mutação ao diário.
+
+    Cada linha é entregue ao sistema operacional na hora; o fsync (que
+    garante a gravação em disco) é feito em grupo, a cada `fsync_a_cada`
+    operações ou `intervalo_fsync` segundos, o que vier primeiro. Uma thread
+    acorda a cada `intervalo_fsync` para sincronizar o que ficou pendente,
+    então as últimas operações antes de um período sem escritas não esperam
+    a próxima para chegar ao disco.
+    """
+
+    def __init__(self, caminho, fsync_a_cada=64, intervalo_fsync=0.5):
+        self.caminho = str(caminho)
+        self.fsync_a_cada = fsync_a_cada
+        self.intervalo_fsync = intervalo_fsync
+        self.operacoes_registradas = 0
+
+        self._trava = threading.Lock()
+        self._checkpoint = None  # Thread do checkpoint em andamento
+        self._trava_checkpoint = threading.Lock()  # Um checkpoint começa de cada vez
+        self._arquivo = open(self.caminho, "a", encoding="utf-8")
+        self._pendentes = 0
+        self._ultimo_fsync = time.monotonic()
+
+        self._parar = threading.Event()
+        self._sincronizador = None
+        if intervalo_fsync and intervalo_fsync > 0:
+            self._sincronizador = threading.Thread(target=self._sincronizar_periodicamente,
+                                                   name="fsync-diario", daemon=True)
+            self._sincronizador.start()
+
+    # ---------- Gravação ----------
+
+    def registrar(self, operacao):
+        linha = json.dumps(operacao, ensure_ascii=False) + "\n"
+        with self._trava:
+            self._arquivo.write(linha)
+            self._arquivo.flush()
+            self.operacoes_registradas += 1
+            self._pendentes += 1
+            if (self._pendentes >= self.fsync_a_cada
+                    or time.monotonic() - self._ultimo_fsync >= self.intervalo_fsync):
+                self._sincronizar()
+
+    def _sincronizar(self):
+        os.fsync(self._arquivo.fileno())
+        self._pendentes = 0
+        self._ultimo_fsync = time.monotonic()
+
+    def sincronizar(self):
+        """Força o fsync das operações ainda pendentes"""
+        with self._trava:
+            if self._pendentes and not self._arquivo.closed:
+                self._sincronizar()
+
+    def _sincronizar_periodicamente(self):
+        while not self._parar.wait(self.intervalo_fsync):
+            self.sincronizar()
+
+    def fechar(self):
+        self._parar.set()
+        if self._sincronizador is not None:
+            self._sincronizador.join()
+        self.aguardar_checkpoint()
+        with self._trava:
+            if not self._arquivo.closed:
+                if self._pendentes:
+                    self._sincronizar()
+                self._arquivo.close()
+
+    # ---------- Observador do grafo ----------
+
+    @staticmethod
+    def _referencia(grafo, v):
+        info = grafo.itens.get(v)
+        return info["nome"] if info else v
+
+    def ao_inserir_vertice(self, grafo, v, nome, tipo):
+        self.registrar({"op": "insereV", "nome": nome, "tipo": tipo})
+
+    def ao_inserir_aresta(self, grafo, v, w, peso):
+        self.registrar({"op": "insereA", "v": self._referencia(grafo, v),
+                        "w": self._referencia(grafo, w), "peso": peso})
+
+    def ao_remover_aresta(self, grafo, v, w):
+        self.registrar({"op": "removeA", "v": self._referencia(grafo, v),
+                        "w": self._referencia(grafo, w)})
+
+    def ao_remover_vertice(self, grafo, v, nome, vizinhos):
+        self.registrar({"op": "removeV", "v": nome})
+
+    # ---------- Segmentos e checkpoint ----------
+
+    def segmentos(self):
+        """Arquivos do diário em ordem de aplicação: segmentos fechados e depois o atual"""
+        return segmentos_diario(self.caminho)
+
+    def rotacionar(self):
+        """Fecha o segmento atual (renomeando-o) e abre um novo. Retorna o caminho do fechado."""
+        with self._trava:
+            self._sincronizar()
+            self._arquivo.close()
+            fechados = _segmentos_fechados(self.caminho)
+            numero = int(fechados[-1].rsplit(".", 1)[1]) + 1 if fechados else 1
+            fechado = f"{self.caminho}.{numero:06d}"
+            os.replace(self.caminho, fechado)
+            self._arquivo = open(self.caminho, "a", encoding="utf-8")
+            return fechado
+
+    def checkpoint(self, caminho_snapshot, em_segundo_plano=True, trava=None):
+        """
+        Incorpora os segmentos fechados ao snapshot. O segmento atual é
+        rotacionado na hora (as próximas mutações vão para um novo); o
+        snapshot é regravado a partir do snapshot anterior mais os segmentos,
+        em uma thread, e só então os segmentos são apagados.
+
+        `trava` (na API, a trava de escrita do grafo) é tomada só durante a
+        rotação; a espera pelo checkpoint anterior acontece antes, sem ela.
+        Retorna a thread (ou None, se em_segundo_plano=False).
+        """
+        with self._trava_checkpoint:
+            self.aguardar_checkpoint()
+            with trava() if trava is not None else nullcontext():
+                self.rotacionar()
+            segmentos = _segmentos_fechados(self.caminho)
+
+            def incorporar():
+                base = TGrafoND(modo="esparsa")
+                base.verboso = False
+                if os.path.exists(caminho_snapshot):
+                    base.carregar_snapshot(caminho_snapshot)
+                for segmento in segmentos:
+                    aplicar_diario(base, segmento)
+                if base.gravar_snapshot(caminho_snapshot):
+                    for segmento in segmentos:
+                        os.remove(segmento)
+
+            if not em_segundo_plano:
+                incorporar()
+                return None
+            self._checkpoint = threading.Thread(target=incorporar, name="checkpoint-diario", daemon=True)
+            self._checkpoint.start()
+            return self._checkpoint
+
+    def aguardar_checkpoint(self):
+        if self._checkpoint is not None:
+            self._checkpoint.join()
+            self._checkpoint = None
+
+    def reiniciar(self, grafo, caminho_snapshot, trava=None):
+        """
+        Define `grafo` como novo ponto de partida: grava seu snapshot e
+        descarta todos os segmentos. Use depois de substituir o grafo inteiro
+        (por exemplo ao carregar um arquivo).
+
+        O snapshot é gravado antes em um arquivo temporário; `trava` (na API,
+        a que também troca o grafo global) é tomada só para pô-lo no lugar
+        do atual e esvaziar o diário.
+        """
+        temporario = f"{caminho_snapshot}.novo"
+        with self._trava_checkpoint:
+            self.aguardar_checkpoint()
+            if not grafo.gravar_snapshot(temporario):
+                raise OSError(f"Não foi possível gravar o snapshot '{caminho_snapshot}'")
+            with trava() if trava is not None else nullcontext():
+                os.replace(temporario, caminho_snapshot)
+                with self._trava:
+                    self._arquivo.truncate(0)
+                    self._pendentes = 0
+                for segmento in _segmentos_fechados(self.caminho):
+                    os.remove(segmento)
+
+
+def _segmentos_fechados(caminho):
+    return sorted(
+        segmento for segmento in glob.glob(glob.escape(str(caminho)) + ".*")
+        if segmento.rsplit(".", 1)[1].isdigit()
+    )
+
+
+def segmentos_diario(caminho):
+    """Arquivos do diário em caminho, na ordem em que devem ser reaplicados"""
+    segmentos = _segmentos_fechados(caminho)
+    if os.path.exists(caminho):
+        segmentos.append(str(caminho))
+    return segmentos
+
+
+def _resolver(grafo, referencia):
+    if isinstance(referencia, str):
+        return grafo.itens_reverso.get(referencia)
+    return referencia if grafo.vertice_valido(referencia) else None
+
+
+def aplicar_diario(grafo, caminho):
+    """
+    Reaplica as operações de um arquivo do diário sobre o grafo.
+    Uma última linha incompleta (queda durante a escrita) é ignorada.
+    Retorna quantas operações foram lidas.
+    """
+    aplicadas = 0
+    with open(caminho, "r", encoding="utf-8") as f:
+        for linha in f:
+            try:
+                operacao = json.loads(linha)
+            except json.JSONDecodeError:
+                break  # Escrita interrompida: nada depois dela foi confirmado
+
+            op = operacao.get("op")
+            if op == "insereV":
+                grafo.insereV(operacao["nome"], operacao.get("tipo", "desconhecido"))
+            elif op in ("insereA", "removeA"):
+                v = _resolver(grafo, operacao["v"])
+                w = _resolver(grafo, operacao["w"])
+                if v is not None and w is not None:
+                    if op == "insereA":
+                        grafo.insereA(v, w, operacao.get("peso", 1.0))
+                    else:
+                        grafo.removeA(v, w)
+            elif op == "removeV":
+                v = _resolver(grafo, operacao["v"])
+                if v is not None:
+                    grafo.removeV(v)
+            aplicadas += 1
+    return aplicadas
+
+
+def recuperar_grafo(caminho_snapshot, caminho_diario, modo="esparsa"):
+    """Reconstrói o grafo a partir do último snapshot (se existir) e do diário"""
+    grafo = TGrafoND(modo=modo)
+    verboso, grafo.verboso = grafo.verboso, False
+
+    if os.path.exists(caminho_snapshot):
+        grafo.carregar_snapshot(caminho_snapshot)
+
+    operacoes = 0
+    for segmento in segmentos_diario(caminho_diario):
+        operacoes += aplicar_diario(grafo, segmento)
+
+    grafo.verboso = verboso
+    print(f" Grafo recuperado: {grafo.num_vertices} vértices, {grafo.m} arestas "
+          f"({operacoes} operações reaplicadas do diário)")
+    return grafo
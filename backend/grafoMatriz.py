@@ -7,19 +7,120 @@ Matheus Queiroz Gregorin - 10418143
 Pedro Henrique Cagnoni Guimaraes - 10417477
 
 O projeto utiliza matriz de adjacência para representar grafos.
+Para grafos grandes e esparsos há também o modo de listas de adjacência
+(modo="esparsa"), com a mesma API pública; veja armazenamento.py para os
+demais modos ("numpy", "bitset").
 '''
 
+import hashlib
+import itertools
 import math
+from contextlib import contextmanager
+
+from armazenamento import MODOS_ARMAZENAMENTO, ArmazenamentoEsparsoMapeado
+from cache import CacheRecomendacoes
+from componentes import ComponentesConexas
+from projecao import ProjecaoMusicas
+
+# Descrição dos códigos de tipo de grafo usados na primeira linha do arquivo
+TIPOS_GRAFO = {
+    0: "Não orientado sem peso",
+    1: "Não orientado com peso no vértice", 
+    2: "Não orientado com peso na aresta",
+    3: "Não orientado com peso nos vértices e arestas",
+    4: "Orientado sem peso",
+    5: "Orientado com peso no vértice",
+    6: "Orientado com peso na aresta", 
+    7: "Orientado com peso nos vértices e arestas"
+}
+
+def ler_registros_grafo(caminho):
+    """
+    Lê um arquivo no formato do Grafo.txt linha a linha, sem carregá-lo
+    inteiro na memória, e gera um registro (tupla) para cada informação:
+
+        ("tipo", tipo_grafo)
+        ("num_vertices", n)
+        ("vertice", indice, nome, tipo)
+        ("num_arestas", quantidade)      # só se o arquivo declarar
+        ("aresta", v, w, peso)
+        ("fim", linhas_lidas)
+
+    Lança ValueError se o arquivo tiver menos de 3 linhas não vazias.
+    """
+    with open(caminho, "r", encoding="utf-8") as f:
+        linhas_lidas = 0
+        secao = "tipo"
+        pendente = None
+
+        for linha in f:
+            linha = linha.strip()
+            if not linha:
+                continue
+            linhas_lidas += 1
+
+            if secao == "tipo":
+                # Lê o tipo do grafo (primeira linha)
+                yield ("tipo", int(linha))
+                secao = "num_vertices"
+                continue
+
+            if secao == "num_vertices":
+                # Lê o número de vértices (segunda linha)
+                yield ("num_vertices", int(linha))
+                secao = "vertices"
+                continue
+
+            # Definições dos vértices (linhas com aspas)
+            if '"' in linha:
+                partes = linha.split('"')
+                numero_parte = partes[0].strip()
+                if len(partes) >= 2 and numero_parte.isdigit():
+                    tipo_item = partes[3].strip() if len(partes) >= 4 else "desconhecido"
+                    yield ("vertice", int(numero_parte), partes[1].strip(), tipo_item)
+                continue
+
+            # Primeira linha sem aspas: número isolado é o número de arestas
+            if linha.isdigit():
+                yield ("num_arestas", int(linha))
+            else:
+                pendente = linha  # Já é uma aresta: volta para o laço abaixo
+                linhas_lidas -= 1
+            break
+
+        # Arestas: "v w" ou "v w peso" (laço próprio, é a maior parte do arquivo)
+        for linha in f if pendente is None else itertools.chain((pendente,), f):
+            partes = linha.split()
+            if not partes:
+                continue
+            linhas_lidas += 1
+            if len(partes) >= 2 and partes[0].isdigit() and partes[1].isdigit():
+                peso = float(partes[2]) if len(partes) >= 3 else 1.0
+                yield ("aresta", int(partes[0]), int(partes[1]), peso)
+
+    if linhas_lidas < 3:
+        raise ValueError("Arquivo inválido: muito poucas linhas")
+
+    yield ("fim", linhas_lidas)
+
+def _validar_peso(peso):
+    """Peso 0 é como o armazenamento representa "sem aresta": só pesos positivos são aceitos"""
+    if not float(peso) > 0:
+        raise ValueError(f"Peso da aresta deve ser positivo (recebido {peso}).")
 
 # Grafo Não Direcionado
 class TGrafoND:
     
     TAM_MAX_DEFAULT = 0
+    # Fração de posições removidas acima da qual removeV compacta o grafo
+    LIMIAR_COMPACTACAO = 0.25
 
-    def __init__(self, n=TAM_MAX_DEFAULT):
-        self.n = n  # Número de vértices
+    def __init__(self, n=TAM_MAX_DEFAULT, modo="densa"):
+        if modo not in MODOS_ARMAZENAMENTO:
+            raise ValueError(f"Modo de armazenamento inválido: '{modo}'.")
+        self.modo = modo
+        self._armazenamento = MODOS_ARMAZENAMENTO[modo](n)
         self.m = 0  # Número de arestas
-        self.adj = [[0.0 for i in range(n)] for j in range(n)]
         
         self.itens = {}  # {indice: "nome do item"}
         self.itens_reverso = {}  # {"nome do item": indice}
@@ -31,46 +132,257 @@ class TGrafoND:
         }
         self.tipo_grafo = 0  # Tipo padrão do grafo
 
+        # Vértices removidos ficam marcados ("lápides") até a próxima compactação,
+        # para que os IDs dos demais continuem estáveis
+        self._mortos = set()
+        self.ultimo_remapeamento = {}  # {id antigo: id novo} da última compactação
+        self.geracao_ids = 0  # Incrementada a cada compactação (IDs antigos deixam de valer)
+
+        # Componentes conexas mantidas a cada inserção; None = desatualizadas
+        # (após uma remoção), reconstruídas na próxima consulta
+        self._componentes = None
+
+        # Índice de vizinhos separados por tipo: {v: {tipo: {vizinhos}}}.
+        # Mantido a cada mutação de aresta; None = ainda não construído
+        # (após carregar um arquivo), montado na primeira consulta
+        self._vizinhos_por_tipo = {}
+
+        # Normas dos pesos de cada vértice: {v: [Σ peso, Σ peso²]}, mantidas
+        # como o índice acima (None = montadas na primeira consulta)
+        self._normas = {}
+
+        self.verboso = True  # Mensagens por operação (desligadas em cargas e replays)
+        self._observadores = []  # Notificados a cada mutação (veja adicionar_observador)
+        self.diario = None  # DiarioMutacoes ativo, se houver (veja ativar_diario)
+        self.versao = 0  # Cresce a cada mutação; identifica o estado atual do grafo
+        self._profundidade_lote = 0  # > 0 dentro de lote(): a versão só avança no final
+        self._mutou_no_lote = False
+
+        # Resultados de recomendação (veja recomendacao.py), invalidados pelas mutações
+        self.cache_recomendacoes = CacheRecomendacoes()
+        self.adicionar_observador(self.cache_recomendacoes)
+
+        # Registros {id, nome, artistas, generos} das músicas, lidos pela API (veja projecao.py)
+        self.projecao_musicas = ProjecaoMusicas(self)
+        self.adicionar_observador(self.projecao_musicas)
+
+    @property
+    def n(self):
+        """Número de posições de vértices (IDs vão de 0 a n-1, incluindo removidos ainda não compactados)"""
+        return self._armazenamento.n
+
+    @property
+    def num_vertices(self):
+        """Número de vértices existentes"""
+        return self.n - len(self._mortos)
+
+    def vertice_valido(self, v):
+        """Indica se v é o ID de um vértice existente"""
+        return 0 <= v < self.n and v not in self._mortos
+
+    @property
+    def adj(self):
+        """Linhas da adjacência: adj[v][w] é o peso da aresta v-w (0.0 se não existe)"""
+        return self._armazenamento.linhas
+
+    def _mensagem(self, texto):
+        if self.verboso:
+            print(texto)
+
+    def adicionar_observador(self, observador):
+        """
+        Registra um objeto para ser avisado das mutações do grafo. Ele pode
+        implementar qualquer um dos métodos abaixo (os ausentes são ignorados):
+
+            ao_inserir_vertice(grafo, v, nome, tipo)
+            ao_inserir_aresta(grafo, v, w, peso)
+            ao_remover_aresta(grafo, v, w)
+            ao_remover_vertice(grafo, v, nome, vizinhos)   # vizinhos antes da remoção
+            ao_compactar(grafo, remapeamento)
+            ao_recarregar(grafo)                           # grafo substituído por um arquivo
+        """
+        self._observadores.append(observador)
+
+    def remover_observador(self, observador):
+        if observador in self._observadores:
+            self._observadores.remove(observador)
+
+    def _notificar(self, evento, *args):
+        # Toda mutação passa por aqui, então é aqui que a versão avança
+        if self._profundidade_lote:
+            self._mutou_no_lote = True
+        else:
+            self.versao += 1
+        for observador in self._observadores:
+            metodo = getattr(observador, evento, None)
+            if metodo is not None:
+                metodo(self, *args)
+
+    @contextmanager
+    def lote(self):
+        """
+        Agrupa as mutações do bloco em uma única versão: os observadores são
+        avisados de cada uma, mas grafo.versao só avança uma vez, ao sair do
+        bloco (e só se algo mudou). Blocos aninhados contam como um só.
+        """
+        self._profundidade_lote += 1
+        try:
+            yield self
+        finally:
+            self._profundidade_lote -= 1
+            if not self._profundidade_lote and self._mutou_no_lote:
+                self._mutou_no_lote = False
+                self.versao += 1
+
+    def ativar_diario(self, caminho_diario, **opcoes):
+        """
+        Passa a registrar cada mutação no diário (write-ahead log) em caminho_diario.
+        As opções são repassadas para DiarioMutacoes. Retorna o diário.
+        """
+        from diario import DiarioMutacoes
+
+        self.desativar_diario()
+        self.diario = DiarioMutacoes(caminho_diario, **opcoes)
+        self.adicionar_observador(self.diario)
+        return self.diario
+
+    def transferir_diario(self, outro):
+        """
+        Passa o diário ativo para o grafo `outro` sem fechá-lo: as próximas
+        mutações registradas são as de `outro`. Use ao trocar um grafo pelo
+        outro, depois de reiniciar o diário com o snapshot de `outro`.
+        """
+        diario = self.diario
+        if diario is not None:
+            self.remover_observador(diario)
+            self.diario = None
+            outro.desativar_diario()
+            outro.diario = diario
+            outro.adicionar_observador(diario)
+
+    def _verificar_sem_diario(self):
+        # Recarregar troca o grafo inteiro sem passar pelo diário: a
+        # recuperação reaplicaria o diário antigo sobre o snapshot antigo
+        if self.diario is not None:
+            raise RuntimeError("Não é possível recarregar um grafo com o diário de mutações ativo: "
+                               "carregue em um grafo novo e reinicie o diário com ele.")
+
+    def desativar_diario(self):
+        if self.diario is not None:
+            self.remover_observador(self.diario)
+            self.diario.fechar()
+            self.diario = None
+
+    def _registrar_vertice(self, v, nome_vertice, tipo_vertice):
+        self.itens[v] = {"nome": nome_vertice, "tipo": tipo_vertice}
+        self.itens_reverso[nome_vertice] = v
+
+        if tipo_vertice not in self.vertices_por_tipo:
+            self.vertices_por_tipo[tipo_vertice] = set()
+        self.vertices_por_tipo[tipo_vertice].add(v)
+        if self._componentes is not None:
+            self._componentes.adicionar(v)
+
+        self._notificar("ao_inserir_vertice", v, nome_vertice, tipo_vertice)
+
+    def _apos_inserir_aresta(self, v, w, peso):
+        self.m += 1  # Atualiza qtd arestas
+        if self._componentes is not None:
+            self._componentes.unir(v, w)
+        if self._vizinhos_por_tipo is not None:
+            self._indexar_aresta(v, w)
+        if self._normas is not None:
+            self._somar_normas(v, w, peso)
+        self._notificar("ao_inserir_aresta", v, w, peso)
+
+    def _apos_remover_aresta(self, v, w, peso):
+        self.m -= 1  # atualiza qtd arestas
+        self._componentes = None  # A remoção pode ter separado uma componente
+        if self._vizinhos_por_tipo is not None:
+            self._desindexar_aresta(v, w)
+        if self._normas is not None:
+            self._somar_normas(v, w, peso, sinal=-1)
+        self._notificar("ao_remover_aresta", v, w)
+
     def insereA(self, v, w, peso=1.0):
-        """Insere uma aresta no Grafo não-dirigido com peso"""
-        if v < 0 or v >= self.n or w < 0 or w >= self.n:
+        """Insere uma aresta no Grafo não-dirigido com peso (positivo: peso 0 é "sem aresta")"""
+        if not self.vertice_valido(v) or not self.vertice_valido(w):
             raise IndexError("Vértice inválido.")
-        if self.adj[v][w] == 0:  # Se a aresta não existe
-            self.adj[v][w] = float(peso)
-            self.adj[w][v] = float(peso)  # Insere aresta nas duas direções
-            self.m += 1  # Atualiza qtd arestas
+        _validar_peso(peso)
+        if self._armazenamento.peso(v, w) == 0:  # Se a aresta não existe
+            self._armazenamento.definir_aresta(v, w, float(peso))  # Insere aresta nas duas direções
+            self._apos_inserir_aresta(v, w, float(peso))
 
     def insereV(self, nome_vertice, tipo_vertice = "desconhecido"):
         """Insere um vértice no grafo"""
 
         if nome_vertice in self.itens_reverso:
-            print(f" Vértice '{nome_vertice}' já existe no índice.")
+            self._mensagem(f" Vértice '{nome_vertice}' já existe no índice.")
             return self.itens_reverso[nome_vertice]
         
         novo_vertice = self.n
 
-        # Cria nova matriz expandida
-        nova_adj = [[0.0 for _ in range(self.n + 1)] for _ in range(self.n + 1)]
-
-        # Copia dados da matriz antiga
-        for i in range(self.n):
-            for j in range(self.n):
-                nova_adj[i][j] = self.adj[i][j]
-        
-        # Atualiza estruturas
-        self.adj = nova_adj     
-        self.n += 1
+        # Expande a estrutura de adjacência (crescimento amortizado)
+        self._armazenamento.adicionar_vertices(1)
 
         # Adiciona o novo vértice
-        self.itens[novo_vertice] = {"nome": nome_vertice, "tipo": tipo_vertice}
-        self.itens_reverso[nome_vertice] = novo_vertice
+        self._registrar_vertice(novo_vertice, nome_vertice, tipo_vertice)
 
-        if tipo_vertice not in self.vertices_por_tipo:
-            self.vertices_por_tipo[tipo_vertice] = set()
-        self.vertices_por_tipo[tipo_vertice].add(novo_vertice)
-
-        print(f" Vértice {novo_vertice} '{nome_vertice}' ({tipo_vertice}) inserido com sucesso!")
+        self._mensagem(f" Vértice {novo_vertice} '{nome_vertice}' ({tipo_vertice}) inserido com sucesso!")
         return novo_vertice
+
+    def insereV_lote(self, vertices):
+        """
+        Insere vários vértices [(nome, tipo), ...] expandindo a estrutura uma única vez.
+        Retorna a lista de índices na mesma ordem da entrada; nomes que já
+        existem (no grafo ou repetidos no lote) reaproveitam o índice existente.
+        """
+        ids = []
+        novos = []  # [(indice, nome, tipo)]
+        indices_novos = {}
+
+        for nome_vertice, tipo_vertice in vertices:
+            if nome_vertice in self.itens_reverso:
+                ids.append(self.itens_reverso[nome_vertice])
+            elif nome_vertice in indices_novos:
+                ids.append(indices_novos[nome_vertice])
+            else:
+                novo_vertice = self.n + len(novos)
+                indices_novos[nome_vertice] = novo_vertice
+                novos.append((novo_vertice, nome_vertice, tipo_vertice))
+                ids.append(novo_vertice)
+
+        self._armazenamento.adicionar_vertices(len(novos))
+
+        for novo_vertice, nome_vertice, tipo_vertice in novos:
+            self._registrar_vertice(novo_vertice, nome_vertice, tipo_vertice)
+
+        self._mensagem(f" {len(novos)} vértice(s) inserido(s) em lote.")
+        return ids
+
+    def insereA_lote(self, arestas):
+        """
+        Insere várias arestas [(v, w) ou (v, w, peso), ...] de uma vez.
+        Todas são validadas antes de qualquer inserção (vértices existentes e
+        pesos positivos). Retorna quantas arestas novas foram criadas (as já
+        existentes são ignoradas).
+        """
+        arestas = [tuple(aresta) for aresta in arestas]
+        for aresta in arestas:
+            if not self.vertice_valido(aresta[0]) or not self.vertice_valido(aresta[1]):
+                raise IndexError("Vértice inválido.")
+            if len(aresta) >= 3:
+                _validar_peso(aresta[2])
+
+        armazenamento = self._armazenamento
+        m_antes = self.m
+        for aresta in arestas:
+            v, w = aresta[0], aresta[1]
+            peso = float(aresta[2]) if len(aresta) >= 3 else 1.0
+            if armazenamento.peso(v, w) == 0:
+                armazenamento.definir_aresta(v, w, peso)
+                self._apos_inserir_aresta(v, w, peso)
+        return self.m - m_antes
         
     def gravar_grafo_arquivo(self, caminho_arquivo="Grafo.txt"):
         """Grava o grafo completo no arquivo sem peso e com tipos"""
@@ -81,21 +393,20 @@ class TGrafoND:
                 f.write(f"{tipo}\n")
                 
                 # Escreve número de vértices
-                f.write(f"{self.n}\n")
+                f.write(f"{self.num_vertices}\n")
+
+                # Vértices removidos não vão para o arquivo: os IDs gravados são contíguos
+                novo_id = {v: i for i, v in enumerate(self.vertices_existentes())}
                 
                 # Escreve vértices nomeados
                 for vertice_id in sorted(self.itens.keys()):
                     info = self.itens[vertice_id]
                     nome = info.get("nome", "")
                     tipo = info.get("tipo", "desconhecido")
-                    f.write(f'{vertice_id} "{nome}" "{tipo}"\n')
+                    f.write(f'{novo_id[vertice_id]} "{nome}" "{tipo}"\n')
                 
                 # Conta e escreve arestas
-                arestas = []
-                for i in range(self.n):
-                    for j in range(i + 1, self.n):
-                        if self.adj[i][j] > 0:
-                            arestas.append((i, j))
+                arestas = [(novo_id[i], novo_id[j]) for i, j, _ in self._armazenamento.arestas()]
                 
                 # Escreve número total de entradas de arestas (bidirecionais)
                 f.write(f"{len(arestas) * 2}\n")
@@ -112,160 +423,307 @@ class TGrafoND:
             print(f" Erro ao gravar arquivo: {e}")
             return False
 
+    def gravar_snapshot(self, caminho_arquivo="Grafo.amps"):
+        """Grava o grafo no formato binário (veja snapshot.py)"""
+        from snapshot import gravar_snapshot
+
+        try:
+            gravar_snapshot(self, caminho_arquivo)
+            print(f" Snapshot gravado no arquivo {caminho_arquivo}")
+            return True
+        except Exception as e:
+            print(f" Erro ao gravar snapshot: {e}")
+            return False
+
+    def carregar_snapshot(self, caminho_arquivo="Grafo.amps"):
+        """
+        Carrega um snapshot binário. No modo "esparsa" o arquivo é apenas
+        mapeado em memória: as adjacências são lidas dele sob demanda, sem
+        parsing. Nos modos de matriz a estrutura é preenchida a partir dele.
+        """
+        from snapshot import SnapshotCSR
+
+        self._verificar_sem_diario()
+        base = SnapshotCSR(caminho_arquivo)
+
+        if self.modo == "esparsa":
+            armazenamento = ArmazenamentoEsparsoMapeado(base)
+        else:
+            armazenamento = MODOS_ARMAZENAMENTO[self.modo](base.n)
+            for v in range(base.n):
+                for w, peso in base.arestas_de(v):
+                    if v <= w:
+                        armazenamento.definir_aresta(v, w, peso)
+
+        itens = {}
+        itens_reverso = {}
+        vertices_por_tipo = {tipo: set() for tipo in ("musica", "artista", "genero", "desconhecido")}
+        for vertice, nome_item, tipo_item in base.vertices():
+            itens[vertice] = {"nome": nome_item, "tipo": tipo_item}
+            itens_reverso[nome_item] = vertice
+            vertices_por_tipo.setdefault(tipo_item, set()).add(vertice)
+
+        self._armazenamento = armazenamento
+        self._mortos = set()
+        self._componentes = None
+        self._vizinhos_por_tipo = None
+        self._normas = None
+        self.m = base.m
+        self.itens = itens
+        self.itens_reverso = itens_reverso
+        self.vertices_por_tipo = vertices_por_tipo
+        self.tipo_grafo = base.tipo_grafo
+        self._notificar("ao_recarregar")
+
+        print(f" Snapshot carregado: {self.n} vértices, {self.m} arestas")
+
+    def impressao_digital(self):
+        """
+        Resumo de 64 bits do conteúdo do grafo (nomes e tipos dos vértices,
+        arestas e pesos) que não depende dos IDs: é o mesmo antes e depois de
+        compactar, de gravar e recarregar, e muda com qualquer mutação. Custa
+        O(n + m); serve para conferir se um arquivo derivado (como a tabela
+        de tabela_vizinhos.py) foi calculado a partir deste grafo.
+        """
+        def resumo(texto):
+            return int.from_bytes(hashlib.blake2b(texto.encode("utf-8"), digest_size=8).digest(), "little")
+
+        # Soma dos resumos de cada elemento: não depende da ordem em que são visitados
+        total = 0
+        for info in self.itens.values():
+            total += resumo(f"V\0{info['nome']}\0{info['tipo']}")
+        for v, w, peso in self._armazenamento.arestas():
+            a, b = sorted((self.itens[v]["nome"], self.itens[w]["nome"]))
+            total += resumo(f"A\0{a}\0{b}\0{float(peso)!r}")
+        return total % (1 << 64)
+
     def removeA(self, v, w):
         """Remove uma aresta v-w do Grafo não-dirigido"""
-        if v < 0 or v >= self.n or w < 0 or w >= self.n:
+        if not self.vertice_valido(v) or not self.vertice_valido(w):
             raise IndexError("Aresta inválida.")
-        if self.adj[v][w] > 0:  # testa se temos a aresta
-            self.adj[v][w] = 0.0
-            self.adj[w][v] = 0.0  # Remove também a aresta inversa
-            print(f"Aresta entre os vértices {v} e {w} removida com sucesso.")
-            self.m -= 1  # atualiza qtd arestas
+        peso = self._armazenamento.peso(v, w)
+        if peso > 0:  # testa se temos a aresta
+            self._armazenamento.remover_aresta(v, w)  # Remove também a aresta inversa
+            self._mensagem(f"Aresta entre os vértices {v} e {w} removida com sucesso.")
+            self._apos_remover_aresta(v, w, peso)
         else:
-            print(f"Aresta entre os vértices {v} e {w} não pôde ser removida.")
+            self._mensagem(f"Aresta entre os vértices {v} e {w} não pôde ser removida.")
 
     def removeV(self, v):
+        """
+        Remove um vértice do grafo em O(grau): suas arestas são apagadas e a
+        posição fica marcada como removida, sem renumerar os demais vértices.
+        Quando a fração de posições removidas passa de LIMIAR_COMPACTACAO o
+        grafo é compactado (veja compactar).
+        """
+        if self._remover_vertice_sem_compactar(v):
+            self._compactar_se_necessario()
 
-        """Remove um vértice do grafo"""
-        if v < 0 or v >= self.n:
+    def removeV_lote(self, vertices):
+        """
+        Remove vários vértices e compacta (se necessário) uma única vez no final.
+        Retorna quantos vértices foram removidos.
+        """
+        vertices = list(vertices)
+        for v in vertices:
+            if not self.vertice_valido(v):
+                raise IndexError("Vértice inválido.")
+
+        removidos = sum(1 for v in set(vertices) if self._remover_vertice_sem_compactar(v))
+        self._compactar_se_necessario()
+        return removidos
+
+    def _remover_vertice_sem_compactar(self, v):
+        if not self.vertice_valido(v):
             raise IndexError("Vértice inválido.")
 
         info_removida = self.itens.get(v)
         if not info_removida:
-            print(" Erro: Informações do vértice não encontradas.")
-            return
+            self._mensagem(" Erro: Informações do vértice não encontradas.")
+            return False
             
         vertice_removido = info_removida["nome"]
 
-        arestas_removidas = sum(1 for i in range(self.n) if self.adj[v][i] > 0)
-        self.m -= arestas_removidas
+        # Apaga só as arestas do vértice: O(grau) nas listas de adjacência
+        arestas = self._armazenamento.arestas_de(v)
+        vizinhos = [w for w, _ in arestas]
+        for w in vizinhos:
+            self._armazenamento.remover_aresta(v, w)
+        self.m -= len(vizinhos)
+        self._componentes = None
+        if self._vizinhos_por_tipo is not None:
+            for w in vizinhos:
+                self._desindexar_aresta(v, w)
+            self._vizinhos_por_tipo.pop(v, None)
+        if self._normas is not None:
+            for w, peso in arestas:
+                self._somar_normas(v, w, peso, sinal=-1)
+            self._normas.pop(v, None)
 
-        nova_matriz = [[0.0 for _ in range(self.n - 1)] for _ in range(self.n - 1)]
+        del self.itens[v]
+        del self.itens_reverso[vertice_removido]
+        self.vertices_por_tipo.get(info_removida["tipo"], set()).discard(v)
+        self._mortos.add(v)
 
-        for i in range(self.n):
-            if i == v:
-                continue
-            new_i = i if i < v else i - 1
+        self._notificar("ao_remover_vertice", v, vertice_removido, vizinhos)
+        self._mensagem(f"Vértice {v} ({vertice_removido}) removido com sucesso.")
+        return True
 
-            for j in range(self.n):
-                if j == v:
-                    continue
-                new_j = j if j < v else j - 1
-                nova_matriz[new_i][new_j] = self.adj[i][j]
+    def _compactar_se_necessario(self):
+        if self.n and len(self._mortos) / self.n > self.LIMIAR_COMPACTACAO:
+            self.compactar()
 
-        del self.itens[v]
-        del self.itens_reverso[vertice_removido]
+    def vertices_existentes(self):
+        """IDs dos vértices existentes, em ordem crescente"""
+        if not self._mortos:
+            return range(self.n)
+        return [v for v in range(self.n) if v not in self._mortos]
+
+    def iterar_vertices(self, tipo=None, apos=-1):
+        """
+        IDs dos vértices existentes (do tipo, se dado) maiores que `apos`, em
+        ordem crescente e sob demanda: base da paginação por cursor da API.
+        Os IDs são estáveis até a próxima compactação (veja geracao_ids).
+        """
+        do_tipo = self.vertices_por_tipo.get(tipo, ()) if tipo is not None else None
+        if do_tipo is not None and len(do_tipo) * 16 < self.n - apos:
+            # Tipo raro (gêneros, artistas): ordenar o conjunto sai mais barato que varrer os IDs
+            yield from sorted(v for v in list(do_tipo) if v > apos)
+            return
+        for v in range(apos + 1, self.n):
+            info = self.itens.get(v)
+            if info is not None and (tipo is None or info["tipo"] == tipo):
+                yield v
+
+    def compactar(self):
+        """
+        Descarta as posições dos vértices removidos, renumerando os restantes
+        como 0..num_vertices-1 na mesma ordem relativa.
+        Retorna (e guarda em ultimo_remapeamento) o mapa {id antigo: id novo};
+        retorna {} se não havia nada a compactar.
+        """
+        if not self._mortos:
+            return {}
+
+        vivos = self.vertices_existentes()
+        remapeamento = {antigo: novo for novo, antigo in enumerate(vivos)}
+
+        self._armazenamento.compactar(vivos)
 
         novo_itens = {}
         novo_itens_reverso = {}
-
         novo_vertices_por_tipo = {tipo: set() for tipo in self.vertices_por_tipo}
 
         for old_id, info in self.itens.items():
-            new_id = old_id if old_id < v else old_id - 1
-            
-            nome = info["nome"]
-            tipo = info["tipo"]
+            new_id = remapeamento[old_id]
             
             novo_itens[new_id] = info # info já é {"nome": nome, "tipo": tipo}
-            novo_itens_reverso[nome] = new_id
-            novo_vertices_por_tipo[tipo].add(new_id)
+            novo_itens_reverso[info["nome"]] = new_id
+            novo_vertices_por_tipo.setdefault(info["tipo"], set()).add(new_id)
 
-        self.adj = nova_matriz
         self.itens = novo_itens
         self.itens_reverso = novo_itens_reverso
         self.vertices_por_tipo = novo_vertices_por_tipo
-        self.n -= 1
+        self._mortos = set()
+        self._componentes = None
+        if self._vizinhos_por_tipo is not None:
+            self._vizinhos_por_tipo = {
+                remapeamento[v]: {tipo: {remapeamento[w] for w in vizinhos}
+                                  for tipo, vizinhos in por_tipo.items()}
+                for v, por_tipo in self._vizinhos_por_tipo.items()
+            }
+        if self._normas is not None:
+            self._normas = {remapeamento[v]: normas for v, normas in self._normas.items()}
+        self.ultimo_remapeamento = remapeamento
+        self.geracao_ids += 1
 
-        print(f"Vértice {v} ({vertice_removido}) removido com sucesso.")
+        self._notificar("ao_compactar", remapeamento)
+        self._mensagem(f" Grafo compactado: {len(remapeamento)} vértice(s) renumerado(s).")
+        return remapeamento
 
     def e_completo(self):
         """Verifica se o Grafo não-dirigido é completo"""
-        for i in range(self.n):
-            for j in range(self.n):
-                if i != j and self.adj[i][j] == 0:  # Se falta uma aresta entre vértices diferentes
-                    return False
+        if not self._mortos:
+            return self._armazenamento.e_completo()
+
+        # Com posições removidas, compara o grau de cada vértice existente
+        graus = self.graus()
+        for v in self.vertices_existentes():
+            laco = 1 if self._armazenamento.peso(v, v) > 0 else 0
+            if graus[v] - laco != self.num_vertices - 1:
+                return False
         return True
-    
-    def arquivo_para_matriz_adjacencia(self, caminho):
-        # Dicionário para mapear nomes dos itens para índices
-        self.itens = {}  # {indice: "nome do item"}
-        self.itens_reverso = {}  # {"nome do item": indice}
-        
-        with open(caminho, "r", encoding="utf-8") as f:
-            linhas = [l.strip() for l in f if l.strip()]
 
-        if len(linhas) < 3:
-            raise ValueError("Arquivo inválido: muito poucas linhas")
+    def graus(self):
+        """
+        Grau de todos os vértices de uma vez, indexado pelo ID (posições
+        removidas têm grau 0). No modo "numpy" é uma contagem vetorizada
+        sobre a matriz e devolve um array.
+        """
+        return self._armazenamento.graus()
+    
+    # Arestas lidas entre dois avisos de progresso em arquivo_para_matriz_adjacencia
+    INTERVALO_PROGRESSO = 65536
 
-        # Lê o tipo do grafo (primeira linha)
-        tipo_grafo = int(linhas[0])
-        
-        # Lê o número de vértices (segunda linha)
-        num_vertices = int(linhas[1])
-        
-        # Ajusta o tamanho do grafo
-        self.n = num_vertices
-        self.adj = [[0.0 for _ in range(self.n)] for _ in range(self.n)]
-        self.m = 0
-        
-        linha_atual = 2
-        
-        # Lê as definições dos vértices (linhas com aspas)
-        while linha_atual < len(linhas) and '"' in linhas[linha_atual]:
-            linha = linhas[linha_atual]
-            partes = linha.split('"')
-            
-            if len(partes) >= 4:
-                numero_parte = partes[0].strip()
-                if numero_parte.isdigit():
-                    vertice = int(numero_parte)
-                    nome_item = partes[1].strip()
-                    tipo_item = partes[3].strip()
-                    
-                    self.itens[vertice] = {"nome": nome_item, "tipo": tipo_item}
-                    self.itens_reverso[nome_item] = vertice
+    def arquivo_para_matriz_adjacencia(self, caminho, progresso=None):
+        """
+        Carrega o grafo do arquivo em uma única passada sobre ler_registros_grafo.
+        As arestas vão direto para a estrutura de adjacência, sem guardar as
+        linhas do arquivo; o grafo atual só é substituído se a leitura terminar.
+        progresso(vertices, arestas), se dado, é chamado com o que já foi lido
+        a cada INTERVALO_PROGRESSO arestas e no final.
+        """
+        self._verificar_sem_diario()
+        # Dicionário para mapear nomes dos itens para índices
+        itens = {}  # {indice: "nome do item"}
+        itens_reverso = {}  # {"nome do item": indice}
+        vertices_por_tipo = {tipo: set() for tipo in ("musica", "artista", "genero", "desconhecido")}
 
-                    if tipo_item not in self.vertices_por_tipo:
-                        self.vertices_por_tipo[tipo_item] = set()
-                    self.vertices_por_tipo[tipo_item].add(vertice)
-            
-            linha_atual += 1
-        
-        # Verifica se existe uma linha com o número de arestas
+        tipo_grafo = 0
         num_arestas = None
-        if linha_atual < len(linhas):
-            try:
-                # Tenta interpretar como número de arestas
-                possivel_num_arestas = int(linhas[linha_atual])
-                # Se for um número isolado, provavelmente é o número de arestas
-                if linha_atual + 1 < len(linhas):
-                    proxima_linha = linhas[linha_atual + 1].split()
-                    if len(proxima_linha) >= 2 and proxima_linha[0].isdigit() and proxima_linha[1].isdigit():
-                        num_arestas = possivel_num_arestas
-                        linha_atual += 1
-            except ValueError:
-                pass
-        
-        # Lê as arestas
+        armazenamento = None
         arestas_lidas = 0
-        while linha_atual < len(linhas):
-            linha = linhas[linha_atual]
-            partes = linha.split()
-            
-            if len(partes) >= 2 and partes[0].isdigit() and partes[1].isdigit():
-                v = int(partes[0])
-                w = int(partes[1])
-                peso = float(partes[2]) if len(partes) >= 3 else 1.0
-                
-                # Verifica se os vértices são válidos
-                if 0 <= v < self.n and 0 <= w < self.n:
-                    # Só insere se a aresta ainda não existe (evita duplicatas)
-                    if self.adj[v][w] == 0:
-                        self.insereA(v, w, peso)
-                        arestas_lidas += 1
-            
-            linha_atual += 1
+
+        for registro in ler_registros_grafo(caminho):
+            tipo_registro = registro[0]
+
+            if tipo_registro == "aresta":
+                _, v, w, peso = registro
+                # Verifica se os vértices e o peso são válidos
+                # e só insere se a aresta ainda não existe (o arquivo traz v-w e w-v)
+                if v < armazenamento.n and w < armazenamento.n and peso > 0 and armazenamento.peso(v, w) == 0:
+                    armazenamento.definir_aresta(v, w, peso)
+                    arestas_lidas += 1
+                    if progresso is not None and arestas_lidas % self.INTERVALO_PROGRESSO == 0:
+                        progresso(len(itens), arestas_lidas)
+
+            elif tipo_registro == "vertice":
+                _, vertice, nome_item, tipo_item = registro
+                itens[vertice] = {"nome": nome_item, "tipo": tipo_item}
+                itens_reverso[nome_item] = vertice
+                vertices_por_tipo.setdefault(tipo_item, set()).add(vertice)
+
+            elif tipo_registro == "num_vertices":
+                # Aloca a estrutura uma única vez, já no tamanho final
+                armazenamento = MODOS_ARMAZENAMENTO[self.modo](registro[1])
+
+            elif tipo_registro == "num_arestas":
+                num_arestas = registro[1]
+
+            elif tipo_registro == "tipo":
+                tipo_grafo = registro[1]
+
+        self._armazenamento = armazenamento
+        self._mortos = set()
+        self._componentes = None
+        self._vizinhos_por_tipo = None
+        self._normas = None
+        self.m = arestas_lidas
+        self.itens = itens
+        self.itens_reverso = itens_reverso
+        self.vertices_por_tipo = vertices_por_tipo
+        if progresso is not None:
+            progresso(len(itens), arestas_lidas)
         
         # Relatório
         print(f"Grafo carregado:")
@@ -282,6 +740,7 @@ class TGrafoND:
         
         # Armazena o tipo do grafo para uso posterior
         self.tipo_grafo = tipo_grafo
+        self._notificar("ao_recarregar")
 
     def get_nome_item(self, vertice):
         #Retorna o nome do item associado ao vértice
@@ -320,7 +779,7 @@ class TGrafoND:
             print(linha_separadora)
 
             # Imprime as Linhas da Matriz
-            for i in range(self.n):
+            for i in self.vertices_existentes():
                 rotulo_completo = f"{i}: {self.get_nome_item(i)}"
                 if len(rotulo_completo) > LARGURA_ROTULO_LINHA - 1:
                     rotulo = rotulo_completo[:LARGURA_ROTULO_LINHA - 4] + "..."
@@ -357,108 +816,64 @@ class TGrafoND:
     def mostrar_conteudo_arquivo(self, caminho_arquivo="Grafo.txt"):
         """Mostra o conteúdo do arquivo Grafo.txt de forma visualmente atraente"""
         try:
-            with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-                linhas = [linha.strip() for linha in f if linha.strip()]
-            
-            if len(linhas) < 3:
-                print(" Arquivo inválido ou vazio.")
-                return
+            tipo_grafo = None
+            num_vertices = 0
+            vertices_nomeados = {}
+            num_arestas_arquivo = None
+            total_linhas = 0
+
+            arestas_unicas = []  # Só as primeiras 100, para exibição
+            arestas_vistas = set()
+
+            for registro in ler_registros_grafo(caminho_arquivo):
+                if registro[0] == "aresta":
+                    _, v1, v2, peso = registro
+                    # (a,b) é igual a (b,a)
+                    aresta = (v1, v2) if v1 <= v2 else (v2, v1)
+                    if aresta not in arestas_vistas:
+                        arestas_vistas.add(aresta)
+                        if len(arestas_unicas) < 100:
+                            arestas_unicas.append((v1, v2, peso))
+                elif registro[0] == "vertice":
+                    vertices_nomeados[registro[1]] = registro[2]
+                elif registro[0] == "tipo":
+                    tipo_grafo = registro[1]
+                elif registro[0] == "num_vertices":
+                    num_vertices = registro[1]
+                elif registro[0] == "num_arestas":
+                    num_arestas_arquivo = registro[1]
+                elif registro[0] == "fim":
+                    total_linhas = registro[1]
             
             print("\n" + "="*70)
             print("         CONTEÚDO DO ARQUIVO GRAFO.TXT")
             print("="*70)
             
             # 1. TIPO DO GRAFO
-            tipo_grafo = int(linhas[0])
-            tipos_desc = {
-                0: "Não orientado sem peso",
-                1: "Não orientado com peso no vértice", 
-                2: "Não orientado com peso na aresta",
-                3: "Não orientado com peso nos vértices e arestas",
-                4: "Orientado sem peso",
-                5: "Orientado com peso no vértice",
-                6: "Orientado com peso na aresta", 
-                7: "Orientado com peso nos vértices e arestas"
-            }
-            
             print(f"\n  TIPO DO GRAFO:")
             print(f"   Código: {tipo_grafo}")
-            print(f"   Descrição: {tipos_desc.get(tipo_grafo, 'Tipo desconhecido')}")
+            print(f"   Descrição: {TIPOS_GRAFO.get(tipo_grafo, 'Tipo desconhecido')}")
             
             # 2. NÚMERO DE VÉRTICES
-            num_vertices = int(linhas[1])
             print(f"\n ESTATÍSTICAS:")
             print(f"   Total de vértices: {num_vertices}")
             
             # 3. VÉRTICES NOMEADOS
-            linha_atual = 2
-            vertices_nomeados = {}
-            
-            while linha_atual < len(linhas) and '"' in linhas[linha_atual]:
-                linha = linhas[linha_atual]
-                partes = linha.split('"')
-                
-                if len(partes) >= 2:
-                    numero_parte = partes[0].strip()
-                    if numero_parte.isdigit():
-                        vertice = int(numero_parte)
-                        nome = partes[1].strip()
-                        vertices_nomeados[vertice] = nome
-                
-                linha_atual += 1
-            
             print(f"   Vértices nomeados: {len(vertices_nomeados)}")
             
             # 4. NÚMERO DE ARESTAS  
-            num_arestas_arquivo = None
-            if linha_atual < len(linhas):
-                try:
-                    possivel_num_arestas = int(linhas[linha_atual])
-                    # Verifica se a próxima linha contém uma aresta
-                    if linha_atual + 1 < len(linhas):
-                        proxima_linha = linhas[linha_atual + 1].split()
-                        if len(proxima_linha) >= 2 and proxima_linha[0].isdigit() and proxima_linha[1].isdigit():
-                            num_arestas_arquivo = possivel_num_arestas
-                            linha_atual += 1
-                except ValueError:
-                    pass
-            
             if num_arestas_arquivo:
                 print(f"   Entradas de arestas no arquivo: {num_arestas_arquivo}")
                 print(f"   Arestas únicas estimadas: {num_arestas_arquivo // 2}")
             
             
             # 6. ARESTAS (CONEXÕES)
-            arestas_brutas = []
-            while linha_atual < len(linhas):
-                linha = linhas[linha_atual]
-                partes = linha.split()
-                
-                if len(partes) >= 2 and partes[0].isdigit() and partes[1].isdigit():
-                    v1 = int(partes[0])
-                    v2 = int(partes[1])
-                    peso = partes[2] if len(partes) >= 3 else "1.0"
-                    arestas_brutas.append((v1, v2, peso))
-                
-                linha_atual += 1
-            
-            # Remove duplicatas
-            arestas_unicas = []
-            arestas_vistas = set()
-            
-            for v1, v2, peso in arestas_brutas:
-                # (a,b) é igual a (b,a)
-                aresta = tuple(sorted([v1, v2]))
-                if aresta not in arestas_vistas:
-                    arestas_vistas.add(aresta)
-                    arestas_unicas.append((v1, v2, peso))
-            
             print(f"\n CONEXÕES:")
             if arestas_unicas:
                 print("   Formato: Vértice1 ↔ Vértice2")
                 print("   " + "-" * 50)
                 
-                for idx, (v1, v2, peso) in enumerate(arestas_unicas[:100]):
+                for v1, v2, peso in arestas_unicas:
                     nome1 = vertices_nomeados.get(v1, f"V{v1}")
                     nome2 = vertices_nomeados.get(v2, f"V{v2}")
                     
@@ -473,11 +888,11 @@ class TGrafoND:
             
             # 7. RESUMO FINAL
             print(f"\n RESUMO:")
-            print(f"   • Tipo: {tipos_desc.get(tipo_grafo, 'Desconhecido')}")
+            print(f"   • Tipo: {TIPOS_GRAFO.get(tipo_grafo, 'Desconhecido')}")
             print(f"   • Vértices totais: {num_vertices}")
             print(f"   • Vértices nomeados: {len(vertices_nomeados)}")
-            print(f"   • Conexões únicas: {len(arestas_unicas)}")
-            print(f"   • Tamanho do arquivo: {len(linhas)} linhas")
+            print(f"   • Conexões únicas: {len(arestas_vistas)}")
+            print(f"   • Tamanho do arquivo: {total_linhas} linhas")
             
             print("="*70)
             
@@ -489,55 +904,23 @@ class TGrafoND:
     def mostrar_conexoes_detalhadas(self, caminho_arquivo="Grafo.txt", limite=20):
         """Mostra conexões do arquivo de forma mais detalhada"""
         try:
-            with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-                linhas = [linha.strip() for linha in f if linha.strip()]
+            # Carrega vértices nomeados e organiza as conexões
+            vertices_nomeados = {}
+            conexoes_por_vertice = {}
+
+            for registro in ler_registros_grafo(caminho_arquivo):
+                if registro[0] == "aresta":
+                    _, v1, v2, _ = registro
+                    if v1 not in conexoes_por_vertice:
+                        conexoes_por_vertice[v1] = set()  # Remove duplicatas
+                    conexoes_por_vertice[v1].add(v2)
+                elif registro[0] == "vertice":
+                    vertices_nomeados[registro[1]] = registro[2]
             
             print("\n" + "="*80)
             print("            CONEXÕES DETALHADAS DO ARQUIVO")
             print("="*80)
             
-            # Carrega vértices nomeados
-            vertices_nomeados = {}
-            linha_atual = 2
-            
-            while linha_atual < len(linhas) and '"' in linhas[linha_atual]:
-                linha = linhas[linha_atual]
-                partes = linha.split('"')
-                
-                if len(partes) >= 2:
-                    numero_parte = partes[0].strip()
-                    if numero_parte.isdigit():
-                        vertice = int(numero_parte)
-                        nome = partes[1].strip()
-                        vertices_nomeados[vertice] = nome
-                
-                linha_atual += 1
-            
-            # Pula linha do número de arestas se existir
-            if linha_atual < len(linhas):
-                try:
-                    int(linhas[linha_atual])
-                    linha_atual += 1
-                except ValueError:
-                    pass
-            
-            # Carrega e organiza conexões
-            conexoes_por_vertice = {}
-            
-            while linha_atual < len(linhas):
-                linha = linhas[linha_atual]
-                partes = linha.split()
-                
-                if len(partes) >= 2 and partes[0].isdigit() and partes[1].isdigit():
-                    v1 = int(partes[0])
-                    v2 = int(partes[1])
-                    
-                    if v1 not in conexoes_por_vertice:
-                        conexoes_por_vertice[v1] = []
-                    conexoes_por_vertice[v1].append(v2)
-                
-                linha_atual += 1
-            
             # Mostra conexões organizadas
             vertices_mostrados = 0
             for vertice in sorted(conexoes_por_vertice.keys()):
@@ -546,7 +929,7 @@ class TGrafoND:
                     break
                 
                 nome_origem = vertices_nomeados.get(vertice, f"Vértice {vertice}")
-                conexoes = sorted(set(conexoes_por_vertice[vertice]))  # Remove duplicatas
+                conexoes = sorted(conexoes_por_vertice[vertice])
                 
                 print(f"\n {vertice:3d}: {nome_origem}")
                 print(f"    Conectado a {len(conexoes)} vértice(s):")
@@ -560,7 +943,7 @@ class TGrafoND:
                 
                 vertices_mostrados += 1
             
-            total_conexoes = sum(len(set(conexoes)) for conexoes in conexoes_por_vertice.values())
+            total_conexoes = sum(len(conexoes) for conexoes in conexoes_por_vertice.values())
             print(f"\n Total de conexões no arquivo: {total_conexoes}")
             print(f" Estimativa de arestas únicas: {total_conexoes // 2}")
             
@@ -570,42 +953,150 @@ class TGrafoND:
             print(f" Erro ao processar arquivo: {e}")
 
 
+    def _componentes_atuais(self):
+        """Estrutura de componentes conexas, reconstruída se uma remoção a invalidou"""
+        if self._componentes is None:
+            # Reconstrução em O(n + m) sobre as listas de arestas, sem recursão
+            self._componentes = ComponentesConexas.construir(
+                self.n, self._armazenamento.arestas(), ignorar=self._mortos
+            )
+        return self._componentes
+
+    def num_componentes(self):
+        """Quantidade de componentes conexas (O(1) entre remoções)"""
+        return self._componentes_atuais().quantidade
+
+    def conectados(self, v, w):
+        """Indica se existe caminho entre os vértices v e w"""
+        if not self.vertice_valido(v) or not self.vertice_valido(w):
+            raise IndexError("Vértice inválido.")
+        return self._componentes_atuais().conectados(v, w)
+
     def conexidade(self):
         """
-        Verifica se o grafo é conexo usando Busca em Profundidade (DFS).
-        Esta versão é mais robusta e corrige o bug do vértice isolado.
+        Verifica se o grafo é conexo pela quantidade de componentes conexas,
+        mantida a cada inserção (veja componentes.py).
         Retorna 0 se for conexo, 1 se for desconexo.
         """
-        # Um grafo com 0 ou 1 vértice é, por definição, conexo.
-        if self.n == 0: # Grafo com 0 vértices é desconexo
+        if self.num_vertices == 0: # Grafo com 0 vértices é desconexo
             return 1
-        if self.n == 1: # Grafo com 1 vértice é conexo
-            return 0
+        if self.num_componentes() == 1:
+            return 0  # Conexo
+        else:
+            return 1  # Desconexo
 
-        visitado = [False] * self.n
+    def _tipo_vertice(self, v):
+        info = self.itens.get(v)
+        return info["tipo"] if info else "desconhecido"
 
-        def dfs(v):
-            visitado[v] = True
-            for w in range(self.n):
-                if self.adj[v][w] > 0 and not visitado[w]:
-                    dfs(w)
+    def _indexar_aresta(self, v, w, indice=None):
+        if indice is None:
+            indice = self._vizinhos_por_tipo
+        indice.setdefault(v, {}).setdefault(self._tipo_vertice(w), set()).add(w)
+        indice.setdefault(w, {}).setdefault(self._tipo_vertice(v), set()).add(v)
 
-        # Inicia a busca a partir do primeiro vértice.
-        dfs(0)
+    def _desindexar_aresta(self, v, w):
+        indice = self._vizinhos_por_tipo
+        indice.get(v, {}).get(self._tipo_vertice(w), set()).discard(w)
+        indice.get(w, {}).get(self._tipo_vertice(v), set()).discard(v)
 
-        # se todos os vértices foram visitados após uma única busca a partir de um ponto.
-        if all(visitado):
-            return 0  # Conexo
-        else:
+    def _indice_vizinhos(self):
+        """Índice de vizinhos por tipo, construído em O(n + m) se ainda não existir"""
+        if self._vizinhos_por_tipo is None:
+            # Montado à parte e publicado pronto: leitores simultâneos
+            # (threads da API) nunca veem um índice pela metade
+            indice = {}
+            for v, w, _ in self._armazenamento.arestas():
+                self._indexar_aresta(v, w, indice)
+            self._vizinhos_por_tipo = indice
+        return self._vizinhos_por_tipo
+
+    def vizinhos_do_tipo(self, v, tipo):
+        """Set com os IDs dos vizinhos de v do tipo dado, em O(grau)"""
+        if not self.vertice_valido(v):
+            raise IndexError("Vértice inválido")
+        return set(self._indice_vizinhos().get(v, {}).get(tipo, ()))
+
+    def vizinhos_do_tipo_sem_copia(self, v, tipo):
+        """
+        Como vizinhos_do_tipo, mas devolve o set guardado no índice, sem copiar
+        (O(1) mesmo para hubs). Só para leitura, e só até a próxima mutação.
+        """
+        return self._indice_vizinhos().get(v, {}).get(tipo, frozenset())
+
+    def grau_do_tipo(self, v, tipo):
+        """Quantos vizinhos de v são do tipo dado, em O(1)"""
+        return len(self._indice_vizinhos().get(v, {}).get(tipo, ()))
+
+    def _somar_normas(self, v, w, peso, sinal=1, normas=None):
+        """Soma (sinal=1) ou subtrai (sinal=-1) a aresta v-w das normas das duas pontas"""
+        if normas is None:
+            normas = self._normas
+        for x in ((v,) if v == w else (v, w)):
+            normas_x = normas.setdefault(x, [0.0, 0.0])
+            normas_x[0] += sinal * peso
+            normas_x[1] += sinal * peso * peso
+
+    def _normas_atuais(self):
+        if self._normas is None:
+            normas = {}  # Publicadas prontas, como o índice de vizinhos
+            for v, w, peso in self._armazenamento.arestas():
+                self._somar_normas(v, w, peso, normas=normas)
+            self._normas = normas
+        return self._normas
+
+    def soma_pesos(self, v):
+        """Σ dos pesos das arestas de v (norma L1), mantida a cada mutação"""
+        if not self.vertice_valido(v):
+            raise IndexError("Vértice inválido")
+        return self._normas_atuais().get(v, (0.0, 0.0))[0]
+
+    def norma_pesos(self, v):
+        """√(Σ peso²) das arestas de v (norma L2), mantida a cada mutação"""
+        if not self.vertice_valido(v):
+            raise IndexError("Vértice inválido")
+        return math.sqrt(max(self._normas_atuais().get(v, (0.0, 0.0))[1], 0.0))
+
+    def peso_aresta(self, v, w):
+        """Peso da aresta v-w (0.0 se não existe)"""
+        if not self.vertice_valido(v) or not self.vertice_valido(w):
+            raise IndexError("Vértice inválido")
+        return self._armazenamento.peso(v, w)
+
+    def grau(self, v):
+        """Grau do vértice v, somando os tamanhos do índice por tipo (O(tipos))"""
+        if not self.vertice_valido(v):
+            raise IndexError("Vértice inválido")
+        return sum(len(vizinhos) for vizinhos in self._indice_vizinhos().get(v, {}).values())
+
+    def tem_aresta(self, v, w):
+        """Indica se existe a aresta v-w"""
+        return self.vertice_valido(v) and self.vertice_valido(w) and self._armazenamento.peso(v, w) > 0
+
+    @property
+    def usa_bitsets(self):
+        """Indica se a adjacência está em mapas de bits (modo "bitset")"""
+        return hasattr(self._armazenamento, "bits")
+
+    def vizinhos_bitset(self, v):
+        """Vizinhos de v como um int com o bit w ligado para cada vizinho w"""
+        if not self.vertice_valido(v):
+            raise IndexError("Vértice inválido")
+        if self.usa_bitsets:
+            return self._armazenamento.bits[v]
+        bits = 0
+        for w in self._armazenamento.vizinhos(v):
+            bits |= 1 << w
+        return bits
 
-            return 1  # Desconexo
-        
     def obter_vizinhos(self, v):
         # Retorna um set de IDs dos vizinhos do vértice v
-        if v < 0 or v >= self.n:
+        if not self.vertice_valido(v):
+            raise IndexError("Vértice inválido")
+        return set(self._armazenamento.vizinhos(v))
+
+    def obter_arestas(self, v):
+        """Retorna a lista de (vizinho, peso) do vértice v"""
+        if not self.vertice_valido(v):
             raise IndexError("Vértice inválido")
-        vizinhos = set()
-        for j in range (self.n):
-            if self.adj[v][j] > 0:
-                vizinhos.add(j)
-        return vizinhos
+        return self._armazenamento.arestas_de(v)
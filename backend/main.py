@@ -47,6 +47,44 @@ else:
         sp = None
 
 from grafoMatriz import TGrafoND
+from recomendacao import recomendar_musicas
+
+def baixar_artista_spotify(artista_nome):
+    """
+    Busca no Spotify o artista, seus gêneros e suas músicas mais tocadas.
+    Retorna (nome do artista, [gêneros], [músicas]) ou None se não encontrado.
+    Só consulta a API: não toca no grafo.
+    """
+    resultados = sp.search(q=f'artist:{artista_nome}', type='artist', limit=1)
+    if not resultados or not resultados['artists']['items']:
+        return None
+    artista_data = resultados['artists']['items'][0]
+    top_tracks = sp.artist_top_tracks(artista_data['id'])
+    nomes_musicas = [track['name'] for track in top_tracks['tracks']]
+    return artista_data['name'], artista_data['genres'], nomes_musicas
+
+
+def inserir_artista_importado(grafo, nome_artista, generos, nomes_musicas):
+    """Insere no grafo o que baixar_artista_spotify devolveu. Retorna (ids dos gêneros, ids das músicas)"""
+    # Artista, gêneros e músicas entram em um único lote:
+    # a estrutura do grafo cresce uma vez só por importação
+    ids = grafo.insereV_lote(
+        [(nome_artista, "artista")]
+        + [(genero_nome, "genero") for genero_nome in generos]
+        + [(musica_nome, "musica") for musica_nome in nomes_musicas]
+    )
+    id_artista = ids[0]
+    ids_generos = set(ids[1:1 + len(generos)])
+    ids_musicas = ids[1 + len(generos):]
+
+    arestas = [(id_artista, id_genero) for id_genero in ids_generos]
+    for id_musica in ids_musicas:
+        arestas.append((id_musica, id_artista))
+        for id_genero in ids_generos:
+            arestas.append((id_musica, id_genero))
+    grafo.insereA_lote(arestas)
+    return ids_generos, ids_musicas
+
 
 def importar_artista_spotify(grafo, artista_nome):
 
@@ -57,39 +95,16 @@ def importar_artista_spotify(grafo, artista_nome):
     print(f"\n Buscando por '{artista_nome}' no Spotify")
 
     try:
-        resultados = sp.search(q=f'artist:{artista_nome}', type='artist', limit=1)
-        if not resultados:
+        dados = baixar_artista_spotify(artista_nome)
+        if dados is None:
             print(f" Artista '{artista_nome}' não encontrado.")
             return
-        artista_data = resultados['artists']['items'][0]
-        nome_artista_real = artista_data['name']
-
-        id_artista = grafo.insereV(nome_artista_real, "artista")
-
-        ids_generos = set()
-        for genero_nome in artista_data['genres']:
-            genero = genero_nome.title()
-            id_genero = grafo.insereV(genero_nome, "genero")
-            ids_generos.add(id_genero)
-
-            grafo.insereA(id_artista, id_genero)
+        nome_artista_real = dados[0]
+        ids_generos, ids_musicas = inserir_artista_importado(grafo, *dados)
         
         print(f" Artista '{nome_artista_real}' e {len(ids_generos)} gêneros processados")
 
-        top_tracks = sp.artist_top_tracks(artista_data['id'])
-
-        musicas_importadas = 0
-        for track in top_tracks['tracks']:
-            musica_nome = track['name']
-
-            id_musica = grafo.insereV(musica_nome, "musica")
-
-            grafo.insereA(id_musica, id_artista)
-
-            for id_genero in ids_generos:
-                grafo.insereA(id_musica, id_genero)
-
-            musicas_importadas += 1
+        musicas_importadas = len(ids_musicas)
 
         print(f" Importação de '{nome_artista_real}' concluída")
         print(f" {musicas_importadas} músicas importadas")
@@ -97,49 +112,6 @@ def importar_artista_spotify(grafo, artista_nome):
         print(f" Erro durante a importação do Spotify: {e}")
 
 
-def recomendar_musicas(grafo, nome_musica_base, top_n = 5):
-    # Recomendacao de musicas baseada no teorema de Jaccard
-
-    if nome_musica_base not in grafo.itens_reverso:
-        print(f" Erro: Musica '{nome_musica_base}' não encontrada")
-        return []
-    
-    musica_base_id = grafo.itens_reverso[nome_musica_base]
-
-    if grafo.itens[musica_base_id]["tipo"] != "musica":
-        print(f"Erro '{nome_musica_base}' não é uma música")
-        return []
-    
-    perfil_base = grafo.obter_vizinhos(musica_base_id)
-
-    if not perfil_base:
-        print(f"Música '{nome_musica_base}' não tem conexões")
-        return []
-    
-    scores_similaridade = []
-
-    for musica_id in grafo.vertices_por_tipo["musica"]:
-        if musica_id == musica_base_id:
-            continue
-        perfil_outra = grafo.obter_vizinhos(musica_id)
-        if not perfil_outra:
-            continue
-
-        intersecao = perfil_base.intersection(perfil_outra)
-        uniao = perfil_base.union(perfil_outra)
-
-        if not uniao:
-            jaccard_score = 0.0
-        else:
-            jaccard_score = len(intersecao)/len(uniao)
-        
-        if jaccard_score > 0:
-            nome_outra_musica = grafo.get_nome_item(musica_id)
-            scores_similaridade.append((nome_outra_musica, jaccard_score))
-    
-    scores_similaridade.sort(key=lambda item: item[1], reverse = True)
-    return scores_similaridade[:top_n]
-
 def mostrar_menu():
     """Exibe o menu de opções"""
     print("\n" + "=" * 50)
@@ -0,0 +1,199 @@
+"""
+Índice aproximado de similaridade entre músicas (MinHash + LSH).
+
+Cada música recebe uma assinatura MinHash do seu conjunto de vizinhos: para
+cada uma de k funções de hash, o menor hash entre os vizinhos. A fração de
+posições iguais entre duas assinaturas estima o Jaccard entre as músicas.
+A assinatura é dividida em bandas, e músicas com uma banda idêntica caem no
+mesmo balde; os candidatos de uma música são os que dividem algum balde com
+ela. Assim a busca não depende do tamanho dos gêneros populares.
+
+O índice é um observador do TGrafoND (veja adicionar_observador):
+
+- inserir uma aresta só pode diminuir os mínimos, então a assinatura é
+  atualizada em O(k) sem olhar os outros vizinhos;
+- remover uma aresta ou vértice recalcula a assinatura das músicas afetadas;
+- recarregar o grafo marca o índice como desatualizado, e ele é reconstruído
+  na próxima consulta.
+
+Os vizinhos entram pelo nome (hash estável), não pelo ID, então as
+assinaturas não mudam quando o grafo é compactado.
+"""
+
+import hashlib
+import random
+
+_PRIMO = (1 << 61) - 1  # Primo de Mersenne usado no hash universal
+
+
+def _hash_base(chave):
+    """Hash estável de 64 bits (não depende de PYTHONHASHSEED)"""
+    return int.from_bytes(hashlib.blake2b(chave.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class IndiceMinHash:
+    """
+    Assinaturas MinHash das músicas com baldes LSH.
+
+    `num_hashes` = `bandas` x linhas por banda. Mais linhas por banda tornam
+    os baldes mais seletivos (menos candidatos, menor recall); mais bandas
+    fazem o contrário. Na consulta, `bandas_consultadas` limita quantas bandas
+    são usadas, trocando recall por latência sem reconstruir o índice.
+    """
+
+    def __init__(self, num_hashes=64, bandas=16, semente=42):
+        if num_hashes % bandas:
+            raise ValueError("num_hashes deve ser múltiplo de bandas.")
+        self.num_hashes = num_hashes
+        self.bandas = bandas
+        self.linhas_por_banda = num_hashes // bandas
+
+        aleatorio = random.Random(semente)
+        self._coeficientes = [
+            (aleatorio.randrange(1, _PRIMO), aleatorio.randrange(0, _PRIMO))
+            for _ in range(num_hashes)
+        ]
+
+        self.grafo = None
+        self.assinaturas = {}  # {musica_id: [mínimos]}
+        self._baldes = [{} for _ in range(bandas)]  # Por banda: {trecho da assinatura: {musica_id}}
+        self._desatualizado = False
+
+    # ---------- Assinaturas ----------
+
+    def _hashes(self, grafo, v):
+        """Os k hashes do vértice v, como vizinho de uma música"""
+        info = grafo.itens.get(v)
+        base = _hash_base(info["nome"] if info else f"#{v}")
+        return [(a * base + b) % _PRIMO for a, b in self._coeficientes]
+
+    def _assinatura(self, grafo, musica_id):
+        assinatura = [_PRIMO] * self.num_hashes
+        for w in grafo.obter_vizinhos(musica_id):
+            assinatura = [min(x, y) for x, y in zip(assinatura, self._hashes(grafo, w))]
+        return assinatura
+
+    def _trechos(self, assinatura):
+        r = self.linhas_por_banda
+        return [tuple(assinatura[i * r:(i + 1) * r]) for i in range(self.bandas)]
+
+    def _guardar(self, musica_id, assinatura):
+        """Troca a assinatura da música, movendo-a só nos baldes das bandas que mudaram"""
+        antiga = self.assinaturas.get(musica_id)
+        trechos_antigos = self._trechos(antiga) if antiga else [None] * self.bandas
+        for banda, (velho, novo) in enumerate(zip(trechos_antigos, self._trechos(assinatura))):
+            if velho == novo:
+                continue
+            baldes = self._baldes[banda]
+            if velho is not None:
+                baldes[velho].discard(musica_id)
+                if not baldes[velho]:
+                    del baldes[velho]
+            baldes.setdefault(novo, set()).add(musica_id)
+        self.assinaturas[musica_id] = assinatura
+
+    def _descartar(self, musica_id):
+        antiga = self.assinaturas.pop(musica_id, None)
+        if antiga is None:
+            return
+        for banda, trecho in enumerate(self._trechos(antiga)):
+            baldes = self._baldes[banda]
+            baldes[trecho].discard(musica_id)
+            if not baldes[trecho]:
+                del baldes[trecho]
+
+    def _recalcular(self, grafo, musica_id):
+        if grafo.grau(musica_id):
+            self._guardar(musica_id, self._assinatura(grafo, musica_id))
+        else:
+            self._descartar(musica_id)
+
+    def reconstruir(self, grafo=None):
+        """Recalcula todas as assinaturas a partir do grafo (O(m·k))"""
+        grafo = grafo or self.grafo
+        self.assinaturas = {}
+        self._baldes = [{} for _ in range(self.bandas)]
+        for musica_id in grafo.vertices_por_tipo.get("musica", ()):
+            if grafo.grau(musica_id):
+                self._guardar(musica_id, self._assinatura(grafo, musica_id))
+        self._desatualizado = False
+
+    def acompanhar(self, grafo):
+        """Indexa o grafo e passa a acompanhar suas mutações. Retorna o próprio índice."""
+        if self.grafo is not None:
+            self.grafo.remover_observador(self)
+        self.grafo = grafo
+        self.reconstruir(grafo)
+        grafo.adicionar_observador(self)
+        return self
+
+    # ---------- Observador do grafo ----------
+
+    @staticmethod
+    def _e_musica(grafo, v):
+        info = grafo.itens.get(v)
+        return info is not None and info["tipo"] == "musica"
+
+    def ao_inserir_aresta(self, grafo, v, w, peso):
+        if self._desatualizado:
+            return
+        for musica_id, vizinho in ((v, w), (w, v)):
+            if self._e_musica(grafo, musica_id):
+                atual = self.assinaturas.get(musica_id, [_PRIMO] * self.num_hashes)
+                self._guardar(musica_id, [min(x, y) for x, y in zip(atual, self._hashes(grafo, vizinho))])
+            if v == w:
+                break
+
+    def ao_remover_aresta(self, grafo, v, w):
+        if self._desatualizado:
+            return
+        for musica_id in {v, w}:
+            if self._e_musica(grafo, musica_id):
+                self._recalcular(grafo, musica_id)
+
+    def ao_remover_vertice(self, grafo, v, nome, vizinhos):
+        if self._desatualizado:
+            return
+        self._descartar(v)
+        for w in vizinhos:
+            if w != v and self._e_musica(grafo, w):
+                self._recalcular(grafo, w)
+
+    def ao_compactar(self, grafo, remapeamento):
+        if self._desatualizado:
+            return
+        self.assinaturas = {remapeamento[v]: assinatura for v, assinatura in self.assinaturas.items()}
+        self._baldes = [
+            {trecho: {remapeamento[v] for v in membros} for trecho, membros in baldes.items()}
+            for baldes in self._baldes
+        ]
+
+    def ao_recarregar(self, grafo):
+        self._desatualizado = True
+
+    # ---------- Consultas ----------
+
+    def candidatos(self, musica_id, bandas_consultadas=None):
+        """
+        Músicas que dividem um balde com musica_id nas primeiras
+        `bandas_consultadas` bandas (todas, se None).
+        """
+        if self._desatualizado:
+            self.reconstruir()
+        assinatura = self.assinaturas.get(musica_id)
+        if assinatura is None:
+            return set()
+
+        encontrados = set()
+        trechos = self._trechos(assinatura)[:bandas_consultadas or self.bandas]
+        for banda, trecho in enumerate(trechos):
+            encontrados |= self._baldes[banda].get(trecho, set())
+        encontrados.discard(musica_id)
+        return encontrados
+
+    def estimar_jaccard(self, v, w):
+        """Fração de posições iguais nas assinaturas (estimativa do Jaccard)"""
+        a, b = self.assinaturas.get(v), self.assinaturas.get(w)
+        if a is None or b is None:
+            return 0.0
+        return sum(1 for x, y in zip(a, b) if x == y) / self.num_hashes
@@ -0,0 +1,240 @@
+"""
+Projeção materializada das músicas: {id, nome, artistas, generos}.
+
+Os endpoints de músicas e de recomendação montavam esse registro a cada
+resposta, a partir dos vizinhos da música. Cada TGrafoND tem uma
+ProjecaoMusicas (grafo.projecao_musicas), registrada como observador:
+
+- inserir ou remover uma aresta descarta o registro das pontas que são
+  músicas, e remover um vértice descarta o das músicas vizinhas; o registro
+  é remontado em O(grau) na próxima leitura e depois lido em O(1). Assim uma
+  carga em lote não remonta a mesma música a cada aresta;
+- compactar ou recarregar o grafo muda os IDs e descarta tudo.
+
+Os registros devolvidos são compartilhados: quem os recebe não deve
+modificá-los. Para as listagens filtradas, a projeção também responde quais
+músicas têm um gênero ou artista (pelo nome, sem diferenciar maiúsculas),
+sem passar pelas músicas que não têm: cada nome consultado ganha uma lista
+ordenada de IDs, mantida a cada aresta inserida (e descartada numa remoção),
+e uma página começa por busca binária a partir do cursor. Só nomes que
+existem ganham lista, e as listas guardadas são limitadas (LRU) a tantos IDs
+quanto o catálogo tem músicas.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+
+TIPOS_FILTRO = ("artista", "genero")
+
+
+def _contem(ordenados, v):
+    i = bisect_left(ordenados, v)
+    return i < len(ordenados) and ordenados[i] == v
+
+
+class ProjecaoMusicas:
+    """Registros das músicas e índice nome -> vértices de artistas e gêneros"""
+
+    def __init__(self, grafo):
+        self.grafo = grafo
+        self._registros = {}  # {musica_id: (registro, ids dos artistas, ids dos gêneros)}
+        self._por_nome = None  # {tipo: {nome em minúsculas: {ids}}}; None = montar na próxima consulta
+        # {(tipo, nome em minúsculas): [IDs das músicas, em ordem]}, da menos para a mais recente
+        self._musicas_por_nome = OrderedDict()
+        self._ids_em_listas = 0  # Soma dos tamanhos das listas guardadas
+        self._trava_listas = threading.Lock()  # Leitores simultâneos atualizam o LRU
+
+    # ---------- Leitura ----------
+
+    def _materializar(self, musica_id):
+        entrada = self._registros.get(musica_id)
+        if entrada is not None:
+            return entrada
+        grafo = self.grafo
+        info = grafo.itens.get(musica_id)
+        if info is None or info["tipo"] != "musica":
+            return None
+        ids_artistas = sorted(grafo.vizinhos_do_tipo_sem_copia(musica_id, "artista"))
+        ids_generos = sorted(grafo.vizinhos_do_tipo_sem_copia(musica_id, "genero"))
+        registro = {
+            "id": musica_id,
+            "nome": info["nome"],
+            "artistas": [grafo.itens[i]["nome"] for i in ids_artistas],
+            "generos": [grafo.itens[i]["nome"] for i in ids_generos],
+        }
+        entrada = (registro, ids_artistas, ids_generos)
+        self._registros[musica_id] = entrada
+        return entrada
+
+    def registro(self, musica_id):
+        """{id, nome, artistas, generos} da música (nomes em ordem de ID), ou None"""
+        entrada = self._materializar(musica_id)
+        return entrada[0] if entrada is not None else None
+
+    def detalhe(self, musica_id):
+        """Como registro, mas com {id, nome} de cada artista e gênero, ou None"""
+        entrada = self._materializar(musica_id)
+        if entrada is None:
+            return None
+        registro, ids_artistas, ids_generos = entrada
+        return {
+            "id": musica_id,
+            "nome": registro["nome"],
+            "artistas": [{"id": i, "nome": nome} for i, nome in zip(ids_artistas, registro["artistas"])],
+            "generos": [{"id": i, "nome": nome} for i, nome in zip(ids_generos, registro["generos"])],
+        }
+
+    def _indice_nomes(self):
+        if self._por_nome is None:
+            # Montado à parte e publicado pronto, para leitores simultâneos
+            por_nome = {tipo: {} for tipo in TIPOS_FILTRO}
+            for tipo in TIPOS_FILTRO:
+                for v in self.grafo.vertices_por_tipo.get(tipo, ()):
+                    por_nome[tipo].setdefault(self.grafo.itens[v]["nome"].lower(), set()).add(v)
+            self._por_nome = por_nome
+        return self._por_nome
+
+    def vertices_com_nome(self, tipo, nome):
+        """IDs dos artistas/gêneros com esse nome (sem diferenciar maiúsculas); não modifique"""
+        return self._indice_nomes()[tipo].get(nome.lower(), frozenset())
+
+    def musicas_com(self, tipo, nome):
+        """IDs das músicas ligadas a algum artista/gênero com esse nome (sem diferenciar maiúsculas)"""
+        musicas = set()
+        for v in self.vertices_com_nome(tipo, nome):
+            musicas |= self.grafo.vizinhos_do_tipo_sem_copia(v, "musica")
+        return musicas
+
+    def _musicas_ordenadas(self, tipo, nome):
+        chave = (tipo, nome.lower())
+        with self._trava_listas:
+            musicas = self._musicas_por_nome.get(chave)
+            if musicas is not None:
+                self._musicas_por_nome.move_to_end(chave)
+                return musicas
+        if chave[1] not in self._indice_nomes()[tipo]:
+            return []  # Nome inexistente: não ocupa o cache
+        musicas = sorted(self.musicas_com(tipo, nome))
+        with self._trava_listas:
+            if chave not in self._musicas_por_nome:
+                self._musicas_por_nome[chave] = musicas
+                self._ids_em_listas += len(musicas)
+                self._limitar_listas()
+            return self._musicas_por_nome[chave]
+
+    def _limitar_listas(self):
+        # Descarta as listas menos usadas até caberem em um ID por música do
+        # catálogo (a mais recente fica, mesmo que sozinha passe disso)
+        limite = len(self.grafo.vertices_por_tipo.get("musica", ()))
+        while self._ids_em_listas > limite and len(self._musicas_por_nome) > 1:
+            _, musicas = self._musicas_por_nome.popitem(last=False)
+            self._ids_em_listas -= len(musicas)
+
+    def _descartar_lista(self, chave):
+        musicas = self._musicas_por_nome.pop(chave, None)
+        if musicas is not None:
+            self._ids_em_listas -= len(musicas)
+
+    def _limpar_listas(self):
+        self._musicas_por_nome = OrderedDict()
+        self._ids_em_listas = 0
+
+    def musicas_filtradas(self, genero=None, artista=None, apos=-1):
+        """
+        IDs das músicas com o gênero e o artista dados, maiores que `apos`, em
+        ordem crescente. Com filtros, só as músicas deles são visitadas: a
+        lista menor é percorrida por busca binária a partir do último ID
+        devolvido (o que também vale se o grafo mudar entre dois lotes do
+        streaming) e as outras só são consultadas.
+        """
+        if not genero and not artista:
+            yield from self.grafo.iterar_vertices("musica", apos)
+            return
+        filtros = [(tipo, nome) for tipo, nome in (("genero", genero), ("artista", artista)) if nome]
+        while True:
+            listas = sorted((self._musicas_ordenadas(tipo, nome) for tipo, nome in filtros), key=len)
+            menor = listas[0]
+            i = bisect_right(menor, apos)
+            if i == len(menor):
+                return
+            apos = menor[i]
+            if all(_contem(outra, apos) for outra in listas[1:]):
+                yield apos
+
+    def contar_musicas(self, genero=None, artista=None):
+        """Quantas músicas musicas_filtradas devolve sem cursor (O(1) com até um filtro)"""
+        if not genero and not artista:
+            return len(self.grafo.vertices_por_tipo.get("musica", ()))
+        listas = sorted((self._musicas_ordenadas(tipo, nome)
+                         for tipo, nome in (("genero", genero), ("artista", artista)) if nome), key=len)
+        if len(listas) == 1:
+            return len(listas[0])
+        return sum(1 for v in listas[0] if all(_contem(outra, v) for outra in listas[1:]))
+
+    # ---------- Observador do grafo ----------
+
+    def _indexar_nome(self, v, nome, tipo):
+        self._por_nome[tipo].setdefault(nome.lower(), set()).add(v)
+
+    def _descartar(self, vertices):
+        for v in vertices:
+            self._registros.pop(v, None)
+
+    def _filtro_e_musica(self, grafo, v, w):
+        """(chave do filtro, música) se a aresta v-w liga uma música a um artista/gênero, ou None"""
+        for filtro, musica in ((v, w), (w, v)):
+            info_filtro, info_musica = grafo.itens.get(filtro), grafo.itens.get(musica)
+            if (info_filtro is not None and info_musica is not None
+                    and info_filtro["tipo"] in TIPOS_FILTRO and info_musica["tipo"] == "musica"):
+                return (info_filtro["tipo"], info_filtro["nome"].lower()), musica
+        return None
+
+    def ao_inserir_vertice(self, grafo, v, nome, tipo):
+        if self._por_nome is not None and tipo in TIPOS_FILTRO:
+            self._indexar_nome(v, nome, tipo)
+
+    def ao_inserir_aresta(self, grafo, v, w, peso):
+        self._descartar((v, w))
+        par = self._filtro_e_musica(grafo, v, w)
+        if par is not None:
+            musicas = self._musicas_por_nome.get(par[0])
+            if musicas is not None and not _contem(musicas, par[1]):
+                insort(musicas, par[1])
+                self._ids_em_listas += 1
+
+    def ao_remover_aresta(self, grafo, v, w):
+        self._descartar((v, w))
+        par = self._filtro_e_musica(grafo, v, w)
+        if par is not None:
+            # A música pode continuar ligada a outro vértice com o mesmo nome: remonta na próxima consulta
+            self._descartar_lista(par[0])
+
+    def ao_remover_vertice(self, grafo, v, nome, vizinhos):
+        self._descartar([v, *vizinhos])
+        for tipo in TIPOS_FILTRO:
+            self._descartar_lista((tipo, nome.lower()))
+        for w in vizinhos:
+            info = grafo.itens.get(w)
+            if info is not None and info["tipo"] in TIPOS_FILTRO:
+                musicas = self._musicas_por_nome.get((info["tipo"], info["nome"].lower()))
+                if musicas is not None and _contem(musicas, v):
+                    musicas.pop(bisect_left(musicas, v))
+                    self._ids_em_listas -= 1
+        if self._por_nome is not None:
+            for por_nome in self._por_nome.values():
+                ids = por_nome.get(nome.lower())
+                if ids is not None:
+                    ids.discard(v)
+                    if not ids:
+                        del por_nome[nome.lower()]
+
+    def ao_compactar(self, grafo, remapeamento):
+        self._registros = {}
+        self._por_nome = None
+        self._limpar_listas()
+
+    def ao_recarregar(self, grafo):
+        self._registros = {}
+        self._por_nome = None
+        self._limpar_listas()
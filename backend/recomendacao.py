@@ -0,0 +1,598 @@
+"""
+Recomendação de músicas por similaridade de Jaccard no grafo.
+
+A similaridade entre duas músicas é |N(a) ∩ N(b)| / |N(a) ∪ N(b)|, onde N são
+os vizinhos (artistas, gêneros...) de cada uma. Também há versões que usam
+os pesos das arestas: Jaccard ponderado (Σ min / Σ max) e cosseno; as somas
+e normas de cada vértice são mantidas pelo grafo, então pontuar uma
+candidata custa só a sobreposição. Em vez de comparar a música
+base com todas as outras, os candidatos são gerados pelo índice invertido que
+o próprio grafo já é: a partir de cada vizinho da música base chega-se às
+músicas que o compartilham, contando as interseções no caminho. Só músicas
+com interseção não nula são pontuadas.
+
+Em catálogos muito grandes, os gêneros populares tornam essa vizinhança
+enorme; passando um minhash.IndiceMinHash, os candidatos vêm dos baldes LSH
+(aproximado) e só eles são pontuados com o Jaccard exato.
+
+Para processar o catálogo inteiro de uma vez (jobs em lote),
+similaridade_todos_pares calcula as interseções de todos os pares como um
+produto de matrizes esparsas (requer numpy e scipy).
+
+Sem uma música base (só com filtros de gênero/artista), a recomendação usa
+PageRank personalizado a partir dos vértices dos filtros, aproximado por
+"push" local: o custo depende da vizinhança alcançada, não do grafo inteiro.
+
+As recomendações aceitam um Prazo (orçamento de tempo). As candidatas são
+pontuadas da maior para a menor sobreposição com a música base, e a busca
+para cedo, ainda exata, quando nenhuma das restantes pode superar a última
+das top-n; se o prazo esgota antes, fica o melhor top-n até ali e
+prazo.estourou indica que o resultado foi truncado.
+"""
+
+import heapq
+import time
+from collections import deque
+
+from armazenamento import contar_bits
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+
+SIMILARIDADES = ("jaccard", "jaccard_ponderado", "cosseno")
+
+# Parte do orçamento para coletar as candidatas; o resto fica para ordená-las
+FRACAO_COLETA = 0.5
+
+
+class Prazo:
+    """
+    Orçamento de tempo de uma recomendação, em milissegundos (None = sem
+    limite). esgotado(custo) acumula o trabalho feito e só consulta o
+    relógio a cada `intervalo` unidades; depois que o prazo esgota,
+    `estourou` fica True e o resultado deve ser tratado como truncado.
+    """
+
+    def __init__(self, orcamento_ms=None, intervalo=64):
+        self.limite = None if orcamento_ms is None else time.monotonic() + orcamento_ms / 1000
+        self.intervalo = intervalo
+        self.estourou = False
+        self._trabalho = 0
+        self._proxima_consulta = 0
+
+    def esgotado(self, custo=1):
+        if self.limite is None:
+            return False
+        if not self.estourou:
+            self._trabalho += custo
+            if self._trabalho >= self._proxima_consulta:
+                self._proxima_consulta = self._trabalho + self.intervalo
+                self.estourou = time.monotonic() >= self.limite
+        return self.estourou
+
+    def etapa(self, fracao):
+        """
+        Prazo para uma etapa que deve deixar parte do orçamento às seguintes
+        (gerar as candidatas e depois ordená-las): esgota depois de `fracao`
+        do tempo que ainda resta. Quem a usa repassa o estouro para este prazo.
+        """
+        etapa = Prazo(intervalo=self.intervalo)
+        if self.limite is not None:
+            agora = time.monotonic()
+            etapa.limite = agora + max(self.limite - agora, 0) * fracao
+        return etapa
+
+
+def _sem_prazo(prazo):
+    return prazo if prazo is not None else Prazo()
+
+
+def _contribuicao(similaridade, peso_base, peso_outra):
+    """Parcela de um vizinho em comum na sobreposição de cada similaridade"""
+    if similaridade == "jaccard":
+        return 1
+    if similaridade == "jaccard_ponderado":
+        return min(peso_base, peso_outra)
+    return peso_base * peso_outra  # Cosseno: produto escalar
+
+
+def jaccard_bits(a, b):
+    """Jaccard entre dois mapas de bits de vizinhança, por popcount"""
+    uniao = contar_bits(a | b)
+    return contar_bits(a & b) / uniao if uniao else 0.0
+
+
+def _intersecoes_bitset(grafo, musica_id, prazo):
+    """
+    contar_intersecoes para o Jaccard no modo "bitset": os candidatos são o
+    OR dos mapas dos vizinhos e cada interseção é um & contado por popcount,
+    uma operação por candidata em vez de uma por par (vizinho, candidata).
+    """
+    base = grafo.vizinhos_bitset(musica_id)
+    alcancados = 0
+    for vizinho in grafo.obter_vizinhos(musica_id):
+        if vizinho != musica_id:
+            alcancados |= grafo.vizinhos_bitset(vizinho)
+            if prazo.esgotado():
+                break
+
+    musicas = grafo.vertices_por_tipo.get("musica", set())
+    bits = grafo.vizinhos_bitset
+    intersecoes = {}
+    binario = bin(alcancados)[:1:-1]  # Bit 0 primeiro
+    outra = binario.find("1")
+    while outra != -1:
+        if outra != musica_id and outra in musicas:
+            intersecoes[outra] = contar_bits(base & bits(outra))
+            if prazo.esgotado():
+                break
+        outra = binario.find("1", outra + 1)
+    return intersecoes
+
+
+def contar_intersecoes(grafo, musica_id, similaridade="jaccard", prazo=None):
+    """
+    {outra música: sobreposição com musica_id}, percorrendo só os vizinhos.
+    A sobreposição é o nº de vizinhos em comum (jaccard), Σ min dos pesos
+    (jaccard_ponderado) ou Σ produto dos pesos (cosseno).
+
+    Com prazo, os vizinhos são percorridos do menos para o mais popular (os
+    mais seletivos primeiro) e a contagem para quando o prazo esgota.
+    """
+    prazo = _sem_prazo(prazo)
+    if similaridade == "jaccard" and grafo.usa_bitsets:
+        return _intersecoes_bitset(grafo, musica_id, prazo)
+
+    arestas = grafo.obter_arestas(musica_id)
+    if prazo.limite is not None:
+        arestas = sorted(arestas, key=lambda aresta: grafo.grau_do_tipo(aresta[0], "musica"))
+
+    # Só as similaridades ponderadas consultam o peso de cada aresta
+    ponderada = similaridade != "jaccard"
+    intersecoes = {}
+    for vizinho, peso_base in arestas:
+        if vizinho == musica_id:
+            continue
+        for outra in grafo.vizinhos_do_tipo_sem_copia(vizinho, "musica"):
+            if outra != musica_id:
+                if ponderada:
+                    parcela = _contribuicao(similaridade, peso_base, grafo.peso_aresta(outra, vizinho))
+                else:
+                    parcela = 1
+                intersecoes[outra] = intersecoes.get(outra, 0) + parcela
+                if prazo.esgotado():
+                    return intersecoes
+    return intersecoes
+
+
+def intersecoes_candidatos_lsh(grafo, musica_id, indice_lsh, bandas_consultadas=None, similaridade="jaccard",
+                               prazo=None):
+    """Como contar_intersecoes, mas só para os candidatos do índice LSH"""
+    prazo = _sem_prazo(prazo)
+    candidatos = indice_lsh.candidatos(musica_id, bandas_consultadas)
+    intersecoes = {}
+    if similaridade == "jaccard":
+        # No modo "bitset" a interseção é um popcount sobre os mapas já
+        # guardados; nos outros, montar o mapa custaria O(grau) por candidata,
+        # então a interseção é entre os sets de vizinhos
+        if grafo.usa_bitsets:
+            base, vizinhos, contar = grafo.vizinhos_bitset(musica_id), grafo.vizinhos_bitset, contar_bits
+        else:
+            base, vizinhos, contar = grafo.obter_vizinhos(musica_id), grafo.obter_vizinhos, len
+        for outra in candidatos:
+            comuns = contar(base & vizinhos(outra))
+            if comuns:
+                intersecoes[outra] = comuns
+            if prazo.esgotado():
+                break
+        return intersecoes
+
+    arestas_base = grafo.obter_arestas(musica_id)
+    for outra in candidatos:
+        sobreposicao = 0
+        for vizinho, peso_base in arestas_base:
+            peso_outra = grafo.peso_aresta(outra, vizinho)
+            if peso_outra > 0:
+                sobreposicao += _contribuicao(similaridade, peso_base, peso_outra)
+        if sobreposicao:
+            intersecoes[outra] = sobreposicao
+        if prazo.esgotado(len(arestas_base)):
+            break
+    return intersecoes
+
+
+def _pontuar(grafo, similaridade, base, outra, sobreposicao):
+    """Score a partir da sobreposição e das normas mantidas pelo grafo (sem reler as linhas)"""
+    if similaridade == "jaccard":
+        # |A ∪ B| = |A| + |B| - |A ∩ B|
+        return sobreposicao / (grafo.grau(base) + grafo.grau(outra) - sobreposicao)
+    if similaridade == "jaccard_ponderado":
+        # Σ max = Σ A + Σ B - Σ min
+        return sobreposicao / (grafo.soma_pesos(base) + grafo.soma_pesos(outra) - sobreposicao)
+    return sobreposicao / (grafo.norma_pesos(base) * grafo.norma_pesos(outra))
+
+
+def _limite_superior(grafo, similaridade, base):
+    """
+    Função sobreposição -> maior score possível com ela, ou None se não há
+    limite útil. No Jaccard, |B| >= |A ∩ B| dá score <= |A ∩ B| / |A|; no
+    ponderado, Σ B >= Σ min dá score <= Σ min / Σ A.
+    """
+    if similaridade == "jaccard":
+        total = grafo.grau(base)
+    elif similaridade == "jaccard_ponderado":
+        total = grafo.soma_pesos(base)
+    else:
+        return None
+    return lambda sobreposicao: sobreposicao / total
+
+
+def _melhores_por_prioridade(intersecoes, top_n, pontuar, limite_superior, prazo):
+    """
+    Top-n [(score, id)] (maior score primeiro, empate pelo menor ID),
+    pontuando as candidatas da maior para a menor sobreposição.
+
+    Para quando o limite superior da próxima candidata fica abaixo do n-ésimo
+    score (nenhuma restante entra, então o resultado é exato) ou quando o
+    prazo esgota depois de já haver n candidatas pontuadas.
+    """
+    if top_n <= 0:
+        return []
+    fila = [(-sobreposicao, x) for x, sobreposicao in intersecoes.items()]
+    heapq.heapify(fila)
+
+    melhores = []  # Heap de (score, -id): a pior das top-n fica no topo
+    while fila:
+        cheio = len(melhores) >= top_n
+        if cheio and prazo.esgotado():
+            break
+        negativo, x = heapq.heappop(fila)
+        # A folga cobre arredondamentos, para não descartar um empate
+        if cheio and limite_superior is not None and limite_superior(-negativo) + 1e-12 < melhores[0][0]:
+            break
+        item = (pontuar(x, -negativo), -x)
+        if not cheio:
+            heapq.heappush(melhores, item)
+        elif item > melhores[0]:
+            heapq.heapreplace(melhores, item)
+
+    return [(score, -negativo_id) for score, negativo_id in sorted(melhores, reverse=True)]
+
+
+def _calcular_recomendacoes(grafo, musica_base_id, top_n, indice_lsh, bandas_consultadas, similaridade,
+                            prazo=None):
+    """Retorna (recomendações, vértices dos quais elas dependem) para o cache"""
+    prazo = _sem_prazo(prazo)
+    # Ordenar as candidatas custa o mesmo por candidata que coletá-las
+    coleta = prazo.etapa(FRACAO_COLETA)
+    if indice_lsh is None:
+        intersecoes = contar_intersecoes(grafo, musica_base_id, similaridade, coleta)
+    else:
+        intersecoes = intersecoes_candidatos_lsh(grafo, musica_base_id, indice_lsh, bandas_consultadas,
+                                                 similaridade, coleta)
+
+    def pontuar(musica_id, sobreposicao):
+        return _pontuar(grafo, similaridade, musica_base_id, musica_id, sobreposicao)
+
+    melhores = _melhores_por_prioridade(intersecoes, top_n, pontuar,
+                                        _limite_superior(grafo, similaridade, musica_base_id), prazo)
+    prazo.estourou = prazo.estourou or coleta.estourou
+    resultado = [(grafo.get_nome_item(musica_id), score) for score, musica_id in melhores]
+
+    if prazo.estourou or indice_lsh is not None:
+        # Truncado não vai para o cache; com LSH, os baldes mudam com qualquer mutação (invalida por versão)
+        return resultado, None
+
+    # O resultado só muda se uma aresta tocar a música base, um vizinho dela
+    # (interseções) ou um candidato pontuado (grau/normas)
+    dependencias = {musica_base_id} | grafo.obter_vizinhos(musica_base_id) | intersecoes.keys()
+    return resultado, dependencias
+
+
+def similares(grafo, musica_id, top_n=5, similaridade="jaccard"):
+    """Top-n [(nome, score)] parecidas com a música musica_id, sem cache nem mensagens"""
+    if not grafo.grau(musica_id):
+        return []
+    return _calcular_recomendacoes(grafo, musica_id, top_n, None, None, similaridade)[0]
+
+
+def recomendar_musicas(grafo, nome_musica_base, top_n = 5, indice_lsh=None, bandas_consultadas=None,
+                       usar_cache=True, similaridade="jaccard", prazo=None):
+    # Recomendacao de musicas baseada no teorema de Jaccard
+    # (ou, com similaridade="jaccard_ponderado"/"cosseno", nos pesos das arestas)
+    # Com indice_lsh, os candidatos são aproximados; bandas_consultadas
+    # (menos bandas = mais rápido, menor recall) ajusta o compromisso.
+    # Com um Prazo, devolve o melhor top-n calculado até ele esgotar
+    # (prazo.estourou diz se o resultado foi truncado).
+    # Os resultados exatos ficam em grafo.cache_recomendacoes (veja cache.py)
+
+    if similaridade not in SIMILARIDADES:
+        raise ValueError(f"Similaridade inválida: '{similaridade}'.")
+
+    if nome_musica_base not in grafo.itens_reverso:
+        print(f" Erro: Musica '{nome_musica_base}' não encontrada")
+        return []
+    
+    musica_base_id = grafo.itens_reverso[nome_musica_base]
+
+    if grafo.itens[musica_base_id]["tipo"] != "musica":
+        print(f"Erro '{nome_musica_base}' não é uma música")
+        return []
+    
+    if not grafo.grau(musica_base_id):
+        print(f"Música '{nome_musica_base}' não tem conexões")
+        return []
+
+    prazo = _sem_prazo(prazo)
+
+    def calcular():
+        return _calcular_recomendacoes(grafo, musica_base_id, top_n, indice_lsh, bandas_consultadas,
+                                       similaridade, prazo)
+
+    if not usar_cache:
+        return calcular()[0]
+
+    algoritmo = (similaridade,) if indice_lsh is None else (similaridade, "lsh", bandas_consultadas)
+    chave = (nome_musica_base, top_n, algoritmo)
+    cache = grafo.cache_recomendacoes
+    resultado = cache.consultar(grafo, chave)
+    if resultado is None:
+        versao = grafo.versao
+        resultado, dependencias = calcular()
+        if not prazo.estourou:  # Resultado truncado não vai para o cache
+            cache.guardar(grafo, chave, resultado, dependencias, versao)
+    return list(resultado)
+
+
+def recomendar_para_playlist(grafo, nomes_musicas, top_n=10, prazo=None):
+    """
+    Músicas parecidas com uma playlist inteira, em uma única passada.
+
+    A playlist vira um perfil ponderado: cada vizinho h (artista, gênero...)
+    pesa p_h = c_h / S, onde c_h é quantas das S músicas base o têm. Cada
+    candidata x é comparada ao perfil pelo Jaccard ponderado
+    Σ min / Σ max = A / (grau(x) + P - A), com A = soma de p_h sobre os
+    vizinhos de x e P = soma de todos os p_h. Cada vizinho compartilhado é
+    percorrido uma vez só, por mais músicas base que o tenham, e o top-k sai
+    de um heap limitado. Como A <= grau(x), o score é no máximo A / P, o
+    que permite parar cedo ao pontuar da maior para a menor sobreposição.
+
+    Retorna ([(musica_id, score)], nomes ignorados por não serem músicas do grafo).
+    """
+    prazo = _sem_prazo(prazo)
+    sementes = []
+    ignorados = []
+    for nome in dict.fromkeys(nomes_musicas):  # Sem repetidos, na ordem original
+        v = grafo.itens_reverso.get(nome)
+        if v is None or grafo.itens[v]["tipo"] != "musica":
+            ignorados.append(nome)
+        else:
+            sementes.append(v)
+    if not sementes:
+        return [], ignorados
+
+    contagem = {}
+    for v in sementes:
+        for h in grafo.obter_vizinhos(v):
+            contagem[h] = contagem.get(h, 0) + 1
+    perfil = {h: c / len(sementes) for h, c in contagem.items()}
+    total_perfil = sum(perfil.values())
+
+    hubs = list(perfil)
+    if prazo.limite is not None:
+        hubs.sort(key=lambda h: grafo.grau_do_tipo(h, "musica"))
+
+    conjunto_sementes = set(sementes)
+    coleta = prazo.etapa(FRACAO_COLETA)
+    acumulado = {}
+    for h in hubs:
+        peso = perfil[h]
+        for x in grafo.vizinhos_do_tipo_sem_copia(h, "musica"):
+            if x not in conjunto_sementes:
+                acumulado[x] = acumulado.get(x, 0.0) + peso
+                if coleta.esgotado():
+                    break
+        if coleta.estourou:
+            break
+
+    def pontuar(x, a):
+        return a / (grafo.grau(x) + total_perfil - a)
+
+    melhores = _melhores_por_prioridade(acumulado, top_n, pontuar, lambda a: a / total_perfil, prazo)
+    prazo.estourou = prazo.estourou or coleta.estourou
+    return [(x, score) for score, x in melhores], ignorados
+
+
+def pagerank_personalizado(grafo, sementes, alfa=0.15, epsilon=1e-4, prazo=None):
+    """
+    PageRank personalizado (passeio aleatório com reinício em `sementes`)
+    pelo método de push local (Andersen, Chung e Lang).
+
+    Cada vértice guarda uma estimativa p e um resíduo r; um vértice com
+    r >= epsilon * grau é "empurrado": alfa * r vai para p e o resto é
+    dividido entre os vizinhos, proporcionalmente ao peso das arestas. Ao
+    final, |PPR(v) - p(v)| <= epsilon * grau(v), e o número de pushes é
+    O(1 / (epsilon * alfa)), independente do tamanho do grafo.
+
+    Retorna {vertice: score}, com score = p + alfa * r (o resíduo que ainda
+    estava parado no vértice também conta, o que mantém o mesmo limite).
+    Se o prazo esgota, o push em andamento para no meio (a parte ainda não
+    distribuída volta para o resíduo do vértice) e o limite deixa de valer:
+    o resultado é a estimativa até ali.
+    """
+    prazo = _sem_prazo(prazo)
+    sementes = list(sementes)
+    if not sementes:
+        return {}
+
+    estimativa = {}
+    residuo = {s: 1.0 / len(sementes) for s in sementes}
+    fila = deque(residuo)
+    na_fila = set(fila)
+
+    while fila and not prazo.estourou:
+        u = fila.popleft()
+        na_fila.discard(u)
+        r = residuo.pop(u, 0.0)
+        arestas = grafo.obter_arestas(u)
+        estimativa[u] = estimativa.get(u, 0.0) + alfa * r
+        if not arestas:
+            estimativa[u] += (1 - alfa) * r  # Sem vizinhos o passeio só pode reiniciar
+            continue
+
+        soma_pesos = sum(peso for _, peso in arestas)
+        distribuido = 0.0
+        for w, peso in arestas:
+            residuo[w] = residuo.get(w, 0.0) + (1 - alfa) * r * peso / soma_pesos
+            if w not in na_fila and residuo[w] >= epsilon * grafo.grau(w):
+                fila.append(w)
+                na_fila.add(w)
+            # Um hub (gênero popular) tem muitas arestas: o prazo vale dentro do push
+            distribuido += peso
+            if prazo.esgotado():
+                restante = (1 - alfa) * r * (1 - distribuido / soma_pesos)
+                if restante > 0:
+                    residuo[u] = residuo.get(u, 0.0) + restante
+                break
+
+    scores = dict(estimativa)
+    for v, r in residuo.items():
+        scores[v] = scores.get(v, 0.0) + alfa * r
+    return scores
+
+
+def recomendar_por_filtros(grafo, genero=None, artista=None, limite=10, alfa=0.15, epsilon=1e-4, prazo=None):
+    """
+    Músicas mais relevantes para um gênero e/ou artista, por PageRank
+    personalizado semeado nesses vértices. Os nomes não diferenciam
+    maiúsculas e valem todos os vértices com o nome (como na listagem de
+    músicas): só músicas ligadas a algum vértice de cada filtro informado são
+    ranqueadas. Sem filtros, a semente são todos os gêneros (popularidade
+    geral no grafo).
+
+    Retorna [(musica_id, score)] com score normalizado para o maior = 1.0.
+    """
+    filtros = []  # Vértices de cada filtro, pelo índice de nomes da projeção
+    for nome, tipo in ((genero, "genero"), (artista, "artista")):
+        if nome:
+            vertices = grafo.projecao_musicas.vertices_com_nome(tipo, nome)
+            if not vertices:
+                return []  # Nenhuma música passa por um filtro inexistente
+            filtros.append(vertices)
+
+    prazo = _sem_prazo(prazo)
+    sementes = [v for vertices in filtros for v in vertices] or grafo.vertices_por_tipo.get("genero", ())
+    coleta = prazo.etapa(FRACAO_COLETA)
+    scores = pagerank_personalizado(grafo, sementes, alfa, epsilon, coleta)
+    prazo.estourou = prazo.estourou or coleta.estourou
+
+    # Filtros antes do ranking: só entram músicas ligadas a todos eles. As
+    # candidatas saem da maior para a menor pontuação, então a busca para nas
+    # `limite` primeiras aceitas; as músicas recusadas contam no prazo
+    musicas = grafo.vertices_por_tipo.get("musica", set())
+    fila = [(-score, v) for v, score in scores.items() if score > 0 and v in musicas]
+    heapq.heapify(fila)
+    melhores = []
+    while fila and len(melhores) < limite:
+        negativo, v = heapq.heappop(fila)
+        if all(any(grafo.tem_aresta(v, f) for f in vertices) for vertices in filtros):
+            melhores.append((-negativo, v))
+        elif prazo.esgotado(sum(len(vertices) for vertices in filtros)):
+            break
+    if not melhores:
+        return []
+    maior = melhores[0][0]
+    return [(v, score / maior) for score, v in melhores]
+
+
+def matriz_incidencia(grafo):
+    """
+    Matriz esparsa CSR músicas x vértices, com 1 onde a música tem o vizinho.
+    Retorna (matriz, ids_musicas), onde a linha i é a música ids_musicas[i].
+    """
+    ids_musicas = sorted(grafo.vertices_por_tipo.get("musica", ()))
+    indptr = [0]
+    indices = []
+    for musica_id in ids_musicas:
+        indices.extend(sorted(grafo.obter_vizinhos(musica_id)))
+        indptr.append(len(indices))
+
+    dados = np.ones(len(indices), dtype=np.float32)
+    matriz = sparse.csr_matrix(
+        (dados, np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(ids_musicas), grafo.n)
+    )
+    return matriz, ids_musicas
+
+
+def _blocos_de_linhas(estimativas, max_nao_nulos, linhas_por_bloco):
+    """
+    (inicio, fim) de blocos consecutivos de linhas cuja soma das estimativas
+    não passa de max_nao_nulos (um bloco tem ao menos uma linha, mesmo que
+    ela sozinha passe) nem tem mais de linhas_por_bloco linhas
+    """
+    acumulado = np.cumsum(estimativas)
+    inicio = 0
+    while inicio < len(acumulado):
+        antes = acumulado[inicio - 1] if inicio else 0
+        fim = int(np.searchsorted(acumulado, antes + max_nao_nulos, side="right"))
+        fim = min(max(fim, inicio + 1), inicio + linhas_por_bloco)
+        yield inicio, fim
+        inicio = fim
+
+
+def similaridade_todos_pares(grafo, top_k=10, linhas_por_bloco=2048, max_nao_nulos=1 << 22):
+    """
+    Jaccard de todas as músicas contra todas, guardando as top_k de cada uma.
+
+    Com a matriz de incidência M, o produto M·Mᵀ dá as interseções e os graus
+    são as somas das linhas, então |A ∪ B| = grau(A) + grau(B) - |A ∩ B|. O
+    produto é feito em blocos de linhas para limitar a memória: a linha de
+    uma música no produto tem no máximo Σ (músicas de cada vizinho dela)
+    entradas não nulas, e cada bloco junta linhas até essa estimativa chegar
+    a max_nao_nulos (~12 bytes cada) ou a linhas_por_bloco linhas. Assim as
+    músicas de gêneros populares saem em blocos menores. Só pares com
+    interseção não nula aparecem no resultado, como em recomendar_musicas.
+
+    Retorna {musica_id: [(outra_id, score), ...]} em ordem decrescente de
+    score (empates pelo menor ID).
+    """
+    if sparse is None:
+        raise ImportError("similaridade_todos_pares requer numpy e scipy (pip install numpy scipy).")
+
+    matriz, ids_musicas = matriz_incidencia(grafo)
+    ids = np.asarray(ids_musicas, dtype=np.int64)
+    graus = np.diff(matriz.indptr).astype(np.float64)
+    transposta = matriz.T.tocsr()
+    musicas_por_vizinho = np.diff(transposta.indptr).astype(np.float64)
+    estimativas = np.minimum(matriz @ musicas_por_vizinho, len(ids_musicas))
+
+    resultado = {}
+    for inicio, fim in _blocos_de_linhas(estimativas, max_nao_nulos, linhas_por_bloco):
+        intersecoes = (matriz[inicio:fim] @ transposta).tocsr()
+
+        for linha in range(fim - inicio):
+            a, b = intersecoes.indptr[linha], intersecoes.indptr[linha + 1]
+            colunas = intersecoes.indices[a:b]
+            comuns = intersecoes.data[a:b].astype(np.float64)
+
+            outras = colunas != inicio + linha  # A própria música não conta
+            colunas, comuns = colunas[outras], comuns[outras]
+            scores = comuns / (graus[inicio + linha] + graus[colunas] - comuns)
+
+            if len(scores) > top_k:
+                # Pré-seleciona as top_k (mais os empatados com a última) em O(grau)
+                corte = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+                manter = scores >= corte
+                colunas, scores = colunas[manter], scores[manter]
+
+            # Ordena por score decrescente e, no empate, pelo menor ID
+            ordem = np.lexsort((ids[colunas], -scores))[:top_k]
+            resultado[ids_musicas[inicio + linha]] = [
+                (int(ids[colunas[i]]), float(scores[i])) for i in ordem
+            ]
+    return resultado
@@ -0,0 +1,215 @@
+"""
+Snapshot binário do grafo, para gravar e carregar sem parsing de texto.
+
+Layout do arquivo (little-endian, cada seção alinhada em 8 bytes):
+
+    cabeçalho      MAGICO, versão, tipo do grafo, n, m, entradas de adjacência,
+                   nº de tipos, bytes da tabela de tipos, bytes da tabela de nomes
+    tipos          offsets uint32[nº de tipos + 1] + textos UTF-8
+    tipo_vertice   uint16[n] com o índice na tabela de tipos (SEM_TIPO se o vértice não tem nome)
+    nomes          offsets uint64[n + 1] + textos UTF-8
+    offsets        uint64[n + 1]      (CSR: vizinhos de v ficam em [offsets[v], offsets[v+1]))
+    vizinhos       uint32[entradas]   (em ordem crescente dentro de cada vértice)
+    pesos          float64[entradas]
+
+A leitura (SnapshotCSR) usa mmap: as seções numéricas viram memoryviews
+sobre o arquivo, sem cópia, e o grafo pode responder consultas logo após abrir.
+
+Uso pela linha de comando (converte entre os formatos, pelo conteúdo da origem):
+
+    python snapshot.py Grafo.txt Grafo.amps
+    python snapshot.py Grafo.amps Grafo.txt
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+MAGICO = b"AMPS"
+VERSAO = 1
+SEM_TIPO = 0xFFFF
+
+_CABECALHO = struct.Struct("<4sHHQQQQQQ")
+
+
+def _preenchimento(tamanho):
+    """Bytes de preenchimento para alinhar a próxima seção em 8 bytes"""
+    return b"\0" * ((-tamanho) % 8)
+
+
+def _little_endian(valores):
+    if sys.byteorder != "little":
+        valores = array(valores.typecode, valores)
+        valores.byteswap()
+    return valores
+
+
+def e_snapshot(caminho):
+    """Indica se o arquivo começa com a assinatura do snapshot binário"""
+    with open(caminho, "rb") as f:
+        return f.read(len(MAGICO)) == MAGICO
+
+
+def gravar_snapshot(grafo, caminho):
+    """
+    Grava o grafo no formato binário. Vértices removidos não são gravados
+    (os IDs ficam contíguos, como em gravar_grafo_arquivo). A escrita vai
+    para um arquivo temporário que só substitui o destino quando completo.
+    """
+    vivos = list(grafo.vertices_existentes())
+    novo_id = {v: i for i, v in enumerate(vivos)}
+
+    tipos = []
+    indice_tipo = {}
+    tipo_vertice = array("H")
+    nomes_offsets = array("Q", [0])
+    nomes = bytearray()
+
+    offsets = array("Q", [0])
+    vizinhos = array("I")
+    pesos = array("d")
+
+    for v in vivos:
+        info = grafo.itens.get(v)
+        if info is None:
+            tipo_vertice.append(SEM_TIPO)
+        else:
+            tipo = info["tipo"]
+            if tipo not in indice_tipo:
+                indice_tipo[tipo] = len(tipos)
+                tipos.append(tipo)
+            tipo_vertice.append(indice_tipo[tipo])
+            nomes += info["nome"].encode("utf-8")
+        nomes_offsets.append(len(nomes))
+
+        for w, peso in sorted((novo_id[w], peso) for w, peso in grafo.obter_arestas(v)):
+            vizinhos.append(w)
+            pesos.append(peso)
+        offsets.append(len(vizinhos))
+
+    tipos_offsets = array("I", [0])
+    tipos_texto = bytearray()
+    for tipo in tipos:
+        tipos_texto += tipo.encode("utf-8")
+        tipos_offsets.append(len(tipos_texto))
+
+    secoes = [
+        _little_endian(tipos_offsets).tobytes(), bytes(tipos_texto),
+        _little_endian(tipo_vertice).tobytes(),
+        _little_endian(nomes_offsets).tobytes(), bytes(nomes),
+        _little_endian(offsets).tobytes(),
+        _little_endian(vizinhos).tobytes(),
+        _little_endian(pesos).tobytes(),
+    ]
+
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "wb") as f:
+        f.write(_CABECALHO.pack(
+            MAGICO, VERSAO, getattr(grafo, "tipo_grafo", 0), len(vivos), grafo.m,
+            len(vizinhos), len(tipos), len(tipos_texto), len(nomes)
+        ))
+        for secao in secoes:
+            f.write(secao)
+            f.write(_preenchimento(len(secao)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+class SnapshotCSR:
+    """Visão somente leitura de um snapshot binário mapeado em memória"""
+
+    def __init__(self, caminho):
+        with open(caminho, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        dados = memoryview(self._mmap)
+
+        if len(dados) < _CABECALHO.size:
+            raise ValueError("Snapshot inválido: arquivo truncado")
+        (magico, versao, self.tipo_grafo, self.n, self.m, entradas,
+         num_tipos, bytes_tipos, bytes_nomes) = _CABECALHO.unpack_from(dados, 0)
+        if magico != MAGICO:
+            raise ValueError("Arquivo não é um snapshot do Amplify")
+        if versao != VERSAO:
+            raise ValueError(f"Versão de snapshot não suportada: {versao}")
+
+        self._posicao = _CABECALHO.size
+        tipos_offsets = self._secao(dados, 4 * (num_tipos + 1), "I")
+        tipos_texto = self._secao(dados, bytes_tipos)
+        self._tipo_vertice = self._secao(dados, 2 * self.n, "H")
+        self._nomes_offsets = self._secao(dados, 8 * (self.n + 1), "Q")
+        self._nomes = self._secao(dados, bytes_nomes)
+        self._offsets = self._secao(dados, 8 * (self.n + 1), "Q")
+        self._vizinhos = self._secao(dados, 4 * entradas, "I")
+        self._pesos = self._secao(dados, 8 * entradas, "d")
+
+        # A tabela de tipos é pequena: decodifica uma vez só
+        self.tipos = [
+            str(tipos_texto[tipos_offsets[i]:tipos_offsets[i + 1]], "utf-8")
+            for i in range(num_tipos)
+        ]
+
+    def _secao(self, dados, tamanho, formato=None):
+        inicio = self._posicao
+        fim = inicio + tamanho
+        if fim > len(dados):
+            raise ValueError("Snapshot inválido: arquivo truncado")
+        self._posicao = fim + (-tamanho) % 8
+
+        visao = dados[inicio:fim]
+        if formato is None:
+            return visao
+        if sys.byteorder != "little":
+            valores = array(formato, visao.tobytes())
+            valores.byteswap()
+            return memoryview(valores)
+        return visao.cast(formato)
+
+    def vertices(self):
+        """Gera (indice, nome, tipo) de cada vértice com nome"""
+        nomes_offsets = self._nomes_offsets
+        for v in range(self.n):
+            indice_tipo = self._tipo_vertice[v]
+            if indice_tipo == SEM_TIPO:
+                continue
+            nome = str(self._nomes[nomes_offsets[v]:nomes_offsets[v + 1]], "utf-8")
+            yield v, nome, self.tipos[indice_tipo]
+
+    def grau(self, v):
+        return self._offsets[v + 1] - self._offsets[v]
+
+    def vizinhos(self, v):
+        return self._vizinhos[self._offsets[v]:self._offsets[v + 1]].tolist()
+
+    def arestas_de(self, v):
+        inicio, fim = self._offsets[v], self._offsets[v + 1]
+        return list(zip(self._vizinhos[inicio:fim].tolist(), self._pesos[inicio:fim].tolist()))
+
+    def peso(self, v, w):
+        inicio, fim = self._offsets[v], self._offsets[v + 1]
+        i = bisect_left(self._vizinhos, w, inicio, fim)
+        if i < fim and self._vizinhos[i] == w:
+            return self._pesos[i]
+        return 0.0
+
+
+def converter_arquivo(origem, destino):
+    """Converte entre Grafo.txt e snapshot binário; o sentido é decidido pelo conteúdo da origem"""
+    from grafoMatriz import TGrafoND
+
+    grafo = TGrafoND(modo="esparsa")
+    if e_snapshot(origem):
+        grafo.carregar_snapshot(origem)
+        return grafo.gravar_grafo_arquivo(destino)
+    grafo.arquivo_para_matriz_adjacencia(origem)
+    return grafo.gravar_snapshot(destino)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(" Uso: python snapshot.py <origem> <destino>")
+        sys.exit(1)
+    sys.exit(0 if converter_arquivo(sys.argv[1], sys.argv[2]) else 1)
@@ -0,0 +1,290 @@
+"""
+Tabela pré-calculada com as top-k recomendações de cada música.
+
+O cálculo é feito em lote, em paralelo: as músicas são divididas em blocos
+e cada processo de um ProcessPoolExecutor carrega o grafo uma vez (de
+preferência um snapshot binário, que é só mapeado) e calcula os seus blocos
+com recomendacao.similares. A API carrega a tabela ao iniciar e responde
+/api/recomendacoes/{musica_nome} em O(k).
+
+As músicas e recomendações são guardadas pelo nome, e o cabeçalho traz a
+impressão digital (TGrafoND.impressao_digital) do grafo de origem, que
+também não depende dos IDs. A API só usa a tabela depois de vincular() a
+um grafo com a mesma impressão, e só enquanto a versão dele não mudar: uma
+mutação qualquer pode mudar as top-k de outras músicas, então depois dela
+tudo é calculado na hora.
+
+Layout do arquivo (little-endian, seções alinhadas em 8 bytes):
+
+    cabeçalho      MAGICO, versão, k, nº de músicas, bytes da tabela de nomes, entradas,
+                   impressão digital do grafo
+    nomes          offsets uint64[nº de músicas + 1] + textos UTF-8
+    offsets        uint64[nº de músicas + 1]  (recomendações de i em [offsets[i], offsets[i+1]))
+    vizinhos       uint32[entradas]           (índice da música recomendada na tabela de nomes)
+    scores         float32[entradas]
+
+Uso pela linha de comando:
+
+    python tabela_vizinhos.py Grafo.amps Recomendacoes.ampk --k 10 --processos 8
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from grafoMatriz import TGrafoND
+from recomendacao import similares
+from snapshot import _little_endian, _preenchimento, e_snapshot
+
+MAGICO = b"AMPK"
+VERSAO = 2
+
+_CABECALHO = struct.Struct("<4sHHQQQQ")
+
+
+# ---------- Cálculo em lote ----------
+
+def _carregar_grafo(caminho_grafo):
+    grafo = TGrafoND(modo="esparsa")
+    grafo.verboso = False
+    if e_snapshot(caminho_grafo):
+        grafo.carregar_snapshot(caminho_grafo)
+    else:
+        grafo.arquivo_para_matriz_adjacencia(caminho_grafo)
+    return grafo
+
+
+_grafo_trabalhador = None  # Grafo carregado em cada processo do pool
+
+
+def _iniciar_trabalhador(caminho_grafo):
+    global _grafo_trabalhador
+    _grafo_trabalhador = _carregar_grafo(caminho_grafo)
+
+
+def _calcular_bloco(ids_musicas, k, grafo=None):
+    grafo = grafo or _grafo_trabalhador
+    return [(grafo.get_nome_item(v), similares(grafo, v, k)) for v in ids_musicas]
+
+
+def calcular_top_k(caminho_grafo, k=10, processos=None, tamanho_bloco=1024, grafo=None):
+    """
+    Calcula as top-k de todas as músicas do grafo em caminho_grafo (`grafo`,
+    se dado, é ele já carregado). Com processos=1 roda no próprio processo.
+    Retorna {nome: [(nome, score)]}.
+    """
+    grafo = grafo or _carregar_grafo(caminho_grafo)
+    ids_musicas = sorted(grafo.vertices_por_tipo.get("musica", ()))
+    blocos = [ids_musicas[i:i + tamanho_bloco] for i in range(0, len(ids_musicas), tamanho_bloco)]
+
+    tabela = {}
+    if processos == 1:
+        for bloco in blocos:
+            tabela.update(_calcular_bloco(bloco, k, grafo))
+        return tabela
+
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_trabalhador,
+                             initargs=(str(caminho_grafo),)) as executor:
+        for resultado in executor.map(_calcular_bloco, blocos, [k] * len(blocos)):
+            tabela.update(resultado)
+    return tabela
+
+
+# ---------- Arquivo ----------
+
+def gravar_tabela(tabela, caminho, k, impressao=0):
+    """
+    Grava {nome: [(nome, score)]} no formato binário (via arquivo temporário).
+    `impressao` é a impressão digital do grafo de onde a tabela veio.
+    """
+    nomes = list(tabela)
+    indice = {nome: i for i, nome in enumerate(nomes)}
+    for recomendacoes in tabela.values():
+        for nome, _ in recomendacoes:
+            if nome not in indice:  # Recomendada que não é chave (não deveria acontecer)
+                indice[nome] = len(nomes)
+                nomes.append(nome)
+
+    nomes_offsets = array("Q", [0])
+    nomes_texto = bytearray()
+    for nome in nomes:
+        nomes_texto += nome.encode("utf-8")
+        nomes_offsets.append(len(nomes_texto))
+
+    offsets = array("Q", [0])
+    vizinhos = array("I")
+    scores = array("f")
+    for nome in nomes:
+        for recomendada, score in tabela.get(nome, ()):
+            vizinhos.append(indice[recomendada])
+            scores.append(score)
+        offsets.append(len(vizinhos))
+
+    secoes = [
+        _little_endian(nomes_offsets).tobytes(), bytes(nomes_texto),
+        _little_endian(offsets).tobytes(),
+        _little_endian(vizinhos).tobytes(),
+        _little_endian(scores).tobytes(),
+    ]
+
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "wb") as f:
+        f.write(_CABECALHO.pack(MAGICO, VERSAO, k, len(nomes), len(nomes_texto), len(vizinhos), impressao))
+        for secao in secoes:
+            f.write(secao)
+            f.write(_preenchimento(len(secao)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+class TabelaVizinhos:
+    """Tabela de recomendações mapeada em memória; consultas em O(k)"""
+
+    def __init__(self, caminho):
+        with open(caminho, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        dados = memoryview(self._mmap)
+
+        if len(dados) < _CABECALHO.size:
+            raise ValueError("Tabela inválida: arquivo truncado")
+        magico, versao, self.k, num_nomes, bytes_nomes, entradas, self.impressao = _CABECALHO.unpack_from(dados, 0)
+        if magico != MAGICO:
+            raise ValueError("Arquivo não é uma tabela de recomendações do Amplify")
+        if versao != VERSAO:
+            raise ValueError(f"Versão de tabela não suportada: {versao}")
+
+        self._posicao = _CABECALHO.size
+        nomes_offsets = self._secao(dados, 8 * (num_nomes + 1), "Q")
+        nomes_texto = self._secao(dados, bytes_nomes)
+        self._offsets = self._secao(dados, 8 * (num_nomes + 1), "Q")
+        self._vizinhos = self._secao(dados, 4 * entradas, "I")
+        self._scores = self._secao(dados, 4 * entradas, "f")
+
+        # Os nomes são decodificados uma vez para o dicionário de busca
+        self.nomes = [
+            str(nomes_texto[nomes_offsets[i]:nomes_offsets[i + 1]], "utf-8")
+            for i in range(num_nomes)
+        ]
+        self._indice = {nome: i for i, nome in enumerate(self.nomes)}
+        self._grafo = None  # Grafo ao qual a tabela foi vinculada
+        self._alterados = set()  # Nomes cuja vizinhança mudou nele desde então
+
+    def _secao(self, dados, tamanho, formato=None):
+        inicio = self._posicao
+        fim = inicio + tamanho
+        if fim > len(dados):
+            raise ValueError("Tabela inválida: arquivo truncado")
+        self._posicao = fim + (-tamanho) % 8
+
+        visao = dados[inicio:fim]
+        if formato is None:
+            return visao
+        if sys.byteorder != "little":
+            valores = array(formato, visao.tobytes())
+            valores.byteswap()
+            return memoryview(valores)
+        return visao.cast(formato)
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def __contains__(self, nome):
+        return nome in self._indice
+
+    def vincular(self, grafo):
+        """
+        Confere se a tabela foi calculada a partir de `grafo` (mesma impressão
+        digital) e passa a acompanhar as mutações dele. Retorna False se é de
+        outro grafo (aí o vínculo anterior continua).
+        """
+        if grafo.impressao_digital() != self.impressao:
+            return False
+        if grafo is not self._grafo:
+            # O grafo anterior continua avisando a tabela (remover o observador
+            # de um grafo em uso por outra thread não é seguro); os avisos dele
+            # são ignorados
+            grafo.adicionar_observador(self)
+            self._grafo = grafo
+        self._alterados = set()
+        return True
+
+    # Observador do grafo vinculado: guarda os nomes dos vértices cuja
+    # vizinhança mudou (nomes, não IDs, para valer depois de compactar)
+    def _marcar(self, grafo, *vertices):
+        if grafo is self._grafo:
+            self._alterados.update(grafo.itens[v]["nome"] for v in vertices if v in grafo.itens)
+
+    def ao_inserir_vertice(self, grafo, v, nome, tipo):
+        if grafo is self._grafo:
+            self._alterados.add(nome)
+
+    def ao_inserir_aresta(self, grafo, v, w, peso):
+        self._marcar(grafo, v, w)
+
+    def ao_remover_aresta(self, grafo, v, w):
+        self._marcar(grafo, v, w)
+
+    def ao_remover_vertice(self, grafo, v, nome, vizinhos):
+        if grafo is self._grafo:
+            self._alterados.add(nome)
+            self._marcar(grafo, *vizinhos)
+
+    def ao_recarregar(self, grafo):
+        if grafo is self._grafo:
+            self._grafo = None
+
+    def consultar_para(self, grafo, nome, limite=None):
+        """
+        Como consultar, mas só se a tabela está vinculada a `grafo` e nem a
+        música nem as recomendadas a ela tiveram a vizinhança alterada desde
+        então (os scores delas estariam desatualizados). Músicas inseridas
+        depois do vínculo só aparecem nas recomendações ao reconstruir a tabela.
+        """
+        if grafo is not self._grafo or nome in self._alterados:
+            return None
+        recomendacoes = self.consultar(nome, limite)
+        if recomendacoes is None or any(outra in self._alterados for outra, _ in recomendacoes):
+            return None
+        return recomendacoes
+
+    def consultar(self, nome, limite=None):
+        """
+        [(nome, score)] pré-calculadas da música, ou None se ela não está na
+        tabela ou não tem recomendações guardadas (aí o cálculo ao vivo
+        decide, com as mensagens e o indicador de exatidão dele)
+        """
+        i = self._indice.get(nome)
+        if i is None:
+            return None
+        inicio, fim = self._offsets[i], self._offsets[i + 1]
+        if inicio == fim:
+            return None
+        if limite is not None:
+            fim = min(fim, inicio + limite)
+        return [(self.nomes[self._vizinhos[j]], self._scores[j]) for j in range(inicio, fim)]
+
+
+def construir_tabela(caminho_grafo, caminho_tabela, k=10, processos=None, tamanho_bloco=1024):
+    """Calcula e grava a tabela. Retorna quantas músicas ela tem."""
+    grafo = _carregar_grafo(caminho_grafo)
+    tabela = calcular_top_k(caminho_grafo, k, processos, tamanho_bloco, grafo=grafo)
+    gravar_tabela(tabela, caminho_tabela, k, grafo.impressao_digital())
+    return len(tabela)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-calcula as top-k recomendações de cada música.")
+    parser.add_argument("grafo", help="Grafo.txt ou snapshot binário (.amps)")
+    parser.add_argument("tabela", help="arquivo de saída")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--processos", type=int, default=None, help="padrão: nº de CPUs")
+    parser.add_argument("--bloco", type=int, default=1024, help="músicas por tarefa")
+    args = parser.parse_args()
+
+    total = construir_tabela(args.grafo, args.tabela, args.k, args.processos, args.bloco)
+    print(f" Tabela gravada em '{args.tabela}': {total} músicas, top-{args.k}")
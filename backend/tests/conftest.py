@@ -0,0 +1,31 @@
+import pytest
+
+from grafoMatriz import TGrafoND
+
+# Catálogo pequeno dos testes de recomendação: {música: (artista ou None, [gêneros])}
+CATALOGO = {
+    "Numb": ("Linkin Park", ["Rock"]),
+    "In The End": ("Linkin Park", ["Rock"]),
+    "Yellow": ("Coldplay", ["Pop"]),
+    "Clocks": ("Coldplay", ["Pop"]),
+}
+
+def montar_catalogo(musicas, modo="esparsa"):
+    """Grafo com cada música ligada ao seu artista e aos seus gêneros, na ordem do dicionário"""
+    grafo = TGrafoND(modo=modo)
+    grafo.verboso = False
+    for musica, (artista, generos) in musicas.items():
+        vizinhos = ([(artista, "artista")] if artista else []) + [(genero, "genero") for genero in generos]
+        ids = grafo.insereV_lote([(musica, "musica")] + vizinhos)
+        grafo.insereA_lote((ids[0], outro) for outro in ids[1:])
+    return grafo
+
+@pytest.fixture
+def catalogo():
+    """
+    Monta o catálogo: catalogo(extras, modo=...) acrescenta as músicas de
+    `extras` (ou troca as de mesmo nome) às de `base` (CATALOGO por padrão).
+    """
+    def montar(extras=None, modo="esparsa", base=CATALOGO):
+        return montar_catalogo({**base, **(extras or {})}, modo)
+    return montar
@@ -0,0 +1,333 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import api
+
+client = TestClient(api.app)
+
+def test_inicializar_dados_demo():
+    """
+    Testa se a demonstração monta o grafo completo em lote.
+    """
+    resposta = client.post("/api/demo/inicializar")
+
+    assert resposta.status_code == 200
+    detalhes = resposta.json()["detalhes"]
+    assert detalhes["vertices"] == 7 + 5 + 14
+    assert detalhes["arestas"] == 41
+    assert api.grafo.obter_vizinhos(api.grafo.itens_reverso["Hey Jude"]) == {
+        api.grafo.itens_reverso["The Beatles"],
+        api.grafo.itens_reverso["Rock"],
+        api.grafo.itens_reverso["Pop"],
+    }
+
+def test_salvar_e_carregar_binario(tmp_path):
+    """
+    Testa salvar e carregar o grafo pela API no formato binário.
+    """
+    client.post("/api/demo/inicializar")
+    caminho = str(tmp_path / "grafo.amps")
+
+    assert client.post("/api/grafo/salvar", params={"caminho": caminho, "formato": "binario"}).status_code == 200
+    client.post("/api/grafo/vertices", json={"nome": "Temporária", "tipo": "musica"})
+    resposta = client.post("/api/grafo/carregar", params={"caminho": caminho, "formato": "binario",
+                                                          "aguardar": True})
+
+    assert resposta.status_code == 202
+    assert resposta.json()["vertices"] == 26
+    assert "Temporária" not in api.grafo.itens_reverso
+    assert client.post("/api/grafo/salvar", params={"formato": "xml"}).status_code == 400
+
+def test_musicas_com_artistas_e_generos():
+    """
+    Testa a listagem e o detalhe de músicas pelos vizinhos de cada tipo.
+    """
+    client.post("/api/demo/inicializar")
+
+    resposta = client.get("/api/musicas", params={"genero": "progressive rock"})
+    assert resposta.status_code == 200
+    musicas = {m["nome"]: m for m in resposta.json()["musicas"]}
+    assert set(musicas) == {"Bohemian Rhapsody", "Wish You Were Here", "Comfortably Numb"}
+    assert musicas["Comfortably Numb"]["artistas"] == ["Pink Floyd"]
+    assert musicas["Comfortably Numb"]["generos"] == ["Rock", "Progressive Rock"]
+
+    detalhe = client.get(f"/api/musicas/{api.grafo.itens_reverso['Kashmir']}").json()
+    assert [a["nome"] for a in detalhe["artistas"]] == ["Led Zeppelin"]
+    assert [g["nome"] for g in detalhe["generos"]] == ["Rock", "Classic Rock"]
+
+def test_recomendacoes_por_filtros():
+    """
+    Testa se as recomendações por filtro respeitam o filtro e trazem scores reais.
+    """
+    client.post("/api/demo/inicializar")
+
+    resposta = client.post("/api/recomendacoes", json={"genero": "Pop", "limite": 3})
+    assert resposta.status_code == 200
+    recomendacoes = resposta.json()["recomendacoes"]
+    assert len(recomendacoes) == 3
+    assert all("Pop" in r["generos"] for r in recomendacoes)
+    scores = [r["score"] for r in recomendacoes]
+    assert scores == sorted(scores, reverse=True) and scores[0] == 1.0
+    assert resposta.json()["exato"] is True
+
+def test_recomendacoes_por_playlist():
+    """
+    Testa o endpoint de recomendações para uma lista de músicas base.
+    """
+    client.post("/api/demo/inicializar")
+
+    resposta = client.post("/api/recomendacoes/playlist",
+                           json={"musicas": ["Fix You", "Viva La Vida", "Inexistente"], "limite": 2})
+    assert resposta.status_code == 200
+    dados = resposta.json()
+    assert dados["ignoradas"] == ["Inexistente"]
+    assert dados["total"] == 2
+    assert dados["recomendacoes"][0]["nome"] == "Demons"
+
+def test_recomendacoes_da_tabela_pre_calculada(tmp_path, monkeypatch):
+    """
+    Testa se a API passa a responder pela tabela pré-calculada ao carregar o
+    grafo de onde ela veio, e se depois de uma mutação calcula na hora só as
+    músicas afetadas.
+    """
+    from tabela_vizinhos import construir_tabela
+
+    client.post("/api/demo/inicializar")
+    caminho = tmp_path / "grafo.amps"
+    api.grafo.gravar_snapshot(caminho)
+    construir_tabela(caminho, tmp_path / "tabela.ampk", k=5, processos=1)
+    monkeypatch.setattr(api, "CAMINHO_TABELA_RECOMENDACOES", str(tmp_path / "tabela.ampk"))
+    monkeypatch.setattr(api, "tabela_recomendacoes", None)
+    client.post("/api/grafo/carregar", params={"caminho": str(caminho), "formato": "binario",
+                                               "aguardar": True})
+
+    resposta = client.get("/api/recomendacoes/Fix You", params={"limite": 3}).json()
+    assert resposta["fonte"] == "tabela"
+    assert resposta["total"] == 3
+
+    client.post("/api/grafo/vertices", json={"nome": "Nova", "tipo": "musica"})
+    client.post("/api/grafo/arestas", json={"vertice1": "Nova", "vertice2": "Coldplay"})
+    resposta = client.get("/api/recomendacoes/Nova").json()
+    assert resposta["fonte"] == "ao_vivo"
+    assert resposta["recomendacoes"][0]["nome"] in ("Fix You", "Viva La Vida")
+    # A vizinhança de Fix You e das recomendadas a ela não mudou
+    assert client.get("/api/recomendacoes/Fix You", params={"limite": 3}).json()["fonte"] == "tabela"
+
+    client.post("/api/grafo/arestas", json={"vertice1": "Fix You", "vertice2": "Rock"})
+    assert client.get("/api/recomendacoes/Fix You", params={"limite": 3}).json()["fonte"] == "ao_vivo"
+
+def test_tabela_pre_calculada_sobrevive_a_troca_pelo_mesmo_catalogo(tmp_path, monkeypatch):
+    """
+    Testa se a troca do grafo por outro com o mesmo catálogo (como recarregar
+    a demonstração) continua respondendo pela tabela pré-calculada.
+    """
+    from tabela_vizinhos import TabelaVizinhos, construir_tabela
+
+    client.post("/api/demo/inicializar")
+    api.grafo.gravar_snapshot(tmp_path / "grafo.amps")
+    construir_tabela(tmp_path / "grafo.amps", tmp_path / "tabela.ampk", k=5, processos=1)
+    tabela = TabelaVizinhos(tmp_path / "tabela.ampk")
+    assert tabela.vincular(api.grafo)
+    monkeypatch.setattr(api, "tabela_recomendacoes", tabela)
+
+    client.post("/api/demo/inicializar")
+
+    assert api.tabela_recomendacoes is tabela
+    assert client.get("/api/recomendacoes/Fix You", params={"limite": 3}).json()["fonte"] == "tabela"
+
+def test_recomendacoes_com_orcamento_de_tempo():
+    """
+    Testa se os endpoints aceitam orcamento_ms e indicam se o resultado é exato.
+    """
+    client.post("/api/demo/inicializar")
+
+    truncada = client.get("/api/recomendacoes/Fix You", params={"limite": 3, "orcamento_ms": 0}).json()
+    assert truncada["exato"] is False and truncada["total"] <= 3
+    exata = client.get("/api/recomendacoes/Fix You", params={"limite": 3}).json()
+    assert exata["exato"] is True
+    # Com a resposta exata em cache, o orçamento não chega a ser usado
+    assert client.get("/api/recomendacoes/Fix You", params={"limite": 3, "orcamento_ms": 0}).json()["exato"]
+
+    resposta = client.post("/api/recomendacoes/playlist", json={"musicas": ["Fix You"], "orcamento_ms": 0})
+    assert resposta.json()["exato"] is False
+    resposta = client.post("/api/recomendacoes", json={"genero": "Pop", "orcamento_ms": 0})
+    assert resposta.json()["exato"] is False and resposta.json()["total"] > 0
+
+def test_listagens_paginadas_e_em_streaming():
+    """
+    Testa a paginação por cursor e o streaming NDJSON das listagens.
+    """
+    client.post("/api/demo/inicializar")
+    completa = client.get("/api/musicas").json()["musicas"]
+    assert [m["id"] for m in completa] == sorted(m["id"] for m in completa)
+
+    paginas, after = [], -1
+    while True:
+        resposta = client.get("/api/musicas", params={"limit": 4, "after": after}).json()
+        assert resposta["total"] == len(completa) and resposta["quantidade"] == len(resposta["musicas"])
+        paginas.extend(resposta["musicas"])
+        if resposta["proximo"] is None:
+            break
+        after = resposta["proximo"]
+    assert paginas == completa
+
+    resposta = client.get("/api/grafo/vertices", params={"tipo": "genero", "formato": "ndjson"})
+    assert resposta.headers["content-type"].startswith("application/x-ndjson")
+    generos = [json.loads(linha) for linha in resposta.text.splitlines()]
+    assert {g["nome"] for g in generos} >= {"Rock", "Pop"} and len(generos) == 5
+
+    resposta = client.get("/api/musicas", params={"genero": "rock", "artista": "Queen", "limit": 1}).json()
+    assert (resposta["total"], resposta["quantidade"]) == (2, 1)
+    assert client.get("/api/grafo/vertices", params={"tipo": "artista", "limit": 2}).json()["total"] == 7
+
+    geracao = client.get("/api/grafo/vertices", params={"limit": 2}).json()["geracao_ids"]
+    assert client.get("/api/grafo/vertices", params={"limit": 2, "geracao": geracao + 1}).status_code == 409
+    assert client.get("/api/musicas", params={"formato": "xml"}).status_code == 400
+
+def test_streaming_continua_no_grafo_do_inicio(monkeypatch):
+    """
+    Testa se uma listagem em streaming percorre só o grafo em uso quando
+    começou, mesmo que ele seja trocado entre dois lotes.
+    """
+    from grafoMatriz import TGrafoND
+
+    client.post("/api/demo/inicializar")
+    antigo = api.grafo
+    monkeypatch.setattr(api, "grafo", antigo)  # Restaura o grafo no fim do teste
+    registros = api._em_lotes_sob_leitura(api._registros_vertices(antigo, None, -1), tamanho_lote=4)
+    primeiros = [next(registros) for _ in range(4)]
+
+    novo = TGrafoND(modo=api.MODO_GRAFO)
+    novo.verboso = False
+    novo.insereV_lote([(f"Outro {i}", "musica") for i in range(40)])
+    api._substituir_grafo(novo)
+    assert api.grafo is novo
+
+    nomes = [registro["nome"] for registro in primeiros + list(registros)]
+    assert nomes == [antigo.itens[v]["nome"] for v in sorted(antigo.itens)]
+
+def test_mutacao_em_lote_json_e_ndjson():
+    """
+    Testa o endpoint de lote: vértices e arestas por nome ou ID, resultado
+    por item e uma única versão nova do grafo por lote.
+    """
+    client.post("/api/demo/inicializar")
+    versao = api.grafo.versao
+    coldplay = api.grafo.itens_reverso["Coldplay"]
+
+    resposta = client.post("/api/grafo/lote", json={
+        "vertices": [{"nome": "Yellow", "tipo": "musica"}, {"nome": "Fix You", "tipo": "musica"}],
+        "arestas": [{"vertice1": "Yellow", "vertice2": coldplay},
+                    {"vertice1": "Yellow", "vertice2": "Pop", "peso": 2.0},
+                    {"vertice1": "Fix You", "vertice2": "Coldplay"},
+                    {"vertice1": "Yellow", "vertice2": "Inexistente"},
+                    {"vertice1": "Yellow", "vertice2": "Rock", "peso": 0}],
+    })
+    assert resposta.status_code == 200
+    dados = resposta.json()
+    assert [v["status"] for v in dados["vertices"]] == ["criado", "existente"]
+    assert [a["status"] for a in dados["arestas"]] == ["criada", "criada", "existente", "erro", "erro"]
+    assert dados["resumo"] == {"vertices_criados": 1, "arestas_criadas": 2, "erros": 2}
+    assert api.grafo.versao == dados["versao_grafo"] == versao + 1
+    assert api.grafo.peso_aresta(api.grafo.itens_reverso["Yellow"], api.grafo.itens_reverso["Pop"]) == 2.0
+
+    linhas = [{"nome": "Clocks", "tipo": "musica"}, {"vertice1": "Clocks", "vertice2": "Coldplay"}]
+    resposta = client.post("/api/grafo/lote", content="\n".join(json.dumps(l) for l in linhas),
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert resposta.json()["resumo"] == {"vertices_criados": 1, "arestas_criadas": 1, "erros": 0}
+
+    resposta = client.post("/api/grafo/arestas", json={"vertice1": "Clocks", "vertice2": "Pop", "peso": -1})
+    assert resposta.status_code == 400 and "positivo" in resposta.json()["detail"]
+
+    resposta = client.post("/api/grafo/lote", content='{"nome": "Ok", "tipo": "musica"}\n[1, 2]',
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert resposta.status_code == 400 and "Linha 2" in resposta.json()["detail"]
+    assert "Ok" not in api.grafo.itens_reverso
+
+def test_carga_em_segundo_plano_troca_o_grafo_no_final(tmp_path):
+    """
+    Testa se a carga de arquivo roda em segundo plano, com o grafo antigo
+    respondendo até a troca, e se o status relata o andamento.
+    """
+    client.post("/api/demo/inicializar")
+    caminho = str(tmp_path / "Grafo.txt")
+    client.post("/api/grafo/salvar", params={"caminho": caminho})
+    client.post("/api/grafo/vertices", json={"nome": "Temporária", "tipo": "musica"})
+
+    resposta = client.post("/api/grafo/carregar", params={"caminho": caminho})
+    assert resposta.status_code == 202
+    assert resposta.json()["estado"] in ("carregando", "concluida")
+    assert api.carga_grafo.aguardar(5)
+
+    status = client.get("/api/grafo/carregar/status").json()
+    assert (status["estado"], status["vertices"], status["arestas"]) == ("concluida", 26, 41)
+    assert "Temporária" not in api.grafo.itens_reverso
+
+    assert client.post("/api/grafo/carregar", params={"caminho": str(tmp_path / "nao.txt")}).status_code == 404
+
+def test_importar_artista_consulta_o_spotify_fora_da_trava(monkeypatch):
+    """
+    Testa se a consulta ao Spotify acontece sem a trava de escrita e se só a
+    inserção do que voltou dela é feita sob a trava.
+    """
+    import main
+
+    client.post("/api/demo/inicializar")
+    estados = []
+
+    def baixar(nome):
+        estados.append(api.trava_grafo.estado()["escritor_ativo"])
+        return "Radiohead", ["Rock", "Art Rock"], ["Creep", "Karma Police"]
+
+    monkeypatch.setattr(main, "sp", object())
+    monkeypatch.setattr(main, "baixar_artista_spotify", baixar)
+    resposta = client.post("/api/spotify/importar-artista", json={"artista_nome": "radiohead"})
+
+    assert resposta.status_code == 200 and estados == [False]
+    assert resposta.json()["detalhes"]["novos_vertices"] == 4  # Artista, Art Rock e as duas músicas
+    creep = api.grafo.itens_reverso["Creep"]
+    assert {api.grafo.get_nome_item(v) for v in api.grafo.obter_vizinhos(creep)} == {"Radiohead", "Rock", "Art Rock"}
+
+def test_troca_do_grafo_com_diario_grava_o_snapshot_fora_da_trava(tmp_path, monkeypatch):
+    """
+    Testa se, com o diário ativo, a troca do grafo grava o snapshot do novo
+    grafo sem a trava de escrita, passa o diário para ele e deixa de usar a
+    tabela pré-calculada de outro catálogo.
+    """
+    from diario import recuperar_grafo
+    from grafoMatriz import TGrafoND
+    from tabela_vizinhos import TabelaVizinhos, construir_tabela
+
+    outro = TGrafoND()
+    outro.verboso = False
+    outro.insereA_lote([tuple(outro.insereV_lote([("Outra", "musica"), ("Outro Artista", "artista")]))])
+    outro.gravar_snapshot(tmp_path / "outro.amps")
+    construir_tabela(tmp_path / "outro.amps", tmp_path / "outro.ampk", k=5, processos=1)
+    tabela = TabelaVizinhos(tmp_path / "outro.ampk")
+    assert tabela.vincular(outro)
+
+    diario, snapshot = tmp_path / "grafo.diario", tmp_path / "grafo.amps"
+    monkeypatch.setattr(api, "CAMINHO_DIARIO", str(diario))
+    monkeypatch.setattr(api, "CAMINHO_SNAPSHOT", str(snapshot))
+    monkeypatch.setattr(api, "tabela_recomendacoes", tabela)
+    api.grafo.ativar_diario(diario)
+    client.post("/api/grafo/vertices", json={"nome": "Descartada", "tipo": "musica"})
+
+    gravar = TGrafoND.gravar_snapshot
+    estados = []
+
+    def gravar_registrando(grafo, caminho):
+        estados.append(api.trava_grafo.estado()["escritor_ativo"])
+        return gravar(grafo, caminho)
+
+    monkeypatch.setattr(TGrafoND, "gravar_snapshot", gravar_registrando)
+    client.post("/api/demo/inicializar")
+    client.post("/api/grafo/vertices", json={"nome": "Depois da troca", "tipo": "musica"})
+    api.grafo.desativar_diario()
+
+    assert estados == [False]
+    assert api.tabela_recomendacoes is None
+    recuperado = recuperar_grafo(snapshot, diario)
+    assert "Descartada" not in recuperado.itens_reverso
+    assert recuperado.num_vertices == 26 + 1 and "Depois da troca" in recuperado.itens_reverso
@@ -0,0 +1,59 @@
+from recomendacao import recomendar_musicas
+
+def test_versao_cresce_a_cada_mutacao(catalogo):
+    """
+    Testa se a versão do grafo avança em toda mutação e só nelas.
+    """
+    grafo = catalogo()
+    versao = grafo.versao
+    lp, cp = grafo.itens_reverso["Linkin Park"], grafo.itens_reverso["Coldplay"]
+    grafo.obter_vizinhos(lp)
+    assert grafo.versao == versao
+    grafo.insereA(lp, cp)
+    grafo.removeA(lp, cp)
+    assert grafo.versao == versao + 2
+
+def test_cache_invalida_so_a_vizinhanca_afetada(catalogo):
+    """
+    Testa acertos, falhas e a invalidação por vizinhança do cache de recomendações.
+    """
+    grafo = catalogo()
+    cache = grafo.cache_recomendacoes
+
+    assert recomendar_musicas(grafo, "Numb") == [("In The End", 1.0)]
+    assert recomendar_musicas(grafo, "Numb") == [("In The End", 1.0)]
+    assert recomendar_musicas(grafo, "Yellow") == [("Clocks", 1.0)]
+    assert (cache.acertos, cache.falhas) == (1, 2)
+
+    # Uma aresta longe das duas músicas não invalida nada
+    blue, dance = grafo.insereV_lote([("Blue", "musica"), ("Dance", "genero")])
+    grafo.insereA(blue, dance)
+    assert cache.estatisticas()["entradas"] == 2
+
+    # Clocks-Rock toca um vizinho de Numb e um candidato de Yellow
+    grafo.insereA(grafo.itens_reverso["Clocks"], grafo.itens_reverso["Rock"])
+    assert cache.estatisticas()["entradas"] == 0
+    assert recomendar_musicas(grafo, "Numb") == [("In The End", 1.0), ("Clocks", 0.25)]
+    assert cache.acertos == 1
+
+    assert recomendar_musicas(grafo, "Yellow") == [("Clocks", 2 / 3)]
+    grafo.removeV(grafo.itens_reverso["Clocks"])
+    assert recomendar_musicas(grafo, "Yellow") == []
+    assert cache.estatisticas()["invalidacoes"] >= 3
+
+def test_cache_lru_e_ttl(catalogo):
+    """
+    Testa os limites de quantidade (LRU) e de idade (TTL) do cache.
+    """
+    grafo = catalogo()
+    cache = grafo.cache_recomendacoes
+    cache.capacidade = 1
+
+    recomendar_musicas(grafo, "Numb")
+    recomendar_musicas(grafo, "Yellow")  # Expulsa Numb
+    recomendar_musicas(grafo, "Numb")
+    assert cache.acertos == 0
+
+    cache.ttl = 0
+    recomendar_musicas(grafo, "Numb")
+    assert cache.acertos == 0
@@ -0,0 +1,36 @@
+import asyncio
+import threading
+
+from coalescencia import ConsultasEmVoo
+
+def test_consultas_identicas_compartilham_o_calculo():
+    """
+    Testa se consultas simultâneas com a mesma chave rodam o cálculo uma vez
+    só, e se a chave é liberada quando ele termina.
+    """
+    consultas = ConsultasEmVoo()
+    liberar = threading.Event()
+    chamadas = []
+
+    def calcular(valor):
+        chamadas.append(valor)
+        liberar.wait(5)
+        return [valor]
+
+    async def cenario():
+        tarefas = [asyncio.ensure_future(consultas.executar("Numb", calcular, "Numb")) for _ in range(5)]
+        outra = asyncio.ensure_future(consultas.executar("Yellow", calcular, "Yellow"))
+        await asyncio.sleep(0.05)
+        liberar.set()
+        resultados = await asyncio.gather(*tarefas, outra)
+        depois = await consultas.executar("Numb", calcular, "Numb")
+        return resultados, depois
+
+    resultados, depois = asyncio.run(cenario())
+    assert resultados == [["Numb"]] * 5 + [["Yellow"]]
+    assert resultados[0] is resultados[4]
+    assert depois == ["Numb"]
+    assert sorted(chamadas) == ["Numb", "Numb", "Yellow"]
+
+    estatisticas = consultas.estatisticas()
+    assert (estatisticas["calculadas"], estatisticas["coalescidas"], estatisticas["em_andamento"]) == (3, 4, 0)
@@ -0,0 +1,51 @@
+import threading
+import time
+
+from concorrencia import TravaLeituraEscrita
+
+def _esperar(condicao):
+    limite = time.monotonic() + 5
+    while not condicao():
+        assert time.monotonic() < limite
+        time.sleep(0.001)
+
+def test_leitores_juntos_e_escritor_sozinho():
+    """
+    Testa se vários leitores entram juntos, se o escritor espera os leitores
+    saírem e se um escritor na fila barra a entrada de novos leitores.
+    """
+    trava = TravaLeituraEscrita()
+    eventos = []
+    juntos = threading.Barrier(2, timeout=5)  # Só passa com os dois leitores dentro
+    liberar = threading.Event()
+
+    def ler(nome, esperar=False):
+        with trava.leitura():
+            if esperar:
+                juntos.wait()
+                liberar.wait(5)
+            eventos.append(nome)
+
+    def escrever():
+        with trava.escrita():
+            eventos.append("escritor")
+
+    leitores = [threading.Thread(target=ler, args=(f"leitor{i}", True)) for i in range(2)]
+    for t in leitores:
+        t.start()
+    _esperar(lambda: trava.estado()["leitores"] == 2)
+
+    escritor = threading.Thread(target=escrever)
+    escritor.start()
+    _esperar(lambda: trava.estado()["escritores_esperando"] == 1)
+
+    tardio = threading.Thread(target=ler, args=("tardio",))
+    tardio.start()
+    time.sleep(0.05)
+    assert eventos == []  # Escritor esperando os leitores; o leitor tardio espera o escritor
+
+    liberar.set()
+    for t in leitores + [escritor, tardio]:
+        t.join(5)
+    assert eventos[2:] == ["escritor", "tardio"]
+    assert trava.estado() == {"leitores": 0, "escritor_ativo": False, "escritores_esperando": 0}
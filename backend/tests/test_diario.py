@@ -0,0 +1,160 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from diario import aplicar_diario, recuperar_grafo, segmentos_diario
+from grafoMatriz import TGrafoND
+
+def _arestas_por_nome(grafo):
+    return {
+        frozenset((grafo.get_nome_item(v), grafo.get_nome_item(w)))
+        for v in grafo.vertices_existentes()
+        for w in grafo.obter_vizinhos(v)
+    }
+
+def _montar_catalogo(grafo):
+    ids = grafo.insereV_lote([("Rock", "genero"), ("Queen", "artista"),
+                              ("Bohemian Rhapsody", "musica"), ("We Will Rock You", "musica")])
+    grafo.insereA_lote([(ids[2], ids[0]), (ids[2], ids[1]), (ids[3], ids[0]), (ids[3], ids[1], 2.0)])
+    return ids
+
+def test_diario_recupera_mutacoes(tmp_path):
+    """
+    Testa se as mutações registradas no diário reconstroem o grafo.
+    """
+    # 1. Preparação
+    caminho = tmp_path / "grafo.diario"
+    grafo = TGrafoND(modo="esparsa")
+    grafo.ativar_diario(caminho)
+
+    # 2. Ação
+    _montar_catalogo(grafo)
+    grafo.removeA(3, 0)
+    grafo.removeV(0)  # Compacta: IDs mudam, mas o diário usa nomes
+    nova = grafo.insereV("Radio Ga Ga", "musica")
+    grafo.insereA(nova, grafo.itens_reverso["Queen"])
+    grafo.desativar_diario()
+
+    # 3. Verificação
+    recuperado = recuperar_grafo(tmp_path / "nao_existe.amps", caminho)
+    assert set(recuperado.itens_reverso) == set(grafo.itens_reverso)
+    assert recuperado.m == grafo.m == 3
+    assert _arestas_por_nome(recuperado) == _arestas_por_nome(grafo)
+
+def test_diario_ignora_linha_incompleta(tmp_path):
+    """
+    Testa se uma escrita interrompida no fim do diário é descartada.
+    """
+    caminho = tmp_path / "grafo.diario"
+    caminho.write_text(
+        json.dumps({"op": "insereV", "nome": "Queen", "tipo": "artista"}) + "\n"
+        + '{"op": "insereV", "nome": "Ro'
+    )
+
+    grafo = TGrafoND(modo="esparsa")
+    assert aplicar_diario(grafo, caminho) == 1
+    assert list(grafo.itens_reverso) == ["Queen"]
+
+def test_checkpoint_incorpora_diario_ao_snapshot(tmp_path):
+    """
+    Testa o checkpoint: o diário vira snapshot e as mutações seguintes
+    continuam sendo registradas em um segmento novo.
+    """
+    # 1. Preparação
+    caminho = tmp_path / "grafo.diario"
+    snapshot = tmp_path / "grafo.amps"
+    grafo = TGrafoND(modo="esparsa")
+    diario = grafo.ativar_diario(caminho, fsync_a_cada=2)
+    _montar_catalogo(grafo)
+
+    # 2. Ação
+    thread = diario.checkpoint(snapshot)
+    grafo.insereV("Pop", "genero")  # Vai para o segmento novo enquanto o checkpoint roda
+    grafo.insereA(grafo.itens_reverso["Pop"], grafo.itens_reverso["Bohemian Rhapsody"])
+    thread.join()
+    grafo.desativar_diario()
+
+    # 3. Verificação
+    assert snapshot.exists()
+    assert segmentos_diario(caminho) == [str(caminho)]  # Segmentos incorporados foram apagados
+    somente_snapshot = TGrafoND(modo="esparsa")
+    somente_snapshot.carregar_snapshot(snapshot)
+    assert somente_snapshot.m == 4
+
+    recuperado = recuperar_grafo(snapshot, caminho)
+    assert recuperado.m == 5
+    assert _arestas_por_nome(recuperado) == _arestas_por_nome(grafo)
+
+def test_checkpoint_so_segura_a_trava_na_rotacao(tmp_path):
+    """
+    Testa se a trava passada ao checkpoint não é tomada enquanto ele espera
+    o checkpoint anterior terminar, só durante a rotação do segmento.
+    """
+    caminho = tmp_path / "grafo.diario"
+    grafo = TGrafoND(modo="esparsa")
+    diario = grafo.ativar_diario(caminho)
+    _montar_catalogo(grafo)
+    eventos = []
+
+    @contextmanager
+    def trava():
+        eventos.append("trava")
+        yield
+        eventos.append("solta")
+
+    esperar = diario.aguardar_checkpoint
+    diario.aguardar_checkpoint = lambda: (eventos.append("espera"), esperar())
+    rotacionar = diario.rotacionar
+    diario.rotacionar = lambda: (eventos.append("rotaciona"), rotacionar())[1]
+
+    diario.checkpoint(tmp_path / "grafo.amps", trava=trava)
+    diario.checkpoint(tmp_path / "grafo.amps", trava=trava).join()
+    grafo.desativar_diario()
+
+    assert eventos[:8] == ["espera", "trava", "rotaciona", "solta"] * 2
+
+def test_diario_ocioso_sincroniza_a_cauda(tmp_path, monkeypatch):
+    """
+    Testa se as operações pendentes recebem fsync pela thread do diário
+    mesmo sem novas escritas depois delas.
+    """
+    sincronizados = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (sincronizados.append(fd), fsync(fd)))
+    grafo = TGrafoND(modo="esparsa")
+    diario = grafo.ativar_diario(tmp_path / "grafo.diario", fsync_a_cada=1000, intervalo_fsync=0.02)
+
+    grafo.insereV("Rock", "genero")
+    limite = time.monotonic() + 5
+    while not sincronizados:
+        assert time.monotonic() < limite
+        time.sleep(0.005)
+    grafo.desativar_diario()
+
+    assert diario.operacoes_registradas == 1
+
+def test_recarregar_com_diario_ativo_e_recusado(tmp_path):
+    """
+    Testa se carregar um arquivo ou snapshot sobre um grafo com diário é
+    recusado antes de alterar o grafo (o diário não registraria a troca).
+    """
+    origem = TGrafoND(modo="esparsa")
+    _montar_catalogo(origem)
+    origem.gravar_snapshot(tmp_path / "grafo.amps")
+    origem.gravar_grafo_arquivo(tmp_path / "Grafo.txt")
+
+    grafo = TGrafoND(modo="esparsa")
+    grafo.ativar_diario(tmp_path / "grafo.diario")
+    grafo.insereV("Pop", "genero")
+    with pytest.raises(RuntimeError):
+        grafo.carregar_snapshot(tmp_path / "grafo.amps")
+    with pytest.raises(RuntimeError):
+        grafo.arquivo_para_matriz_adjacencia(tmp_path / "Grafo.txt")
+    grafo.desativar_diario()
+
+    assert list(grafo.itens_reverso) == ["Pop"]
+    grafo.carregar_snapshot(tmp_path / "grafo.amps")  # Sem o diário, a carga é permitida
+    assert grafo.m == 4
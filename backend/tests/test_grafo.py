@@ -1,4 +1,8 @@
-from grafoMatriz import TGrafoND
+from pathlib import Path
+
+import pytest
+
+from grafoMatriz import TGrafoND, ler_registros_grafo
 
 def test_inserir_aresta():
     """
@@ -46,3 +50,491 @@ def test_remover_vertice_simples():
     assert grafo.get_nome_item(1) == "MusicaC"
     # Verifica se não há mais conexão
     assert grafo.adj[0][1] == 0.0
+
+def _grafo_exemplo(modo):
+    grafo = TGrafoND(modo=modo)
+    for nome, tipo in [("Rock", "genero"), ("Queen", "artista"),
+                       ("Bohemian Rhapsody", "musica"), ("We Will Rock You", "musica")]:
+        grafo.insereV(nome, tipo)
+    grafo.insereA(2, 0)
+    grafo.insereA(2, 1)
+    grafo.insereA(3, 0)
+    grafo.insereA(3, 1, 2.0)
+    return grafo
+
+def test_modo_esparso_mesma_api(tmp_path):
+    """
+    Testa se o modo esparso se comporta como a matriz densa
+    nas operações públicas do grafo.
+    """
+    # 1. Preparação
+    densa = _grafo_exemplo("densa")
+    esparsa = _grafo_exemplo("esparsa")
+
+    # 2. Ação
+    densa.removeA(3, 0)
+    esparsa.removeA(3, 0)
+    densa.gravar_grafo_arquivo(tmp_path / "densa.txt")
+    esparsa.gravar_grafo_arquivo(tmp_path / "esparsa.txt")
+
+    # 3. Verificação
+    assert esparsa.n == densa.n == 4
+    assert esparsa.m == densa.m == 3
+    for v in range(densa.n):
+        assert esparsa.obter_vizinhos(v) == densa.obter_vizinhos(v)
+    assert esparsa.adj[3][1] == 2.0
+    assert esparsa.adj[3][0] == 0.0
+    assert esparsa.conexidade() == densa.conexidade() == 0
+    assert (tmp_path / "esparsa.txt").read_text() == (tmp_path / "densa.txt").read_text()
+
+def test_modo_esparso_remover_vertice():
+    """
+    Testa a remoção de vértice no modo esparso: os IDs continuam estáveis
+    até a compactação, que renumera os vizinhos.
+    """
+    # 1. Preparação
+    grafo = _grafo_exemplo("esparsa")
+
+    # 2. Ação
+    grafo.removeV(0)  # Remove "Rock" (1 de 4 posições: abaixo do limiar)
+
+    # 3. Verificação
+    assert grafo.n == 4
+    assert grafo.num_vertices == 3
+    assert grafo.m == 2
+    assert grafo.itens_reverso["Queen"] == 1
+    assert not grafo.vertice_valido(0)
+    with pytest.raises(IndexError):
+        grafo.insereA(0, 2)
+
+    remapeamento = grafo.compactar()
+    assert remapeamento == {1: 0, 2: 1, 3: 2}
+    assert grafo.n == 3
+    assert grafo.get_nome_item(1) == "Bohemian Rhapsody"
+    assert grafo.obter_vizinhos(2) == {0}  # "We Will Rock You" -> "Queen"
+    assert grafo.itens_reverso["Queen"] == 0
+
+def test_modo_invalido():
+    """
+    Testa se um modo de armazenamento desconhecido é rejeitado.
+    """
+    with pytest.raises(ValueError):
+        TGrafoND(modo="inexistente")
+
+@pytest.mark.parametrize("modo", ["densa", "esparsa", "numpy", "bitset"])
+def test_inserir_vertices_em_lote(modo):
+    """
+    Testa a inserção de vértices e arestas em lote.
+    """
+    # 1. Preparação
+    if modo == "numpy":
+        pytest.importorskip("numpy")
+    grafo = TGrafoND(modo=modo)
+    grafo.insereV("Queen", "artista")
+
+    # 2. Ação
+    ids = grafo.insereV_lote([("Rock", "genero"), ("Queen", "artista"),
+                              ("Bohemian Rhapsody", "musica"), ("Rock", "genero")])
+    novas = grafo.insereA_lote([(2, 0), (2, 1, 2.0), (0, 2)])
+
+    # 3. Verificação
+    assert ids == [1, 0, 2, 1]  # Nomes repetidos reaproveitam o índice
+    assert grafo.n == 3
+    assert grafo.vertices_por_tipo["musica"] == {2}
+    assert novas == 2  # (0, 2) já existia como (2, 0)
+    assert grafo.m == 2
+    assert grafo.adj[1][2] == 2.0
+
+def test_inserir_arestas_em_lote_valida_antes():
+    """
+    Testa se um lote com vértice inválido não insere nenhuma aresta.
+    """
+    grafo = TGrafoND(n=3)
+
+    with pytest.raises(IndexError):
+        grafo.insereA_lote([(0, 1), (1, 5)])
+
+    assert grafo.m == 0
+    assert grafo.adj[0][1] == 0.0
+
+@pytest.mark.parametrize("modo", ["densa", "esparsa", "bitset"])
+def test_peso_nao_positivo_e_rejeitado(modo):
+    """
+    Testa se arestas com peso 0 ou negativo são recusadas (peso 0 é "sem
+    aresta" no armazenamento), sem alterar o grafo.
+    """
+    grafo = TGrafoND(n=3, modo=modo)
+
+    for peso in (0, -1.5, float("nan")):
+        with pytest.raises(ValueError):
+            grafo.insereA(0, 1, peso)
+    with pytest.raises(ValueError):
+        grafo.insereA_lote([(0, 1), (1, 2, 0.0)])
+
+    assert grafo.m == 0 and not grafo.tem_aresta(0, 1)
+
+def test_matriz_densa_cresce_dobrando_capacidade():
+    """
+    Testa se a matriz densa só é realocada quando a capacidade se esgota.
+    """
+    grafo = TGrafoND()
+
+    for i in range(5):
+        grafo.insereV(f"V{i}")
+    grafo.insereA(0, 4)
+
+    armazenamento = grafo._armazenamento
+    assert grafo.n == 5
+    assert armazenamento.capacidade == 8
+    assert grafo.obter_vizinhos(4) == {0}
+    assert grafo.e_completo() is False
+
+def test_modo_numpy_consultas_vetorizadas(tmp_path):
+    """
+    Testa se a matriz NumPy responde às consultas como a matriz densa.
+    """
+    pytest.importorskip("numpy")
+
+    # 1. Preparação
+    densa = _grafo_exemplo("densa")
+    vetorizada = _grafo_exemplo("numpy")
+
+    # 2. Ação
+    densa.gravar_grafo_arquivo(tmp_path / "densa.txt")
+    vetorizada.gravar_grafo_arquivo(tmp_path / "numpy.txt")
+
+    # 3. Verificação
+    for v in range(densa.n):
+        assert vetorizada.obter_vizinhos(v) == densa.obter_vizinhos(v)
+    assert vetorizada.adj[3][1] == 2.0
+    assert list(vetorizada.graus()) == list(densa.graus()) == [2, 2, 2, 2]
+    assert vetorizada.conexidade() == 0
+    assert vetorizada.e_completo() is False
+    assert (tmp_path / "numpy.txt").read_text() == (tmp_path / "densa.txt").read_text()
+
+    # Compactação por indexação mantém a matriz consistente
+    vetorizada.removeV(0)
+    vetorizada.compactar()
+    assert vetorizada.n == 3
+    assert vetorizada.m == 2
+    assert vetorizada.obter_vizinhos(0) == {1, 2}  # "Queen"
+    assert vetorizada.conexidade() == 0
+
+def test_modo_numpy_completo():
+    """
+    Testa a verificação vetorizada de grafo completo.
+    """
+    pytest.importorskip("numpy")
+
+    grafo = TGrafoND(n=3, modo="numpy")
+    grafo.insereA_lote([(0, 1), (1, 2)])
+    assert grafo.e_completo() is False
+
+    grafo.insereA(0, 2)
+    assert grafo.e_completo() is True
+
+@pytest.mark.parametrize("modo", ["densa", "esparsa"])
+def test_remover_vertices_mantem_ids_ate_compactar(modo, tmp_path):
+    """
+    Testa a remoção com lápides: IDs estáveis, compactação automática
+    ao passar do limiar e remoção em lote com uma única compactação.
+    """
+    # 1. Preparação
+    grafo = TGrafoND(modo=modo)
+    grafo.insereV_lote([(f"M{i}", "musica") for i in range(10)])
+    grafo.insereA_lote([(i, i + 1) for i in range(9)])
+
+    # 2. Ação / 3. Verificação
+    grafo.removeV(3)
+    grafo.removeV(5)
+    assert grafo.itens_reverso["M9"] == 9  # IDs não mudaram
+    assert grafo.m == 5
+    assert grafo.conexidade() == 1
+    assert grafo.vertices_por_tipo["musica"] == {0, 1, 2, 4, 6, 7, 8, 9}
+    assert list(grafo.graus()) == [1, 2, 1, 0, 0, 0, 1, 2, 2, 1]  # Removidos (3, 5) e o 4, isolado
+    assert grafo.e_completo() is False
+
+    # Arquivo gravado sem as posições removidas
+    grafo.gravar_grafo_arquivo(tmp_path / "grafo.txt")
+    linhas = (tmp_path / "grafo.txt").read_text().splitlines()
+    assert linhas[1] == "8"
+    assert linhas[2 + 7] == '7 "M9" "musica"'
+
+    removidos = grafo.removeV_lote([0, 1])  # 4 de 10 removidos: compacta
+    assert removidos == 2
+    assert grafo.n == grafo.num_vertices == 6
+    assert grafo.geracao_ids == 1
+    assert grafo.ultimo_remapeamento == {2: 0, 4: 1, 6: 2, 7: 3, 8: 4, 9: 5}
+    assert grafo.itens_reverso["M9"] == 5
+    assert grafo.obter_vizinhos(5) == {4}
+    assert grafo.m == 3
+
+def test_ler_registros_grafo(tmp_path):
+    """
+    Testa os registros gerados pelo leitor do formato Grafo.txt.
+    """
+    caminho = tmp_path / "grafo.txt"
+    caminho.write_text('2\n3\n0 "Rock" "genero"\n1 "Queen"\n\n4\n0 2\n2 0\n1 2 0.5\n')
+
+    registros = list(ler_registros_grafo(caminho))
+
+    assert registros == [
+        ("tipo", 2),
+        ("num_vertices", 3),
+        ("vertice", 0, "Rock", "genero"),
+        ("vertice", 1, "Queen", "desconhecido"),
+        ("num_arestas", 4),
+        ("aresta", 0, 2, 1.0),
+        ("aresta", 2, 0, 1.0),
+        ("aresta", 1, 2, 0.5),
+        ("fim", 8),
+    ]
+
+@pytest.mark.parametrize("modo", ["densa", "esparsa"])
+def test_carregar_arquivo_ida_e_volta(modo, tmp_path):
+    """
+    Testa se gravar e carregar o arquivo reconstrói o mesmo grafo.
+    """
+    # 1. Preparação
+    original = _grafo_exemplo(modo)
+    caminho = tmp_path / "grafo.txt"
+    original.gravar_grafo_arquivo(caminho)
+
+    # 2. Ação
+    carregado = TGrafoND(modo=modo)
+    carregado.arquivo_para_matriz_adjacencia(caminho)
+
+    # 3. Verificação
+    assert carregado.n == original.n
+    assert carregado.m == original.m
+    assert carregado.itens == original.itens
+    assert carregado.vertices_por_tipo["musica"] == {2, 3}
+    for v in range(original.n):
+        assert carregado.obter_vizinhos(v) == original.obter_vizinhos(v)
+
+def test_carregar_arquivo_invalido_mantem_grafo(tmp_path):
+    """
+    Testa se um arquivo inválido não altera o grafo atual.
+    """
+    grafo = _grafo_exemplo("esparsa")
+    caminho = tmp_path / "grafo.txt"
+    caminho.write_text("0\n")
+
+    with pytest.raises(ValueError):
+        grafo.arquivo_para_matriz_adjacencia(caminho)
+
+    assert grafo.n == 4
+    assert grafo.m == 4
+
+def test_mostrar_arquivo_do_projeto(capsys):
+    """
+    Testa as visualizações do arquivo Grafo.txt do projeto.
+    """
+    caminho = Path(__file__).parent.parent.parent / "Grafo.txt"
+    grafo = TGrafoND(modo="esparsa")
+    grafo.arquivo_para_matriz_adjacencia(caminho)
+
+    grafo.mostrar_conteudo_arquivo(caminho)
+    grafo.mostrar_conexoes_detalhadas(caminho, limite=5)
+
+    saida = capsys.readouterr().out
+    assert f"Conexões únicas: {grafo.m}" in saida
+    assert f"Total de vértices: {grafo.n}" in saida
+    assert "Linkin Park" in saida
+    assert "Erro" not in saida
+
+@pytest.mark.parametrize("modo", ["densa", "esparsa", "numpy", "bitset"])
+def test_componentes_mantidas_incrementalmente(modo):
+    """
+    Testa a contagem de componentes ao inserir e remover arestas e vértices.
+    """
+    grafo = _grafo_exemplo(modo)
+    assert grafo.num_componentes() == 1
+
+    pop = grafo.insereV("Pop", "genero")
+    assert grafo.num_componentes() == 2
+    assert not grafo.conectados(pop, 0)
+    grafo.insereA(pop, 2)
+    assert grafo.num_componentes() == 1
+    assert grafo.conexidade() == 0
+
+    # Remoções invalidam a estrutura, que é reconstruída na consulta
+    grafo.removeA(pop, 2)
+    assert grafo.num_componentes() == 2
+    grafo.removeV(pop)
+    assert grafo.num_componentes() == 1
+    grafo.removeA(3, 0)
+    grafo.removeA(2, 0)  # Rock fica isolado
+    assert grafo.conexidade() == 1
+    assert grafo.num_componentes() == 2
+
+def test_conexidade_caminho_longo():
+    """
+    Testa a conexidade em um caminho maior que o limite de recursão.
+    """
+    grafo = TGrafoND(modo="esparsa")
+    grafo.verboso = False
+    ids = grafo.insereV_lote((f"v{i}", "desconhecido") for i in range(5000))
+    grafo.insereA_lote(zip(ids, ids[1:]))
+    assert grafo.conexidade() == 0
+
+    grafo.removeA(ids[2499], ids[2500])
+    assert grafo.conexidade() == 1
+    assert grafo.num_componentes() == 2
+
+def test_vizinhos_por_tipo_acompanham_mutacoes(tmp_path):
+    """
+    Testa o índice de vizinhos por tipo ao inserir, remover, compactar e recarregar.
+    """
+    grafo = _grafo_exemplo("esparsa")
+    assert grafo.vizinhos_do_tipo(3, "artista") == {1}
+    assert grafo.vizinhos_do_tipo(0, "musica") == {2, 3}
+    # Sem cópia: o mesmo set do índice a cada chamada
+    assert grafo.vizinhos_do_tipo_sem_copia(0, "musica") is grafo.vizinhos_do_tipo_sem_copia(0, "musica")
+    assert grafo.vizinhos_do_tipo_sem_copia(0, "musica") == {2, 3}
+    assert grafo.vizinhos_do_tipo_sem_copia(0, "artista") == set()
+
+    pop = grafo.insereV("Pop", "genero")
+    grafo.insereA(3, pop)
+    assert grafo.vizinhos_do_tipo(3, "genero") == {0, pop}
+    grafo.removeA(3, 0)
+    assert grafo.vizinhos_do_tipo(3, "genero") == {pop}
+
+    grafo.removeV(1)  # Remove Queen
+    assert grafo.vizinhos_do_tipo(3, "artista") == set()
+    grafo.compactar()
+    pop = grafo.itens_reverso["Pop"]
+    assert grafo.vizinhos_do_tipo(pop, "musica") == {grafo.itens_reverso["We Will Rock You"]}
+
+    caminho = tmp_path / "grafo.txt"
+    grafo.gravar_grafo_arquivo(caminho)
+    carregado = TGrafoND(modo="esparsa")
+    carregado.arquivo_para_matriz_adjacencia(caminho)
+    assert carregado.vizinhos_do_tipo(carregado.itens_reverso["Rock"], "musica") == {
+        carregado.itens_reverso["Bohemian Rhapsody"]
+    }
+
+def test_modo_bitset_pesos_e_compactacao():
+    """
+    Testa o modo bitset: pesos guardados à parte, adj[v][w] e compactação.
+    """
+    grafo = _grafo_exemplo("bitset")
+    assert grafo.adj[3][1] == 2.0 and grafo.adj[1][3] == 2.0
+    assert grafo.adj[2][3] == 0.0
+    assert grafo.vizinhos_bitset(3) == 0b11
+    assert grafo.obter_arestas(3) == [(0, 1.0), (1, 2.0)]
+
+    grafo.removeV(0)
+    grafo.compactar()
+    assert grafo.obter_arestas(grafo.itens_reverso["We Will Rock You"]) == [(0, 2.0)]
+    assert grafo.m == 2
+
+def test_projecao_musicas_acompanha_mutacoes():
+    """
+    Testa se os registros {id, nome, artistas, generos} e os índices por
+    gênero/artista da projeção acompanham inserções, remoções e compactação.
+    """
+    grafo = TGrafoND(modo="esparsa")
+    grafo.verboso = False
+    numb, lp, rock, end = grafo.insereV_lote(
+        [("Numb", "musica"), ("Linkin Park", "artista"), ("Rock", "genero"), ("In The End", "musica")]
+    )
+    grafo.insereA_lote([(numb, lp), (numb, rock), (end, lp)])
+    projecao = grafo.projecao_musicas
+
+    assert projecao.registro(numb) == {"id": numb, "nome": "Numb", "artistas": ["Linkin Park"], "generos": ["Rock"]}
+    assert projecao.registro(lp) is None
+    assert projecao.musicas_com("genero", "rock") == {numb}
+
+    alt = grafo.insereV("Alternative", "genero")
+    grafo.insereA(end, alt)
+    assert projecao.registro(end)["generos"] == ["Alternative"]
+    assert list(projecao.musicas_filtradas(artista="LINKIN PARK")) == [numb, end]
+    assert list(projecao.musicas_filtradas(genero="alternative", artista="Linkin Park")) == [end]
+
+    grafo.removeV(lp)
+    assert projecao.registro(numb)["artistas"] == []
+    assert projecao.musicas_com("artista", "Linkin Park") == set()
+
+    grafo.compactar()
+    novo_end = grafo.itens_reverso["In The End"]
+    assert projecao.detalhe(novo_end)["generos"] == [{"id": grafo.itens_reverso["Alternative"], "nome": "Alternative"}]
+
+def test_projecao_pagina_musicas_filtradas_por_cursor():
+    """
+    Testa se as listas ordenadas por gênero/artista acompanham as mutações
+    e se a listagem filtrada continua do cursor mesmo com o grafo mudando
+    no meio da iteração.
+    """
+    grafo = TGrafoND(modo="esparsa")
+    grafo.verboso = False
+    rock, pop = grafo.insereV_lote([("Rock", "genero"), ("Pop", "genero")])
+    musicas = grafo.insereV_lote([(f"Musica {i}", "musica") for i in range(10)])
+    grafo.insereA_lote([(m, rock) for m in musicas] + [(m, pop) for m in musicas[::3]])
+    projecao = grafo.projecao_musicas
+
+    assert list(projecao.musicas_filtradas(genero="rock", apos=musicas[6])) == musicas[7:]
+    assert list(projecao.musicas_filtradas(genero="Rock", artista=None)) == musicas
+    iteracao = projecao.musicas_filtradas(genero="pop", apos=musicas[0])
+    assert next(iteracao) == musicas[3]
+
+    grafo.insereA(musicas[4], pop)  # Depois do cursor: aparece
+    grafo.insereA(musicas[1], pop)  # Antes do cursor: não repete a página anterior
+    grafo.removeA(musicas[6], pop)
+    assert list(iteracao) == [musicas[4], musicas[9]]
+
+    grafo.removeV(musicas[9])
+    nova = grafo.insereV("Musica nova", "musica")
+    grafo.insereA(nova, rock)
+    assert list(projecao.musicas_filtradas(genero="rock", apos=musicas[7])) == [musicas[8], nova]
+    assert list(projecao.musicas_filtradas(genero="pop")) == [musicas[0], musicas[1], musicas[3], musicas[4]]
+
+def test_projecao_limita_as_listas_por_nome():
+    """
+    Testa se nomes inexistentes não ganham lista e se as listas guardadas
+    não passam de um ID por música do catálogo, descartando as menos usadas.
+    """
+    grafo = TGrafoND(modo="esparsa")
+    grafo.verboso = False
+    rock, pop, jazz = grafo.insereV_lote([("Rock", "genero"), ("Pop", "genero"), ("Jazz", "genero")])
+    musicas = grafo.insereV_lote([(f"Musica {i}", "musica") for i in range(4)])
+    grafo.insereA_lote([(m, rock) for m in musicas] + [(musicas[0], pop), (musicas[1], jazz)])
+    projecao = grafo.projecao_musicas
+
+    for i in range(100):
+        assert list(projecao.musicas_filtradas(genero=f"Inexistente {i}")) == []
+    assert projecao.contar_musicas(artista="Ninguém") == 0
+    assert len(projecao._musicas_por_nome) == 0
+
+    assert projecao.contar_musicas(genero="pop") == 1
+    assert projecao.contar_musicas(genero="jazz") == 1
+    assert projecao.contar_musicas(genero="rock") == 4  # 6 IDs > 4 músicas: pop e jazz saem
+    assert list(projecao._musicas_por_nome) == [("genero", "rock")]
+    assert projecao.contar_musicas(genero="pop") == 1
+    assert list(projecao._musicas_por_nome) == [("genero", "pop")]
+
+def test_lote_avanca_a_versao_uma_vez():
+    """
+    Testa se as mutações dentro de grafo.lote() avançam a versão uma vez só
+    (e nenhuma, se nada mudou), mantendo o aviso aos observadores.
+    """
+    grafo = TGrafoND(modo="esparsa")
+    grafo.verboso = False
+    avisos = []
+
+    class Observador:
+        def ao_inserir_aresta(self, grafo, v, w, peso):
+            avisos.append((v, w))
+
+    grafo.adicionar_observador(Observador())
+    with grafo.lote():
+        a, b, c = grafo.insereV_lote([("A", "musica"), ("B", "artista"), ("C", "genero")])
+        with grafo.lote():
+            grafo.insereA(a, b)
+        grafo.insereA(a, c)
+        assert grafo.versao == 0
+    assert grafo.versao == 1 and avisos == [(a, b), (a, c)]
+
+    with grafo.lote():
+        grafo.insereA(a, b)  # Já existe: nada muda
+    assert grafo.versao == 1
@@ -0,0 +1,67 @@
+import pytest
+
+from minhash import IndiceMinHash
+from recomendacao import intersecoes_candidatos_lsh, recomendar_musicas
+
+# As músicas do Linkin Park também são Alternative
+ALTERNATIVE = {
+    "Numb": ("Linkin Park", ["Rock", "Alternative"]),
+    "In The End": ("Linkin Park", ["Rock", "Alternative"]),
+}
+
+def _reconstruido(indice, grafo):
+    novo = IndiceMinHash(indice.num_hashes, indice.bandas)
+    novo.reconstruir(grafo)
+    return novo
+
+def test_minhash_candidatos_e_estimativa(catalogo):
+    """
+    Testa se músicas com o mesmo perfil caem no mesmo balde e as disjuntas não.
+    """
+    grafo = catalogo(ALTERNATIVE)
+    indice = IndiceMinHash(num_hashes=32, bandas=8).acompanhar(grafo)
+    numb, end, yellow = (grafo.itens_reverso[n] for n in ("Numb", "In The End", "Yellow"))
+
+    assert indice.candidatos(numb) == {end}
+    assert indice.estimar_jaccard(numb, end) == 1.0
+    assert indice.estimar_jaccard(numb, yellow) == 0.0
+    assert recomendar_musicas(grafo, "Numb", indice_lsh=indice) == [("In The End", 1.0)]
+
+@pytest.mark.parametrize("modo", ["esparsa", "bitset"])
+def test_intersecoes_lsh_por_sets_ou_popcount(modo, monkeypatch, catalogo):
+    """
+    Testa se as interseções dos candidatos LSH só usam os mapas de bits no
+    modo "bitset" e dão o mesmo resultado nos dois caminhos.
+    """
+    grafo = catalogo(ALTERNATIVE, modo=modo)
+    indice = IndiceMinHash(num_hashes=32, bandas=8).acompanhar(grafo)
+    if modo != "bitset":
+        def sem_bitset(v):
+            raise AssertionError("mapa de bits montado fora do modo bitset")
+        monkeypatch.setattr(grafo, "vizinhos_bitset", sem_bitset)
+
+    numb, end = grafo.itens_reverso["Numb"], grafo.itens_reverso["In The End"]
+    assert intersecoes_candidatos_lsh(grafo, numb, indice) == {end: 3}
+
+def test_minhash_atualizado_incrementalmente(catalogo):
+    """
+    Testa se as atualizações incrementais deixam o índice igual a um reconstruído do zero.
+    """
+    grafo = catalogo(ALTERNATIVE)
+    indice = IndiceMinHash(num_hashes=32, bandas=8).acompanhar(grafo)
+
+    nova = grafo.insereV("Paradise", "musica")
+    grafo.insereA(nova, grafo.itens_reverso["Coldplay"])
+    grafo.insereA(nova, grafo.itens_reverso["Pop"])
+    grafo.removeA(grafo.itens_reverso["Numb"], grafo.itens_reverso["Alternative"])
+    assert indice.assinaturas == _reconstruido(indice, grafo).assinaturas
+    assert grafo.itens_reverso["Clocks"] in indice.candidatos(nova)
+
+    grafo.removeV(grafo.itens_reverso["Linkin Park"])
+    grafo.removeV(grafo.itens_reverso["Rock"])
+    grafo.removeV(grafo.itens_reverso["Alternative"])  # Passa do limiar: compacta e renumera
+    assert grafo.geracao_ids == 1
+    assert indice.assinaturas == _reconstruido(indice, grafo).assinaturas
+    assert indice.candidatos(grafo.itens_reverso["Yellow"]) == {
+        grafo.itens_reverso["Clocks"], grafo.itens_reverso["Paradise"]
+    }
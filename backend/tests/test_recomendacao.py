@@ -0,0 +1,271 @@
+import gc
+import time
+
+import pytest
+
+from grafoMatriz import TGrafoND
+from recomendacao import (
+    Prazo, contar_intersecoes, pagerank_personalizado, recomendar_musicas, recomendar_para_playlist,
+    recomendar_por_filtros,
+    similaridade_todos_pares,
+)
+
+# Alternative liga os dois artistas, e Blue fica isolada (a ordem dá os IDs dos empates)
+MUSICAS = {
+    "Numb": ("Linkin Park", ["Rock", "Alternative"]),
+    "In The End": ("Linkin Park", ["Rock", "Alternative"]),
+    "Faint": ("Linkin Park", ["Rock"]),
+    "Yellow": ("Coldplay", ["Alternative", "Pop"]),
+    "Clocks": ("Coldplay", ["Pop"]),
+    "Blue": ("Eiffel 65", ["Dance"]),
+}
+
+def _jaccard_ingenuo(grafo, nome):
+    base = grafo.itens_reverso[nome]
+    perfil = grafo.obter_vizinhos(base)
+    scores = []
+    for musica in grafo.vertices_por_tipo["musica"] - {base}:
+        outro = grafo.obter_vizinhos(musica)
+        score = len(perfil & outro) / len(perfil | outro)
+        if score > 0:
+            scores.append((grafo.get_nome_item(musica), score))
+    return sorted(scores, key=lambda item: (-item[1], grafo.itens_reverso[item[0]]))
+
+def test_recomendacao_igual_a_comparacao_com_todas(catalogo):
+    """
+    Testa se os candidatos do índice invertido dão o mesmo resultado que
+    comparar a música base com todas as outras.
+    """
+    grafo = catalogo(base=MUSICAS)
+    for nome in ("Numb", "Yellow", "Blue"):
+        assert recomendar_musicas(grafo, nome, top_n=10) == _jaccard_ingenuo(grafo, nome)
+
+    assert recomendar_musicas(grafo, "Numb", top_n=2) == [("In The End", 1.0), ("Faint", 2 / 3)]
+
+def test_candidatos_so_com_intersecao(catalogo):
+    """
+    Testa se só as músicas com vizinhos em comum viram candidatas.
+    """
+    grafo = catalogo(base=MUSICAS)
+    intersecoes = contar_intersecoes(grafo, grafo.itens_reverso["Clocks"])
+    assert {grafo.get_nome_item(m): c for m, c in intersecoes.items()} == {"Yellow": 2}
+    assert recomendar_musicas(grafo, "Blue") == []
+    assert recomendar_musicas(grafo, "Rock") == []
+
+def test_similaridade_todos_pares_igual_a_recomendacao(catalogo):
+    """
+    Testa se o cálculo em lote (produto esparso) dá as mesmas top-k da
+    recomendação por música, inclusive com blocos menores que o catálogo.
+    """
+    pytest.importorskip("scipy")
+    grafo = catalogo(base=MUSICAS)
+
+    tabela = similaridade_todos_pares(grafo, top_k=2, linhas_por_bloco=4)
+
+    assert set(tabela) == grafo.vertices_por_tipo["musica"]
+    for musica_id, similares in tabela.items():
+        esperado = recomendar_musicas(grafo, grafo.get_nome_item(musica_id), top_n=2)
+        assert [(grafo.get_nome_item(m), pytest.approx(s)) for m, s in similares] == esperado
+
+def test_similaridade_todos_pares_em_blocos_pela_memoria(catalogo):
+    """
+    Testa se os blocos são cortados pela estimativa de não nulos do produto
+    (linhas de hubs sozinhas) e se o resultado não depende deles.
+    """
+    pytest.importorskip("scipy")
+    from recomendacao import _blocos_de_linhas
+
+    assert list(_blocos_de_linhas([2, 2, 9, 1, 1, 1], 4, 100)) == [(0, 2), (2, 3), (3, 6)]
+    assert list(_blocos_de_linhas([1] * 5, 100, 2)) == [(0, 2), (2, 4), (4, 5)]
+
+    grafo = catalogo(base=MUSICAS)
+    assert similaridade_todos_pares(grafo, top_k=2, max_nao_nulos=1) == similaridade_todos_pares(grafo, top_k=2)
+
+def _pagerank_exato(grafo, sementes, alfa, iteracoes=200):
+    """Iteração de potência do PageRank personalizado, para comparação"""
+    vertices = list(grafo.vertices_existentes())
+    reinicio = {v: (1.0 / len(sementes) if v in sementes else 0.0) for v in vertices}
+    scores = dict(reinicio)
+    for _ in range(iteracoes):
+        novo = {v: alfa * reinicio[v] for v in vertices}
+        for v in vertices:
+            vizinhos = grafo.obter_vizinhos(v)
+            for w in vizinhos:
+                novo[w] += (1 - alfa) * scores[v] / len(vizinhos)
+        scores = novo
+    return scores
+
+def test_pagerank_local_dentro_do_limite(catalogo):
+    """
+    Testa se o push local fica a até epsilon * grau do PageRank exato.
+    """
+    grafo = catalogo(base=MUSICAS)
+    rock = grafo.itens_reverso["Rock"]
+    epsilon = 1e-3
+
+    aproximado = pagerank_personalizado(grafo, [rock], alfa=0.15, epsilon=epsilon)
+    exato = _pagerank_exato(grafo, {rock}, alfa=0.15)
+    for v, valor in exato.items():
+        assert abs(aproximado.get(v, 0.0) - valor) <= epsilon * grafo.grau(v) + 1e-9
+
+def test_recomendar_por_filtros(catalogo):
+    """
+    Testa se os filtros restringem as músicas antes do ranking.
+    """
+    grafo = catalogo(base=MUSICAS)
+    ranking = recomendar_por_filtros(grafo, genero="alternative", limite=10)
+    nomes = [grafo.get_nome_item(v) for v, _ in ranking]
+
+    assert set(nomes) == {"Numb", "In The End", "Yellow"}
+    assert ranking[0][1] == 1.0
+    assert [grafo.get_nome_item(v) for v, _ in
+            recomendar_por_filtros(grafo, genero="Alternative", artista="Coldplay")] == ["Yellow"]
+    assert recomendar_por_filtros(grafo, genero="Jazz") == []
+    assert len(recomendar_por_filtros(grafo, limite=3)) == 3
+
+def test_recomendar_por_filtros_com_nomes_repetidos(catalogo):
+    """
+    Testa se o filtro vale para todos os vértices com o nome (sem diferenciar
+    maiúsculas), como na listagem de músicas.
+    """
+    grafo = catalogo(base=MUSICAS)
+    rock_minusculo = grafo.insereV("rock", "genero")
+    grafo.insereA(grafo.itens_reverso["Yellow"], rock_minusculo)
+
+    nomes = {grafo.get_nome_item(v) for v, _ in recomendar_por_filtros(grafo, genero="ROCK", limite=10)}
+    assert nomes == {grafo.get_nome_item(v) for v in grafo.projecao_musicas.musicas_com("genero", "Rock")}
+    assert "Yellow" in nomes and "Numb" in nomes
+
+def test_recomendar_para_playlist(catalogo):
+    """
+    Testa o Jaccard ponderado do perfil da playlist e a exclusão das músicas base.
+    """
+    grafo = catalogo(base=MUSICAS)
+    # Perfil: Alternative 1; Linkin Park, Rock, Coldplay, Pop 1/2 cada (P = 3)
+    ranking, ignorados = recomendar_para_playlist(grafo, ["Numb", "Yellow", "Numb", "Rock", "Xyz"])
+
+    assert ignorados == ["Rock", "Xyz"]
+    scores = {grafo.get_nome_item(v): score for v, score in ranking}
+    assert "Numb" not in scores and "Yellow" not in scores
+    assert scores["In The End"] == pytest.approx(2 / (3 + 3 - 2))
+    assert scores["Faint"] == pytest.approx(1 / (2 + 3 - 1))
+    assert scores["Clocks"] == pytest.approx(1 / (2 + 3 - 1))
+    assert [grafo.get_nome_item(v) for v, _ in ranking][:2] == ["In The End", "Faint"]
+
+    # Com uma só música base, é o Jaccard comum
+    unica, _ = recomendar_para_playlist(grafo, ["Numb"], top_n=2)
+    assert [(grafo.get_nome_item(v), s) for v, s in unica] == recomendar_musicas(grafo, "Numb", top_n=2)
+
+def test_similaridades_ponderadas():
+    """
+    Testa o Jaccard ponderado e o cosseno com os pesos das arestas.
+    """
+    grafo = TGrafoND(modo="esparsa")
+    grafo.verboso = False
+    a, b, c, rock, pop, jazz = grafo.insereV_lote(
+        [("A", "musica"), ("B", "musica"), ("C", "musica"),
+         ("Rock", "genero"), ("Pop", "genero"), ("Jazz", "genero")]
+    )
+    grafo.insereA_lote([(a, rock, 3.0), (a, pop, 1.0), (b, rock, 1.0), (b, pop, 1.0),
+                        (c, rock, 3.0), (c, jazz, 2.0)])
+
+    # A = (3, 1, 0), B = (1, 1, 0), C = (3, 0, 2)
+    ponderado = dict(recomendar_musicas(grafo, "A", similaridade="jaccard_ponderado"))
+    assert ponderado["B"] == pytest.approx((1 + 1) / (3 + 1))
+    assert ponderado["C"] == pytest.approx(3 / (3 + 1 + 2))
+    cosseno = dict(recomendar_musicas(grafo, "A", similaridade="cosseno"))
+    assert cosseno["B"] == pytest.approx(4 / (10 ** 0.5 * 2 ** 0.5))
+    assert cosseno["C"] == pytest.approx(9 / (10 ** 0.5 * 13 ** 0.5))
+    assert dict(recomendar_musicas(grafo, "A"))["B"] == 1.0  # Jaccard comum ignora os pesos
+
+    # As normas acompanham as mutações
+    grafo.removeA(a, pop)
+    assert grafo.soma_pesos(a) == 3.0
+    assert grafo.norma_pesos(a) == pytest.approx(3.0)
+    grafo.removeV(c)
+    assert grafo.soma_pesos(rock) == 4.0
+    assert dict(recomendar_musicas(grafo, "A", similaridade="cosseno"))["B"] == pytest.approx(3 / (3 * 2 ** 0.5))
+
+    with pytest.raises(ValueError):
+        recomendar_musicas(grafo, "A", similaridade="euclidiana")
+
+def test_jaccard_por_bitset(monkeypatch, catalogo):
+    """
+    Testa se o modo bitset (popcount) dá as mesmas recomendações que os sets,
+    inclusive com o popcount de Python < 3.10.
+    """
+    import recomendacao
+
+    esparso = catalogo(base=MUSICAS)
+    bitset = TGrafoND(modo="bitset")
+    bitset.verboso = False
+    for v in esparso.vertices_existentes():
+        bitset.insereV(esparso.get_nome_item(v), esparso.itens[v]["tipo"])
+    bitset.insereA_lote((v, w) for v in esparso.vertices_existentes() for w in esparso.obter_vizinhos(v) if v < w)
+
+    for nome in ("Numb", "Yellow", "Blue"):
+        assert recomendar_musicas(bitset, nome, top_n=10) == recomendar_musicas(esparso, nome, top_n=10)
+
+    monkeypatch.setattr(recomendacao, "contar_bits", lambda x: bin(x).count("1"))
+    assert recomendacao.jaccard_bits(0b1011, 0b0110) == 1 / 4
+    assert recomendar_musicas(bitset, "Numb", usar_cache=False) == recomendar_musicas(esparso, "Numb")
+
+def test_recomendacao_com_prazo(catalogo):
+    """
+    Testa se o prazo esgotado devolve um top-n parcial marcado como truncado
+    (e fora do cache), e se um prazo folgado e a parada antecipada pelo
+    limite superior mantêm o resultado exato.
+    """
+    grafo = catalogo(base=MUSICAS)
+    prazo = Prazo(0)
+    parcial = recomendar_musicas(grafo, "Numb", top_n=2, prazo=prazo)
+    assert prazo.estourou and 0 < len(parcial) <= 2
+    assert grafo.cache_recomendacoes.estatisticas()["entradas"] == 0
+
+    prazo = Prazo(60_000)
+    assert recomendar_musicas(grafo, "Numb", top_n=10, prazo=prazo) == _jaccard_ingenuo(grafo, "Numb")
+    assert not prazo.estourou
+    assert grafo.cache_recomendacoes.estatisticas()["entradas"] == 1
+
+    for similaridade in ("jaccard", "jaccard_ponderado", "cosseno"):
+        todas = recomendar_musicas(grafo, "Yellow", top_n=10, usar_cache=False, similaridade=similaridade)
+        for n in (1, 2, 3):
+            assert recomendar_musicas(grafo, "Yellow", top_n=n, usar_cache=False,
+                                      similaridade=similaridade) == todas[:n]
+
+    prazo = Prazo(0)
+    ranking, _ = recomendar_para_playlist(grafo, ["Numb", "Yellow"], top_n=3, prazo=prazo)
+    assert prazo.estourou and ranking
+    prazo = Prazo(0)
+    assert recomendar_por_filtros(grafo, genero="Rock", prazo=prazo) and prazo.estourou
+
+def test_prazo_limita_o_tempo_em_catalogo_grande():
+    """
+    Testa se, com um gênero que liga todas as músicas (hub), as três
+    recomendações terminam perto do orçamento e marcam o resultado como
+    truncado, em vez de percorrer o hub inteiro.
+    """
+    grafo = TGrafoND(modo="esparsa")
+    grafo.verboso = False
+    n = 40_000
+    ids = grafo.insereV_lote([("Rock", "genero"), ("Pop", "genero")]
+                             + [(f"Musica {i}", "musica") for i in range(n)]
+                             + [(f"Artista {i}", "artista") for i in range(n // 10)])
+    rock, pop, musicas, artistas = ids[0], ids[1], ids[2:2 + n], ids[2 + n:]
+    grafo.insereA_lote([(m, rock) for m in musicas] + [(m, pop) for m in musicas[::2]]
+                       + [(m, artistas[i // 10]) for i, m in enumerate(musicas)])
+
+    orcamento_ms = 10  # Bem abaixo do tempo da consulta completa em qualquer máquina
+    consultas = (
+        lambda prazo: recomendar_musicas(grafo, "Musica 5", prazo=prazo, usar_cache=False),
+        lambda prazo: recomendar_para_playlist(grafo, ["Musica 5", "Musica 7"], prazo=prazo)[0],
+        lambda prazo: recomendar_por_filtros(grafo, genero="Rock", epsilon=1e-7, prazo=prazo),
+    )
+    for consulta in consultas:
+        gc.collect()  # Uma coleta completa no meio da medição não é do algoritmo
+        prazo = Prazo(orcamento_ms)
+        inicio = time.monotonic()
+        resultado = consulta(prazo)
+        decorrido_ms = (time.monotonic() - inicio) * 1000
+        assert prazo.estourou and resultado
+        assert decorrido_ms < orcamento_ms + 60
@@ -0,0 +1,85 @@
+import pytest
+
+from grafoMatriz import TGrafoND
+from snapshot import SnapshotCSR, converter_arquivo, e_snapshot
+
+def _grafo_catalogo():
+    grafo = TGrafoND(modo="esparsa")
+    grafo.insereV_lote([("Rock", "genero"), ("Queen", "artista"), ("Ação", "genero"),
+                        ("Bohemian Rhapsody", "musica"), ("We Will Rock You", "musica")])
+    grafo.insereA_lote([(3, 0), (3, 1), (4, 0), (4, 1, 2.5), (4, 2)])
+    return grafo
+
+@pytest.mark.parametrize("modo", ["esparsa", "densa", "bitset"])
+def test_snapshot_ida_e_volta(modo, tmp_path):
+    """
+    Testa se gravar e carregar o snapshot binário reconstrói o mesmo grafo.
+    """
+    # 1. Preparação
+    original = _grafo_catalogo()
+    original.removeV(2)  # Posição removida não vai para o arquivo
+    caminho = tmp_path / "grafo.amps"
+
+    # 2. Ação
+    assert original.gravar_snapshot(caminho)
+    carregado = TGrafoND(modo=modo)
+    carregado.carregar_snapshot(caminho)
+
+    # 3. Verificação
+    assert carregado.n == 4
+    assert carregado.m == original.m == 4
+    assert carregado.itens_reverso["We Will Rock You"] == 3
+    assert carregado.vertices_por_tipo["musica"] == {2, 3}
+    assert carregado.obter_vizinhos(3) == {0, 1}
+    assert carregado.adj[3][1] == 2.5
+    assert carregado.conexidade() == 0
+
+def test_snapshot_mapeado_aceita_alteracoes(tmp_path):
+    """
+    Testa se o grafo apoiado no arquivo mapeado continua mutável.
+    """
+    caminho = tmp_path / "grafo.amps"
+    _grafo_catalogo().gravar_snapshot(caminho)
+
+    grafo = TGrafoND(modo="esparsa")
+    grafo.carregar_snapshot(caminho)
+    grafo.removeA(4, 2)
+    nova = grafo.insereV("Radio Ga Ga", "musica")
+    grafo.insereA(nova, 1)
+
+    assert grafo.m == 5
+    assert grafo.obter_vizinhos(4) == {0, 1}
+    assert grafo.obter_vizinhos(2) == set()
+    assert grafo.obter_vizinhos(1) == {3, 4, nova}
+    assert grafo._armazenamento.linhas.materializada(1)
+    assert not grafo._armazenamento.linhas.materializada(0)
+
+    grafo.gravar_grafo_arquivo(tmp_path / "grafo.txt")
+    texto = TGrafoND(modo="esparsa")
+    texto.arquivo_para_matriz_adjacencia(tmp_path / "grafo.txt")
+    assert texto.m == 5
+    assert texto.obter_vizinhos(1) == {3, 4, 5}
+
+def test_converter_texto_e_binario(tmp_path):
+    """
+    Testa a conversão Grafo.txt -> snapshot -> Grafo.txt.
+    """
+    _grafo_catalogo().gravar_grafo_arquivo(tmp_path / "origem.txt")
+
+    assert converter_arquivo(tmp_path / "origem.txt", tmp_path / "grafo.amps")
+    assert e_snapshot(tmp_path / "grafo.amps")
+    assert converter_arquivo(tmp_path / "grafo.amps", tmp_path / "volta.txt")
+
+    assert (tmp_path / "volta.txt").read_text() == (tmp_path / "origem.txt").read_text()
+    base = SnapshotCSR(tmp_path / "grafo.amps")
+    assert list(base.vertices())[2] == (2, "Ação", "genero")
+
+def test_snapshot_invalido(tmp_path):
+    """
+    Testa se um arquivo que não é snapshot é rejeitado.
+    """
+    caminho = tmp_path / "grafo.txt"
+    _grafo_catalogo().gravar_grafo_arquivo(caminho)
+
+    with pytest.raises(ValueError):
+        TGrafoND(modo="esparsa").carregar_snapshot(caminho)
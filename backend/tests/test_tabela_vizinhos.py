@@ -0,0 +1,69 @@
+import pytest
+
+from grafoMatriz import TGrafoND
+from recomendacao import recomendar_musicas
+from tabela_vizinhos import TabelaVizinhos, construir_tabela
+
+# Faint só tem o artista, Clocks também é Rock e Sozinha não tem vizinhos
+EXTRAS = {
+    "Faint": ("Linkin Park", []),
+    "Clocks": ("Coldplay", ["Pop", "Rock"]),
+    "Sozinha": (None, []),
+}
+
+def _gravar_catalogo(catalogo, caminho):
+    grafo = catalogo(EXTRAS)
+    grafo.gravar_snapshot(caminho)
+    return grafo
+
+@pytest.mark.parametrize("processos", [1, 2])
+def test_tabela_igual_ao_calculo_ao_vivo(tmp_path, processos, catalogo):
+    """
+    Testa se a tabela calculada em lote (com e sem processos) dá as mesmas
+    top-k da recomendação ao vivo.
+    """
+    grafo = _gravar_catalogo(catalogo, tmp_path / "grafo.amps")
+    caminho = tmp_path / "recomendacoes.ampk"
+
+    total = construir_tabela(tmp_path / "grafo.amps", caminho, k=2, processos=processos, tamanho_bloco=2)
+
+    tabela = TabelaVizinhos(caminho)
+    assert total == len(tabela) == 6
+    assert tabela.k == 2
+    for nome in ("Numb", "In The End", "Faint", "Yellow", "Clocks"):
+        esperado = recomendar_musicas(grafo, nome, top_n=2, usar_cache=False)
+        assert [(n, pytest.approx(s)) for n, s in tabela.consultar(nome)] == esperado
+    assert tabela.consultar("Sozinha") is None  # Sem recomendações: fica para o cálculo ao vivo
+    assert tabela.consultar("Numb", limite=1) == [("In The End", 1.0)]
+    assert tabela.consultar("Inexistente") is None
+
+def test_tabela_vinculada_ao_grafo_de_origem(tmp_path, catalogo):
+    """
+    Testa se a tabela só vale para o grafo de onde foi calculada (mesmo
+    depois de recarregado ou compactado) e, depois de mutações, só para as
+    músicas cuja vizinhança (e a das recomendadas) não mudou.
+    """
+    grafo = _gravar_catalogo(catalogo, tmp_path / "grafo.amps")
+    construir_tabela(tmp_path / "grafo.amps", tmp_path / "recomendacoes.ampk", k=2, processos=1)
+    tabela = TabelaVizinhos(tmp_path / "recomendacoes.ampk")
+
+    recarregado = TGrafoND(modo="esparsa")
+    recarregado.carregar_snapshot(tmp_path / "grafo.amps")
+    recarregado.removeV(recarregado.itens_reverso["Sozinha"])
+    recarregado.compactar()
+    assert not tabela.vincular(recarregado)  # Outro conteúdo
+
+    assert tabela.vincular(grafo) and tabela.consultar_para(grafo, "Numb") is not None
+    grafo.compactar()  # IDs mudam, conteúdo não
+    assert tabela.consultar_para(grafo, "Numb") == tabela.consultar("Numb")
+    assert tabela.consultar_para(recarregado, "Numb") is None
+
+    nova = grafo.insereV("Nova", "musica")
+    grafo.insereA(nova, grafo.itens_reverso["Coldplay"])
+    assert tabela.consultar_para(grafo, "Numb") == tabela.consultar("Numb")
+    grafo.insereA(grafo.itens_reverso["Faint"], grafo.itens_reverso["Rock"])
+    assert tabela.consultar_para(grafo, "Faint") is None
+    # Faint está entre as recomendadas a In The End, e o score dela mudou
+    assert [nome for nome, _ in tabela.consultar("In The End")] == ["Numb", "Faint"]
+    assert tabela.consultar_para(grafo, "In The End") is None
+    assert tabela.consultar_para(grafo, "Yellow") == tabela.consultar("Yellow")